@@ -1,27 +1,26 @@
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
 from azure.ai.agents.models import ListSortOrder
 import os
 import json
 
+from agents.foundry_client import get_agent, get_project, process_run, run_error
+from agents.response_cache import cached_agent_call
+from agents.streaming import stream_run
+from utils.fs_utils import atomic_write_json
+
 # Persistent thread file for lease agent
 LEASE_THREAD_FILE = "lease_thread.json"
 
-# === Azure Foundry project setup ===
-project = AIProjectClient(
-    credential=DefaultAzureCredential(),
-    endpoint="https://team-paul-project-foundry.services.ai.azure.com/api/projects/PaulProjects"
-)
-
-# Load the lease agent
-agent = project.agents.get_agent("asst_BpZImzT6vacMJY6ENCOQROy5")
+# Lease agent in the Foundry project (client and handle are shared, see foundry_client)
+LEASE_AGENT_ID = "asst_BpZImzT6vacMJY6ENCOQROy5"
 
 
-# === Retrieve or create a thread for the lease agent ===
-def get_or_create_lease_thread():
+# === Retrieve or create a thread for the lease agent (one per dataset) ===
+def get_or_create_lease_thread(dataset=None):
+    project = get_project()
+    thread_file = dataset.file(LEASE_THREAD_FILE) if dataset is not None else LEASE_THREAD_FILE
     try:
-        if os.path.exists(LEASE_THREAD_FILE):
-            with open(LEASE_THREAD_FILE, "r") as f:
+        if os.path.exists(thread_file):
+            with open(thread_file, "r") as f:
                 thread_id = json.load(f)["thread_id"]
                 project.agents.threads.get(thread_id)  # Confirm it still exists
                 return thread_id
@@ -30,14 +29,16 @@ def get_or_create_lease_thread():
 
     # Create a new thread if none exists
     new_thread = project.agents.threads.create()
-    with open(LEASE_THREAD_FILE, "w") as f:
-        json.dump({"thread_id": new_thread.id}, f)
+    atomic_write_json(thread_file, {"thread_id": new_thread.id})
     return new_thread.id
 
 
 # === Main function to run lease agent ===
-def run_lease_agent(user_prompt: str):
-    thread_id = get_or_create_lease_thread()
+@cached_agent_call(LEASE_AGENT_ID)
+def run_lease_agent(user_prompt: str, dataset=None):
+    project = get_project()
+    agent = get_agent(LEASE_AGENT_ID)
+    thread_id = get_or_create_lease_thread(dataset)
 
     # Add user message
     project.agents.messages.create(
@@ -47,13 +48,11 @@ def run_lease_agent(user_prompt: str):
     )
 
     # Run the agent
-    run = project.agents.runs.create_and_process(
-        thread_id=thread_id,
-        agent_id=agent.id
-    )
+    run = process_run(project, thread_id, agent.id)
 
-    if run.status == "failed":
-        return {"error": f"Run failed", "details": run.last_error}
+    # Failed, cancelled, expired and incomplete runs carry an error so they are never cached
+    if run.status != "completed":
+        return run_error(run)
 
     # Get messages and return latest assistant reply
     messages = list(project.agents.messages.list(thread_id=thread_id, order=ListSortOrder.ASCENDING))
@@ -62,3 +61,17 @@ def run_lease_agent(user_prompt: str):
             return {"response": message.text_messages[-1].text.value}
 
     return {"response": "⚠️ No assistant reply found."}
+
+
+# === Streaming variant: yields the raw reply text as it is generated ===
+def stream_lease_agent(user_prompt: str, dataset=None):
+    project = get_project()
+    agent = get_agent(LEASE_AGENT_ID)
+    thread_id = get_or_create_lease_thread(dataset)
+
+    project.agents.messages.create(
+        thread_id=thread_id,
+        role="user",
+        content=user_prompt
+    )
+    yield from stream_run(project, thread_id, agent.id)
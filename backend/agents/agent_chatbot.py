@@ -1,75 +1,169 @@
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
 from azure.ai.agents.models import ListSortOrder
+import hashlib
 import os
 import json
 
-# Thread ID persistence file
+from agents.foundry_client import get_agent, get_project, process_run, run_error
+from agents.streaming import stream_run
+from utils.fs_utils import atomic_write_json, file_lock
+
+# Thread state persistence file (inside the dataset's folder when a dataset is given)
 THREAD_FILE = "chatbot_thread.json"
 
-# === Azure Foundry project setup ===
-project = AIProjectClient(
-    credential=DefaultAzureCredential(),
-    endpoint="https://team-paul-project-foundry.services.ai.azure.com/api/projects/PaulProjects"
-)
+# Chatbot agent in the Foundry project (client and handle are shared, see foundry_client)
+CHATBOT_AGENT_ID = "asst_i1CbduhlHlvRxhYnjIJ75YSJ"
+
+# A thread is rolled over after this many turns; its recent turns carry over as a compact memory
+MAX_TURNS_PER_THREAD = int(os.getenv("CHATBOT_MAX_TURNS_PER_THREAD", "8"))
+MEMORY_TURNS = 4
+MEMORY_CHARS_PER_TURN = 400
+
+
+def thread_file(dataset=None):
+    return dataset.file(THREAD_FILE) if dataset is not None else THREAD_FILE
+
+
+def _state_lock(path):
+    # Turns on one thread must not overlap (a thread can only have one active run),
+    # including turns from other worker processes sharing the dataset folder
+    return file_lock(path)
+
+
+def context_version(file_summaries):
+    """Hash of the summaries sent as context; a new upload (or file filter) starts a fresh thread."""
+    digest = hashlib.sha256()
+    for f in file_summaries or []:
+        digest.update(f"{f['filename']}\0{f['type']}\0{f['content']}\0".encode("utf-8"))
+    return digest.hexdigest()
+
 
-# Set your chatbot agent ID (from environment or hardcoded)
-agent = project.agents.get_agent("asst_i1CbduhlHlvRxhYnjIJ75YSJ")
+def _clip(text, limit=MEMORY_CHARS_PER_TURN):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
 
 
-# === Retrieve or create a thread ===
-def get_or_create_thread():
+def load_state(path=THREAD_FILE):
     try:
-        if os.path.exists(THREAD_FILE):
-            with open(THREAD_FILE, "r") as f:
-                thread_id = json.load(f)["thread_id"]
-                # Confirm thread still exists
-                project.agents.threads.get(thread_id)
-                return thread_id
-    except Exception:
-        print("⚠️ Thread not found or invalid. Creating a new one.")
-
-    # Create new thread
-    new_thread = project.agents.threads.create()
-    with open(THREAD_FILE, "w") as f:
-        json.dump({"thread_id": new_thread.id}, f)
-    return new_thread.id
+        with open(path, "r") as f:
+            state = json.load(f)
+        if "thread_id" in state:
+            return state
+    except (OSError, ValueError):
+        pass
+    return {}
 
 
-# === Main entry point from app.py ===
-def run_chatbot_agent(prompt, file_summaries=None):
-    thread_id = get_or_create_thread()
+def save_state(state, path=THREAD_FILE):
+    atomic_write_json(path, state)
 
-    # Append summaries to prompt if provided
+
+def context_message(file_summaries, memory):
+    """The one-off message that opens a thread: file summaries plus memory of earlier turns."""
+    parts = []
     if file_summaries:
-        prompt += "\n\nHere is a summary of the uploaded files:\n"
+        parts.append("Here is a summary of the uploaded files. Use it to answer the questions that follow.\n")
         for f in file_summaries:
-            prompt += f"\n--- {f['filename']} ({f['type']}) ---\n{f['content']}\n"
+            parts.append(f"\n--- {f['filename']} ({f['type']}) ---\n{f['content']}\n")
+    if memory:
+        parts.append("\nEarlier in this conversation (condensed):\n")
+        for turn in memory:
+            parts.append(f"- User: {turn['user']}\n  Assistant: {turn['assistant']}\n")
+    return "".join(parts)
+
+
+# === Retrieve the current thread, or open a new one seeded with the file context ===
+def get_or_create_thread(file_summaries=None, path=THREAD_FILE):
+    project = get_project()
+    version = context_version(file_summaries)
+    state = load_state(path)
+
+    if state and state.get("context_version") == version and state.get("turns", 0) < MAX_TURNS_PER_THREAD:
+        try:
+            project.agents.threads.get(state["thread_id"])  # Confirm thread still exists
+            return state
+        except Exception:
+            print("⚠️ Thread not found or invalid. Creating a new one.")
+
+    # Same data: carry the recent turns over; new data: start the conversation afresh
+    memory = state.get("memory", []) if state.get("context_version") == version else []
+    new_thread = project.agents.threads.create()
+    seed = context_message(file_summaries, memory)
+    if seed:
+        project.agents.messages.create(thread_id=new_thread.id, role="user", content=seed)
 
-    # Add user message to thread
+    state = {"thread_id": new_thread.id, "context_version": version, "turns": 0, "memory": memory}
+    save_state(state, path)
+    return state
+
+
+def remember_turn(state, prompt, reply, path=THREAD_FILE):
+    state["turns"] = state.get("turns", 0) + 1
+    state["memory"] = (state.get("memory", []) + [{"user": _clip(prompt), "assistant": _clip(reply)}])[-MEMORY_TURNS:]
+    save_state(state, path)
+
+
+def with_excerpts(prompt, context_chunks):
+    """Attach the retrieved file excerpts relevant to this question."""
+    if not context_chunks:
+        return prompt
+    parts = [prompt, "\n\nRelevant excerpts from the uploaded files:\n"]
+    for chunk in context_chunks:
+        parts.append(f"\n--- {chunk['filename']} ({chunk['label']}) ---\n{chunk['content']}\n")
+    return "".join(parts)
+
+
+# === Post the user's turn and return the thread state/agent to run ===
+def post_chatbot_prompt(prompt, file_summaries=None, context_chunks=None, path=THREAD_FILE):
+    project = get_project()
+    agent = get_agent(CHATBOT_AGENT_ID)
+    state = get_or_create_thread(file_summaries, path)
+
+    # File summaries were sent once when the thread was opened; each turn only carries
+    # the question and the excerpts retrieved for it
     project.agents.messages.create(
-        thread_id=thread_id,
+        thread_id=state["thread_id"],
         role="user",
-        content=prompt
-    )
-
-    # Run the assistant
-    run = project.agents.runs.create_and_process(
-        thread_id=thread_id,
-        agent_id=agent.id
+        content=with_excerpts(prompt, context_chunks)
     )
+    return project, agent, state
 
-    if run.status == "failed":
-        raise RuntimeError(f"❌ Agent run failed: {run.last_error}")
 
-    # List all messages in thread and return latest assistant reply
-    messages = list(project.agents.messages.list(
-        thread_id=thread_id,
-        order=ListSortOrder.ASCENDING
-    ))
-
-    for msg in reversed(messages):
+def latest_assistant_reply(project, thread_id):
+    """Fetch only the newest message instead of listing the whole thread."""
+    messages = project.agents.messages.list(thread_id=thread_id, order=ListSortOrder.DESCENDING, limit=1)
+    for msg in messages:
         if msg.role == "assistant" and msg.text_messages:
             return msg.text_messages[-1].text.value
+        break
+    return None
+
+
+# === Main entry point from app.py ===
+def run_chatbot_agent(prompt, file_summaries=None, context_chunks=None, dataset=None):
+    path = thread_file(dataset)
+    with _state_lock(path):
+        project, agent, state = post_chatbot_prompt(prompt, file_summaries, context_chunks, path)
+
+        # Run the assistant
+        run = process_run(project, state["thread_id"], agent.id)
+
+        if run.status != "completed":
+            raise RuntimeError(f"❌ Agent {run_error(run)['error']}: {run.last_error}")
+
+        reply = latest_assistant_reply(project, state["thread_id"])
+        if reply is None:
+            return "⚠️ No response from assistant."
+        remember_turn(state, prompt, reply, path)
+        return reply
+
 
-    return "⚠️ No response from assistant."
+# === Streaming variant: yields the reply text as it is generated ===
+def stream_chatbot_agent(prompt, file_summaries=None, context_chunks=None, dataset=None):
+    path = thread_file(dataset)
+    with _state_lock(path):
+        project, agent, state = post_chatbot_prompt(prompt, file_summaries, context_chunks, path)
+        parts = []
+        for text in stream_run(project, state["thread_id"], agent.id):
+            parts.append(text)
+            yield text
+        remember_turn(state, prompt, "".join(parts), path)
@@ -2,34 +2,41 @@ import os
 import json
 import networkx as nx
 import requests
+import numpy as np
 import pandas as pd
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 from datetime import datetime
 from config import AGENT_DEPENDENCY_ID, AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, OUTPUT_FOLDER
+from agents.dependency_graph import get_dependency_graph
+from agents.graph_layout import get_graph_layout
+from utils.inventory import get_inventory, table_for_filename
+
+def load_json(filename, store=None):
+    # Prefer the columnar inventory built at upload time over re-parsing JSON
+    table = table_for_filename(filename)
+    store = store or get_inventory()
+    if table and store is not None and store.has_table(table):
+        return store.records(table)
 
-def load_json(filename):
     path = os.path.join(OUTPUT_FOLDER, filename)
     if os.path.exists(path):
         with open(path, 'r', encoding='utf-8') as f:
             return json.load(f)
     return []
 
-def build_dependency_graph():
-    applications = load_json("applications.json")
-    dependencies = load_json("application_dependencies.json")
-    vms = load_json("virtual_machines.json")
-    servers = load_json("physical_servers.json")
+def build_dependency_graph(store=None):
+    """NetworkX view (apps, VMs, servers) for drawing; analytics come from agents.dependency_graph."""
+    store = store or get_inventory()
+    applications = load_json("applications.json", store)
+    dependencies = load_json("application_dependencies.json", store)
+    vms = load_json("virtual_machines.json", store)
 
     G = nx.DiGraph()
 
     # Add application nodes
     for app in applications:
-        app_id = app.get("application_id") or app.get("App_ID")  # fallback
-        app_name = app.get("application_name") or app.get("App_Name", "Unnamed App")
+        app_id = app.get("App_ID")
         if app_id:
-            G.add_node(app_id, label=app_name, type="application")
+            G.add_node(app_id, label=app.get("App_Name") or app_id, type="application")
 
     # Add dependency edges
     for dep in dependencies:
@@ -39,53 +46,113 @@ def build_dependency_graph():
         if source and target:
             G.add_edge(source, target, type="app_dep", label=dtype)
 
-    # Add VM nodes and edges
-    for vm in vms:
-        app_id = vm.get("application_id")
-        if app_id:
-            vm_id = vm.get("vm_id")
-            vm_name = vm.get("vm_name", vm_id)
-            G.add_node(vm_id, label=vm_name, type="vm")
+    # Add VM nodes and edges; the inventory has VMs_Assigned split into a link table already
+    if store is not None and store.has_table("application_vms"):
+        app_vms = [(link["App_ID"], link["VM_ID"]) for link in store.records("application_vms")]
+    else:
+        app_vms = [
+            (app.get("App_ID"), vm_id.strip())
+            for app in applications for vm_id in str(app.get("VMs_Assigned") or "").split(",")
+        ]
+    for app_id, vm_id in app_vms:
+        if app_id and vm_id:
+            G.add_node(vm_id, label=vm_id, type="vm")
             G.add_edge(vm_id, app_id, type="vm_to_app")
 
-    # Add server nodes and edges
-    for server in servers:
-        for vm_id in server.get("hosted_vms", []):
-            server_id = server.get("server_id")
-            server_name = server.get("server_name", server_id)
-            G.add_node(server_id, label=server_name, type="server")
+    # Add server nodes once each, then the server -> VM edges
+    servers = {vm.get("Host_Server_ID") for vm in vms if vm.get("VM_ID") and vm.get("Host_Server_ID")}
+    for server_id in servers:
+        G.add_node(server_id, label=server_id, type="server")
+    for vm in vms:
+        vm_id, server_id = vm.get("VM_ID"), vm.get("Host_Server_ID")
+        if vm_id and server_id and vm_id in G:
             G.add_edge(server_id, vm_id, type="server_to_vm")
 
     return G
 
+def dependency_report(store=None):
+    """
+    Local dependency analysis of application_dependencies.csv: the dependency
+    table, every circular dependency (via SCC), cycle membership per app and
+    edge-type counts, as JSON-ready data plus HTML tables. None without the CSV.
+    """
+    engine = get_dependency_graph(store)
+    if engine is None:
+        return None
+
+    cycles = engine.cycles()
+    cycle_of = {app_id: number for number, members in enumerate(cycles, start=1) for app_id in members}
+    cycle_ids = [cycle_of.get(app_id) for app_id in engine.ids.tolist()]
+    in_cycle_edge = engine.scc[engine.src] == engine.scc[engine.dst]
+
+    dependencies = pd.DataFrame({
+        "App_ID": engine.ids[engine.src],
+        "Depends_On_App_ID": engine.ids[engine.dst],
+        "Dependency_Type": engine.edge_type_names[engine.edge_type],
+        "Circular": in_cycle_edge,
+    })
+    apps = pd.DataFrame({
+        "App_ID": engine.ids,
+        "Site": engine.site,
+        "Depends_On": np.diff(engine.indptr),
+        "Dependents": np.diff(engine.rindptr),
+        "Cycle": pd.Series(cycle_ids, dtype=object),
+    })
+    cycle_rows = pd.DataFrame(
+        [{"Cycle": number, "Apps": len(members), "Members": ", ".join(members)}
+         for number, members in enumerate(cycles, start=1)],
+        columns=["Cycle", "Apps", "Members"],
+    )
+
+    table_classes = "table table-bordered table-striped"
+    summary = engine.summary()
+    return {
+        "summary": summary,
+        "cycles": [{"cycle": number, "apps": members} for number, members in enumerate(cycles, start=1)],
+        "apps": apps.to_dict(orient="records"),
+        "dependencies": dependencies.to_dict(orient="records"),
+        "edge_types": summary["edge_types"],
+        "cross_site_edges": engine.cross_site_edges(),
+        "html_table": dependencies.to_html(classes=table_classes, index=False),
+        "cycles_html": cycle_rows.to_html(classes=table_classes, index=False),
+    }
+
+def narrative_prompt(report, prompt):
+    """Prompt for the optional LLM narrative: the user's question plus the locally computed findings."""
+    findings = {
+        "summary": report["summary"],
+        "cycles": report["cycles"],
+        "cross_site_edges": report["cross_site_edges"],
+    }
+    return (
+        f"{prompt}\n\nThe dependency analysis below was computed from application_dependencies.csv and is "
+        "authoritative; do not recompute it. Explain what it means for the migration.\n"
+        f"{json.dumps(findings, separators=(',', ':'))}"
+    )
+
 def timestamp():
     return datetime.now().strftime('%Y%m%d_%H%M%S')
 
-def analyze_dependencies():
-    G = build_dependency_graph()
+def analyze_dependencies(dataset=None):
+    store = dataset.inventory() if dataset is not None else get_inventory()
+    engine = get_dependency_graph(store)
+    if engine is None:
+        return {"error": "No application_dependencies.csv in the current upload"}
+    G = build_dependency_graph(store)
 
     summary = {
+        **engine.summary(),
         "total_nodes": G.number_of_nodes(),
         "total_edges": G.number_of_edges(),
-        "applications": [n for n, d in G.nodes(data=True) if d.get("type") == "application"],
-        "dependencies": list(G.edges())
+        "circular_dependencies": engine.cycles(),
+        "cross_site_edges": engine.cross_site_edges(),
     }
 
-    # Filter for application-to-application dependencies
-    app_edges = [
-        (u, v, d)
-        for u, v, d in G.edges(data=True)
-        if d.get("type") == "app_dep"
-    ]
-
-    app_dep_df = pd.DataFrame([
-        {
-            "Source_App_ID": u,
-            "Target_App_ID": v,
-            "Dependency_Type": d.get("label", "depends_on")
-        }
-        for u, v, d in app_edges
-    ])
+    app_dep_df = pd.DataFrame({
+        "Source_App_ID": engine.ids[engine.src],
+        "Target_App_ID": engine.ids[engine.dst],
+        "Dependency_Type": engine.edge_type_names[engine.edge_type],
+    })
 
     # Save CSV
     os.makedirs(OUTPUT_FOLDER, exist_ok=True)
@@ -96,14 +163,12 @@ def analyze_dependencies():
     # Create HTML table
     table_html = app_dep_df.to_html(classes="table table-bordered", index=False)
 
-    # Generate and save dependency graph image
-    plt.figure(figsize=(10, 8))
-    pos = nx.spring_layout(G)
-    nx.draw(G, pos, with_labels=True, node_color='skyblue', edge_color='gray', node_size=800, font_size=8)
-    graph_filename = f"dependencies_graph_{timestamp()}.png"
+    # Save the dependency graph as SVG from the cached layout
+    _, layout = get_graph_layout(store)
+    graph_filename = f"dependencies_graph_{timestamp()}.svg"
     graph_path = os.path.join(OUTPUT_FOLDER, graph_filename)
-    plt.savefig(graph_path, bbox_inches='tight')
-    plt.close()
+    with open(graph_path, 'w', encoding='utf-8') as f:
+        f.write(layout.svg(engine))
 
     # Send summary to AI agent
     try:
@@ -1,16 +1,16 @@
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
 from azure.ai.agents.models import ListSortOrder
 import pandas as pd
 from io import StringIO
 
-def run_dependency_agent(user_prompt: str):
-    project = AIProjectClient(
-        credential=DefaultAzureCredential(),
-        endpoint="https://team-paul-project-foundry.services.ai.azure.com/api/projects/PaulProjects"
-    )
+from agents.foundry_client import get_agent, get_project, process_run, run_error
+from agents.response_cache import cached_agent_call
 
-    agent = project.agents.get_agent("asst_0dU7Cr89h80iyShw36xwbZHJ")
+DEPENDENCY_AGENT_ID = "asst_0dU7Cr89h80iyShw36xwbZHJ"
+
+@cached_agent_call(DEPENDENCY_AGENT_ID)
+def run_dependency_agent(user_prompt: str):
+    project = get_project()
+    agent = get_agent(DEPENDENCY_AGENT_ID)
     thread = project.agents.threads.create()
 
     project.agents.messages.create(
@@ -19,10 +19,11 @@ def run_dependency_agent(user_prompt: str):
         content=user_prompt
     )
 
-    run = project.agents.runs.create_and_process(thread_id=thread.id, agent_id=agent.id)
+    run = process_run(project, thread.id, agent.id)
 
-    if run.status == "failed":
-        return {"error": f"Run failed", "details": run.last_error}
+    # Failed, cancelled, expired and incomplete runs carry an error so they are never cached
+    if run.status != "completed":
+        return run_error(run)
 
     messages = list(project.agents.messages.list(thread_id=thread.id, order=ListSortOrder.ASCENDING))
 
@@ -1,19 +1,14 @@
 import os
-import fitz  # PyMuPDF
 import json
 import requests
 from config import AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_KEY, AGENT_LEASE_ID
+from utils.pdf_parser import extract_pdf_text
 
 # Correct path to app_files
 APP_FILES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app_files"))
 
 def extract_text_from_pdf(file_path):
-    text = ""
-    doc = fitz.open(file_path)
-    for page in doc:
-        text += page.get_text()
-    doc.close()
-    return text
+    return extract_pdf_text(file_path, separator="")
 
 def analyze_lease():
     #import pdb; pdb.set_trace()
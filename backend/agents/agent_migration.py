@@ -1,57 +1,44 @@
 import json
-import os
-from datetime import datetime
 import requests
-from config import AGENT_MIGRATION_ID, AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, OUTPUT_FOLDER
+from config import AGENT_MIGRATION_ID, AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT
+from agents.dependency_graph import get_dependency_graph
+from agents.roi_formatter import parse_lease_response
+from agents.wave_planner import app_attributes, lease_deadlines, plan_waves
+from utils.datasets import get_dataset
 
-def rank_applications_by_roi_and_urgency(lease_data, dependency_data):
-    ranked_apps = []
-    for lease in lease_data:
-        risk = 2 if "high" in str(lease.get("risks", [])).lower() else 1
-        roi = lease.get("estimated_roi", 0)
-        try:
-            roi = float(roi) if isinstance(roi, str) else roi
-        except:
-            roi = 0
-        score = roi - risk * 10
-        ranked_apps.append((lease.get("filename", "unknown"), score))
-
-    ranked_apps.sort(key=lambda x: x[1], reverse=True)
-    return [app for app, score in ranked_apps]
-
-def build_migration_plan():
-    lease_data_path = os.path.join(OUTPUT_FOLDER, "lease_analysis.json")
-    dependency_data_path = os.path.join(OUTPUT_FOLDER, "dependency_analysis.json")
-
-    try:
-        with open(lease_data_path) as f:
-            lease_data = json.load(f)
-    except:
-        lease_data = []
+WAVE_PLAN_FILE = "wave_plan.json"
 
+def load_lease_data(dataset):
     try:
-        with open(dependency_data_path) as f:
-            dependency_data = json.load(f)
-    except:
-        dependency_data = {}
-
-    ordered_apps = rank_applications_by_roi_and_urgency(lease_data, dependency_data)
-    total_apps = len(ordered_apps)
+        lease_data = parse_lease_response(dataset.read_json("lease_output.json", {}).get("response", ""))
+    except ValueError:
+        return {}
+    return lease_data if isinstance(lease_data, dict) else {}
 
-    waves = [
-        {
-            "wave": i + 1,
-            "apps": ordered_apps[i::3],
-            "migration_window": f"{datetime.now().year + i}-Q1"
-        }
-        for i in range(3)
-    ]
+def plan_migration_waves(dataset, start=None, replan=True, save=False, **limits):
+    """
+    Wave plan for a dataset's inventory (None without application_dependencies.csv).
+    Lease end dates come from the last lease analysis; with replan, apps keep the
+    waves of the saved plan where they still fit. Only save=True replaces the
+    saved plan, so what-if plans never move the baseline.
+    """
+    store = dataset.inventory()
+    engine = get_dependency_graph(store) if store is not None else None
+    if engine is None:
+        return None
+    previous = (dataset.read_json(WAVE_PLAN_FILE) or {}).get("assignment") if replan else None
+    plan = plan_waves(
+        engine, app_attributes(store, engine), lease_deadlines(load_lease_data(dataset)),
+        start=start, previous=previous, **limits,
+    )
+    if save:
+        dataset.write_json(WAVE_PLAN_FILE, plan)
+    return plan
 
-    plan = {
-        "total_apps": total_apps,
-        "migration_strategy": "ROI and risk weighted 3-phase migration",
-        "waves": waves
-    }
+def build_migration_plan(dataset=None):
+    plan = plan_migration_waves(dataset or get_dataset())
+    if plan is None:
+        return {"error": "No application_dependencies.csv in the current upload"}
 
     try:
         headers = {
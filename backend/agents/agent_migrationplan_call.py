@@ -1,14 +1,15 @@
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
 from azure.ai.agents.models import ListSortOrder
 
-def run_migrationplan_agent(user_prompt: str):
-    project = AIProjectClient(
-        credential=DefaultAzureCredential(),
-        endpoint="https://team-paul-project-foundry.services.ai.azure.com/api/projects/PaulProjects"
-    )
+from agents.foundry_client import get_agent, get_project, process_run, run_error
+from agents.response_cache import cached_agent_call, cached_agent_stream
+from agents.streaming import stream_run
 
-    agent = project.agents.get_agent("asst_6pgk9JBQmIeWqjn3UbnlZbmh")
+MIGRATION_PLAN_AGENT_ID = "asst_6pgk9JBQmIeWqjn3UbnlZbmh"
+
+@cached_agent_call(MIGRATION_PLAN_AGENT_ID)
+def run_migrationplan_agent(user_prompt: str):
+    project = get_project()
+    agent = get_agent(MIGRATION_PLAN_AGENT_ID)
     thread = project.agents.threads.create()
 
     project.agents.messages.create(
@@ -17,13 +18,11 @@ def run_migrationplan_agent(user_prompt: str):
         content=user_prompt
     )
 
-    run = project.agents.runs.create_and_process(
-        thread_id=thread.id,
-        agent_id=agent.id
-    )
+    run = process_run(project, thread.id, agent.id)
 
-    if run.status == "failed":
-        return {"error": "Run failed", "details": run.last_error}
+    # Failed, cancelled, expired and incomplete runs carry an error so they are never cached
+    if run.status != "completed":
+        return run_error(run)
 
     messages = project.agents.messages.list(
         thread_id=thread.id,
@@ -38,3 +37,18 @@ def run_migrationplan_agent(user_prompt: str):
 
     combined_response = "\n\n".join(assistant_responses)
     return {"response": combined_response if combined_response else "No assistant reply found."}
+
+
+@cached_agent_stream(MIGRATION_PLAN_AGENT_ID)
+def stream_migrationplan_agent(user_prompt: str):
+    """Like run_migrationplan_agent, but yields the reply text as it is generated."""
+    project = get_project()
+    agent = get_agent(MIGRATION_PLAN_AGENT_ID)
+    thread = project.agents.threads.create()
+
+    project.agents.messages.create(
+        thread_id=thread.id,
+        role="user",
+        content=user_prompt
+    )
+    yield from stream_run(project, thread.id, agent.id)
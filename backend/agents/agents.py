@@ -3,6 +3,9 @@ import json
 from dotenv import load_dotenv
 import openai
 
+from agents.response_cache import cached_agent_call
+from utils.inventory import get_inventory, table_for_filename
+
 # Load credentials from .env file
 load_dotenv()
 openai.api_type = "azure"
@@ -14,6 +17,11 @@ deployment_name = os.getenv("OPENAI_DEPLOYMENT_NAME")
 APP_FILES_DIR = "app_files"
 
 def load_json_file(filename):
+    table = table_for_filename(filename)
+    store = get_inventory()
+    if table and store is not None and store.has_table(table):
+        return store.records(table)
+
     path = os.path.join(APP_FILES_DIR, filename)
     if os.path.exists(path):
         with open(path, "r", encoding="utf-8") as f:
@@ -27,6 +35,8 @@ def load_text_file(filename):
             return f.read()
     return ""
 
+# The prompt carries the data itself, so the cache key doesn't need the dataset hash
+@cached_agent_call(f"openai:{deployment_name}", per_dataset=False)
 def call_openai(prompt):
     try:
         response = openai.ChatCompletion.create(
@@ -0,0 +1,188 @@
+import json
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from agents.dependency_graph import get_dependency_graph
+from utils.fs_utils import atomic_write_json
+from utils.inventory import BuildArtifactCache, get_inventory
+
+# Share of the depended-on app's Data_Size_GB assumed to flow per day, by
+# dependency type. The inventory has no flow logs, so traffic is estimated.
+FLOW_SHARE_BY_TYPE = {"streams_to": 0.10, "writes_to": 0.05, "reads_from": 0.05, "calls": 0.01}
+DEFAULT_FLOW_SHARE = 0.02
+ANALYSIS_FILE = "cluster_analysis.json"
+MAX_CLUSTERS = 25
+MAX_CLUSTER_APPS = 10
+MAX_HOTSPOTS = 10
+MAX_CACHED_ANALYSES = 16
+# Weakly connected clusters up to this size are kept whole instead of split by Louvain
+MIN_LOUVAIN_CLUSTER = 8
+
+
+def app_vm_links(store):
+    """(App_ID, VM_ID) rows, from the application_vms link table built out of applications.VMs_Assigned."""
+    if not store.has_table("application_vms"):
+        return pd.DataFrame({"App_ID": pd.Series(dtype=str), "VM_ID": pd.Series(dtype=str)})
+    return store.frame("application_vms", ["App_ID", "VM_ID"]).astype(str)
+
+
+def _round(value):
+    return round(float(value), 1)
+
+
+def analyze_clusters(store, seed=0):
+    """
+    Traffic-weighted grouping inputs for the migration plan, computed locally:
+
+    - clusters: Louvain communities over the dependency graph weighted by
+      estimated daily flow (GB/day), with their apps (busiest first), flow,
+      VM/server count, top priority and sites
+    - cross_site: dependency count and estimated flow per site pair, with the
+      network link between them
+    - hotspots: Host_Server_IDs running more than two high-traffic apps
+      (top quartile by flow)
+
+    Returns None without application_dependencies.csv.
+    """
+    engine = get_dependency_graph(store)
+    if engine is None:
+        return None
+
+    apps = store.frame("applications", ["App_ID", "Data_Size_GB", "Priority"]).astype({"App_ID": str})
+    apps = apps.drop_duplicates("App_ID").set_index("App_ID").reindex(engine.ids)
+    data_gb = pd.to_numeric(apps.get("Data_Size_GB", pd.Series(dtype=float)), errors="coerce").fillna(0).to_numpy()
+    priority = pd.to_numeric(apps.get("Priority", pd.Series(dtype=float)), errors="coerce").to_numpy(dtype=float)
+
+    share = np.array([FLOW_SHARE_BY_TYPE.get(t, DEFAULT_FLOW_SHARE) for t in engine.edge_type_names.tolist()])
+    flow = share[engine.edge_type] * data_gb[engine.dst] if engine.edge_count else np.zeros(0)
+    app_flow = np.bincount(engine.src, weights=flow, minlength=engine.node_count) \
+        + np.bincount(engine.dst, weights=flow, minlength=engine.node_count)
+
+    # Louvain on the undirected, flow-weighted graph (parallel edges summed). It
+    # never merges disconnected apps, so only clusters too big to be a single
+    # group go through it; the rest keep their weakly connected cluster.
+    cluster_size = np.bincount(engine.wcc, minlength=engine.wcc.max() + 1 if engine.node_count else 0)
+    split = cluster_size[engine.wcc] > MIN_LOUVAIN_CLUSTER
+    community = engine.wcc.copy()
+    if split.any():
+        pairs = pd.DataFrame({"a": np.minimum(engine.src, engine.dst), "b": np.maximum(engine.src, engine.dst),
+                              "w": flow + 1e-6})
+        pairs = pairs[(pairs["a"] != pairs["b"]) & split[pairs["a"].to_numpy()]]
+        graph = nx.Graph()
+        graph.add_nodes_from(np.flatnonzero(split).tolist())
+        graph.add_weighted_edges_from(pairs.groupby(["a", "b"], as_index=False)["w"].sum().itertuples(index=False, name=None))
+        offset = len(cluster_size)
+        for label, members in enumerate(nx.community.louvain_communities(graph, weight="weight", seed=seed)):
+            community[list(members)] = offset + label
+        community = np.unique(community, return_inverse=True)[1]
+
+    links = app_vm_links(store)
+    vms = store.frame("virtual_machines", ["VM_ID", "Host_Server_ID"]).astype(str)
+    hosting = links.merge(vms, on="VM_ID", how="left")
+    hosting["node"] = pd.Index(engine.ids).get_indexer(hosting["App_ID"])
+    hosting = hosting[hosting["node"] >= 0]
+
+    # --- clusters ---
+    internal = community[engine.src] == community[engine.dst]
+    cluster_flow = np.bincount(community[engine.src[internal]], weights=flow[internal],
+                               minlength=community.max() + 1 if engine.node_count else 0)
+    hosting["cluster"] = community[hosting["node"].to_numpy()]
+    vm_counts = hosting.groupby("cluster")["VM_ID"].nunique()
+    server_counts = hosting.dropna(subset=["Host_Server_ID"]).query("Host_Server_ID != 'nan'") \
+        .groupby("cluster")["Host_Server_ID"].nunique()
+    by_community = np.argsort(community, kind="stable")
+    members_of = np.split(by_community, np.flatnonzero(np.diff(community[by_community])) + 1) \
+        if engine.node_count else []
+    clusters = []
+    for label in np.argsort(-cluster_flow, kind="stable").tolist():
+        members = members_of[label]
+        members = members[np.lexsort((engine.ids[members], -app_flow[members]))]
+        top_priority = np.nanmin(priority[members]) if np.isfinite(priority[members]).any() else None
+        clusters.append({
+            "cluster": len(clusters) + 1,
+            "apps": engine.ids[members].tolist(),
+            "app_count": len(members),
+            "flow_gb_per_day": _round(cluster_flow[label]),
+            "vms": int(vm_counts.get(label, 0)),
+            "servers": int(server_counts.get(label, 0)),
+            "priority": int(top_priority) if top_priority is not None else None,
+            "sites": sorted(set(engine.site[members].tolist())),
+        })
+
+    # --- cross-site flows ---
+    cross = engine.site[engine.src] != engine.site[engine.dst]
+    network = store.frame("network_links", ["From", "To", "Bandwidth_Gbps", "Latency_ms"]).astype({"From": str, "To": str})
+    cross_site = []
+    if cross.any():
+        volumes = pd.DataFrame({"from_site": engine.site[engine.src[cross]], "to_site": engine.site[engine.dst[cross]],
+                                "flow": flow[cross]}).groupby(["from_site", "to_site"])["flow"].agg(["size", "sum"])
+        for (from_site, to_site), row in volumes.sort_values("sum", ascending=False).iterrows():
+            link = network[((network["From"] == from_site) & (network["To"] == to_site))
+                           | ((network["From"] == to_site) & (network["To"] == from_site))]
+            entry = {"from_site": from_site, "to_site": to_site, "dependencies": int(row["size"]),
+                     "flow_gb_per_day": _round(row["sum"])}
+            if not link.empty:
+                entry["bandwidth_gbps"] = float(pd.to_numeric(link["Bandwidth_Gbps"], errors="coerce").iloc[0])
+                entry["latency_ms"] = float(pd.to_numeric(link["Latency_ms"], errors="coerce").iloc[0])
+            cross_site.append(entry)
+
+    # --- co-location hotspots ---
+    busy = app_flow >= np.quantile(app_flow, 0.75) if engine.node_count else np.zeros(0, dtype=bool)
+    busy &= app_flow > 0
+    on_host = hosting[busy[hosting["node"].to_numpy()] & (hosting["Host_Server_ID"] != "nan")]
+    on_host = on_host.dropna(subset=["Host_Server_ID"]).drop_duplicates(["Host_Server_ID", "App_ID"])
+    hotspots = []
+    for server, group in on_host.groupby("Host_Server_ID"):
+        if len(group) > 2:
+            nodes = group["node"].to_numpy()
+            hotspots.append({"server": server, "high_traffic_apps": sorted(group["App_ID"].tolist()),
+                             "flow_gb_per_day": _round(app_flow[nodes].sum())})
+    hotspots.sort(key=lambda h: (-len(h["high_traffic_apps"]), -h["flow_gb_per_day"], h["server"]))
+
+    return {
+        "applications": int(engine.node_count),
+        "vms": int(links["VM_ID"].nunique()),
+        "servers": int(hosting["Host_Server_ID"].replace("nan", np.nan).nunique()),
+        "total_flow_gb_per_day": _round(flow.sum()),
+        "priorities": {str(int(p)): int(c) for p, c in zip(*np.unique(priority[np.isfinite(priority)], return_counts=True))},
+        "clusters": clusters,
+        "cross_site": cross_site,
+        "hotspots": hotspots,
+    }
+
+
+def plan_context(analysis, max_clusters=MAX_CLUSTERS, max_hotspots=MAX_HOTSPOTS, max_apps=MAX_CLUSTER_APPS):
+    """
+    Compact JSON of an analysis for the plan agent prompt: the largest clusters
+    with only their busiest apps (app_count keeps the size), and top hotspots.
+    """
+    compact = dict(analysis)
+    clusters = analysis["clusters"]
+    compact["clusters"] = [dict(c, apps=c["apps"][:max_apps]) for c in clusters[:max_clusters]]
+    if len(clusters) > max_clusters:
+        compact["other_clusters"] = {"count": len(clusters) - max_clusters,
+                                     "apps": sum(c["app_count"] for c in clusters[max_clusters:])}
+    compact["hotspots"] = analysis["hotspots"][:max_hotspots]
+    return json.dumps(compact, separators=(",", ":"))
+
+
+def _load_analysis(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_analysis(analysis, path):
+    atomic_write_json(path, analysis)
+
+
+_analyses = BuildArtifactCache(ANALYSIS_FILE, _load_analysis, _save_analysis, MAX_CACHED_ANALYSES)
+
+
+def get_cluster_analysis(store=None):
+    """analyze_clusters for a store, computed once per inventory build and saved beside it."""
+    store = store or get_inventory()
+    if store is None or get_dependency_graph(store) is None:
+        return None
+    return _analyses.get(store, lambda: analyze_clusters(store))
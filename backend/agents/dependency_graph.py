@@ -0,0 +1,258 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.inventory import BuildArtifactCache, get_inventory
+
+GRAPH_FILE = "dependency_graph.npz"
+MAX_CACHED_GRAPHS = 16
+
+
+def _site_of(app_ids):
+    # "VA-APP001" -> "VA"
+    return np.char.partition(np.asarray(app_ids, dtype=str), "-")[:, 0]
+
+
+def _csr(src, dst, n):
+    """CSR adjacency (indptr, indices, order) for edges src -> dst; `order` maps CSR slots back to edge rows."""
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[order].astype(np.int64), order
+
+
+def strongly_connected_components(indptr, indices):
+    """Iterative Tarjan over CSR arrays. Returns a component label per node (labels in reverse topological order)."""
+    n = len(indptr) - 1
+    # Plain lists: scalar access in this loop is several times faster than on numpy arrays
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    labels = [-1] * n
+    stack, counter, n_components = [], 0, 0
+    indptr_l, indices_l = indptr.tolist(), indices.tolist()
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        work = [(root, indptr_l[root])]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, edge = work[-1]
+            if edge < indptr_l[node + 1]:
+                work[-1] = (node, edge + 1)
+                nxt = indices_l[edge]
+                if index[nxt] == -1:
+                    index[nxt] = low[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    on_stack[nxt] = True
+                    work.append((nxt, indptr_l[nxt]))
+                elif on_stack[nxt]:
+                    low[node] = min(low[node], index[nxt])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    labels[member] = n_components
+                    if member == node:
+                        break
+                n_components += 1
+    return np.asarray(labels, dtype=np.int64)
+
+
+def weakly_connected_components(src, dst, n):
+    """Union-find over the edge list; labels are renumbered 0..k-1 in order of first appearance."""
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in zip(src.tolist(), dst.tolist()):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    roots = np.array([find(x) for x in range(n)], dtype=np.int64)
+    _, labels = np.unique(roots, return_inverse=True)
+    return labels.astype(np.int64)
+
+
+class DependencyGraph:
+    """
+    Application dependency graph as compact integer arrays, with the analytics
+    the dependency, layout and wave-planning code need precomputed once:
+
+    - CSR adjacency (forward: app -> what it depends on; reverse: dependents)
+    - strongly connected components (circular dependencies)
+    - weakly connected clusters
+    - a topological order in which every app comes after its dependencies
+      (members of a cycle are adjacent, in no particular order)
+    - cross-site edge counts
+
+    Apps are numbered 0..n-1 in `ids`; edges keep their input row order in
+    `src`/`dst`/`edge_type`.
+    """
+
+    ARRAYS = (
+        "ids", "site", "src", "dst", "edge_type", "edge_type_names",
+        "indptr", "indices", "rindptr", "rindices", "scc", "wcc", "topo",
+    )
+
+    def __init__(self, **arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.index = {app_id: i for i, app_id in enumerate(self.ids.tolist())}
+
+    @classmethod
+    def from_frames(cls, applications, dependencies):
+        deps = dependencies.astype({"App_ID": str, "Depends_On_App_ID": str}).copy()
+        deps = deps[(deps["App_ID"] != "") & (deps["Depends_On_App_ID"] != "")]
+        app_ids = applications["App_ID"].astype(str) if "App_ID" in applications else pd.Series([], dtype=str)
+        # Apps named only in the dependency table still become nodes
+        ids = pd.unique(pd.concat([app_ids, deps["App_ID"], deps["Depends_On_App_ID"]], ignore_index=True))
+        ids = np.asarray(ids, dtype=str)
+        n = len(ids)
+        position = pd.Index(ids)
+
+        src = position.get_indexer(deps["App_ID"]).astype(np.int64)
+        dst = position.get_indexer(deps["Depends_On_App_ID"]).astype(np.int64)
+        types = deps["Dependency_Type"].fillna("depends_on").astype(str) if "Dependency_Type" in deps \
+            else pd.Series(["depends_on"] * len(deps))
+        edge_type, edge_type_names = pd.factorize(types)
+
+        if "Site" in applications:
+            declared = pd.Series(applications["Site"].astype(str).to_numpy(), index=app_ids.to_numpy())
+            declared = declared[~declared.index.duplicated()]
+            site = declared.reindex(ids).fillna(pd.Series(_site_of(ids), index=ids)).to_numpy(dtype=str)
+        else:
+            site = _site_of(ids)
+
+        indptr, indices, _ = _csr(src, dst, n)
+        rindptr, rindices, _ = _csr(dst, src, n)
+        scc = strongly_connected_components(indptr, indices)
+        # Tarjan emits components dependencies-first, so sorting by label is a topological order
+        topo = np.argsort(scc, kind="stable").astype(np.int64)
+        return cls(
+            ids=ids, site=site, src=src, dst=dst, edge_type=edge_type.astype(np.int64),
+            edge_type_names=np.asarray(edge_type_names, dtype=str),
+            indptr=indptr, indices=indices, rindptr=rindptr, rindices=rindices,
+            scc=scc, wcc=weakly_connected_components(src, dst, n), topo=topo,
+        )
+
+    @classmethod
+    def from_store(cls, store):
+        return cls.from_frames(
+            store.frame("applications", ["App_ID", "Site"]),
+            store.frame("application_dependencies", ["App_ID", "Depends_On_App_ID", "Dependency_Type"]),
+        )
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, **{name: getattr(self, name) for name in self.ARRAYS})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{name: data[name] for name in cls.ARRAYS})
+
+    # --- queries ---
+
+    @property
+    def node_count(self):
+        return len(self.ids)
+
+    @property
+    def edge_count(self):
+        return len(self.src)
+
+    def dependencies_of(self, app_id):
+        i = self.index[app_id]
+        return self.ids[self.indices[self.indptr[i]:self.indptr[i + 1]]].tolist()
+
+    def dependents_of(self, app_id):
+        i = self.index[app_id]
+        return self.ids[self.rindices[self.rindptr[i]:self.rindptr[i + 1]]].tolist()
+
+    def self_loops(self):
+        return self.src == self.dst
+
+    def cycles(self):
+        """Circular dependency groups: SCCs with more than one app, plus apps depending on themselves."""
+        sizes = np.bincount(self.scc, minlength=self.scc.max() + 1 if self.node_count else 0)
+        cyclic = sizes > 1
+        cyclic[self.scc[self.src[self.self_loops()]]] = True
+        groups = []
+        for label in np.flatnonzero(cyclic):
+            groups.append(sorted(self.ids[self.scc == label].tolist()))
+        return sorted(groups, key=lambda g: (-len(g), g))
+
+    def in_cycle(self):
+        """Boolean per app: is it part of a circular dependency?"""
+        sizes = np.bincount(self.scc, minlength=self.scc.max() + 1 if self.node_count else 0)
+        flags = sizes[self.scc] > 1
+        flags[self.src[self.self_loops()]] = True
+        return flags
+
+    def clusters(self):
+        """Weakly connected clusters as lists of app ids, largest first."""
+        order = np.argsort(self.wcc, kind="stable")
+        bounds = np.flatnonzero(np.diff(self.wcc[order])) + 1
+        groups = [sorted(self.ids[part].tolist()) for part in np.split(order, bounds)] if self.node_count else []
+        return sorted(groups, key=lambda g: (-len(g), g))
+
+    def topological_order(self):
+        """App ids ordered so that every app comes after the apps it depends on (cycles kept together)."""
+        return self.ids[self.topo].tolist()
+
+    def cross_site_edges(self):
+        """[{"from_site", "to_site", "edges"}] for dependencies that cross sites, most edges first."""
+        mask = self.site[self.src] != self.site[self.dst]
+        if not mask.any():
+            return []
+        counts = pd.DataFrame({"from_site": self.site[self.src[mask]], "to_site": self.site[self.dst[mask]]}) \
+            .value_counts().reset_index(name="edges")
+        return counts.sort_values(["edges", "from_site", "to_site"], ascending=[False, True, True]) \
+            .to_dict(orient="records")
+
+    def summary(self):
+        cycles = self.cycles()
+        return {
+            "applications": int(self.node_count),
+            "dependencies": int(self.edge_count),
+            "circular_dependency_groups": len(cycles),
+            "apps_in_cycles": int(self.in_cycle().sum()),
+            "clusters": int(self.wcc.max() + 1) if self.node_count else 0,
+            "cross_site_dependencies": int((self.site[self.src] != self.site[self.dst]).sum()),
+            "edge_types": {
+                name: int(count)
+                for name, count in zip(self.edge_type_names.tolist(),
+                                       np.bincount(self.edge_type, minlength=len(self.edge_type_names)).tolist())
+            },
+        }
+
+
+_graphs = BuildArtifactCache(GRAPH_FILE, DependencyGraph.load, DependencyGraph.save, MAX_CACHED_GRAPHS)
+
+
+def get_dependency_graph(store=None):
+    """
+    The graph for an inventory store, built once per inventory version and
+    cached beside the build (see BuildArtifactCache). None without an inventory.
+    """
+    store = store or get_inventory()
+    if store is None or not store.has_table("application_dependencies"):
+        return None
+    return _graphs.get(store, lambda: DependencyGraph.from_store(store))
@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+
+import requests
+from azure.ai.projects import AIProjectClient
+from azure.core.pipeline.transport import RequestsTransport
+from azure.identity import DefaultAzureCredential
+
+from agents.orchestrator import current_cancel_event
+
+FOUNDRY_ENDPOINT = os.getenv(
+    "FOUNDRY_PROJECT_ENDPOINT",
+    "https://team-paul-project-foundry.services.ai.azure.com/api/projects/PaulProjects",
+)
+POOL_MAXSIZE = int(os.getenv("FOUNDRY_POOL_MAXSIZE", "32"))
+# Refresh tokens this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 300
+RUN_POLL_SECONDS = 1.0
+# Run states that can still change; anything else (completed, failed, cancelled, expired, ...) is final
+ACTIVE_RUN_STATUSES = ("queued", "in_progress", "cancelling")
+
+
+class CachedTokenCredential:
+    """Wraps a credential so every client shares one token per scope until it is close to expiry."""
+
+    def __init__(self, credential, refresh_margin=TOKEN_REFRESH_MARGIN):
+        self._credential = credential
+        self._refresh_margin = refresh_margin
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes, **kwargs):
+        key = (scopes, kwargs.get("claims"), kwargs.get("tenant_id"))
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is None or token.expires_on - self._refresh_margin <= time.time():
+                token = self._credential.get_token(*scopes, **kwargs)
+                self._tokens[key] = token
+            return token
+
+    def close(self):
+        close = getattr(self._credential, "close", None)
+        if close:
+            close()
+
+
+def _pooled_transport(pool_maxsize=POOL_MAXSIZE):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return RequestsTransport(session=session, session_owner=False)
+
+
+class FoundryRegistry:
+    """
+    One lazily created AIProjectClient per process, sharing a pooled HTTP session
+    and a cached credential, plus memoized agent handles.
+
+    Nothing touches the network until the first project()/agent() call, so
+    importing the agent modules stays cheap. endpoint, credential and extra client
+    kwargs can be overridden (e.g. to point at a local stub server in tests).
+    """
+
+    def __init__(self, endpoint=None, credential=None, **client_kwargs):
+        self.endpoint = endpoint or FOUNDRY_ENDPOINT
+        self._credential = credential
+        self._client_kwargs = client_kwargs
+        self._project = None
+        self._agents = {}
+        self._lock = threading.Lock()
+
+    def project(self):
+        with self._lock:
+            if self._project is None:
+                credential = CachedTokenCredential(self._credential or DefaultAzureCredential())
+                kwargs = dict(self._client_kwargs)
+                kwargs.setdefault("transport", _pooled_transport())
+                self._project = AIProjectClient(credential=credential, endpoint=self.endpoint, **kwargs)
+            return self._project
+
+    def agent(self, agent_id):
+        with self._lock:
+            agent = self._agents.get(agent_id)
+        if agent is None:
+            agent = self.project().agents.get_agent(agent_id)
+            with self._lock:
+                agent = self._agents.setdefault(agent_id, agent)
+        return agent
+
+    def close(self):
+        with self._lock:
+            if self._project is not None:
+                self._project.close()
+            self._project = None
+            self._agents = {}
+
+
+_registry = FoundryRegistry()
+_registry_lock = threading.Lock()
+
+
+def get_project():
+    return _registry.project()
+
+
+def get_agent(agent_id):
+    return _registry.agent(agent_id)
+
+
+def configure(endpoint=None, credential=None, **client_kwargs):
+    """Swap the process-wide registry (closing the old client), e.g. to target a stub server."""
+    global _registry
+    with _registry_lock:
+        _registry.close()
+        _registry = FoundryRegistry(endpoint, credential, **client_kwargs)
+    return _registry
+
+
+def process_run(project, thread_id, agent_id, poll_interval=RUN_POLL_SECONDS):
+    """
+    Start a run and poll it until it reaches a final state, like
+    runs.create_and_process. If the orchestrator gives up on the call (its cancel
+    event is set), the run is cancelled in Foundry instead of left running.
+    """
+    runs = project.agents.runs
+    run = runs.create(thread_id=thread_id, agent_id=agent_id)
+    cancel = current_cancel_event() or threading.Event()
+    while run.status in ACTIVE_RUN_STATUSES:
+        if cancel.wait(poll_interval):
+            return runs.cancel(thread_id=thread_id, run_id=run.id)
+        run = runs.get(thread_id=thread_id, run_id=run.id)
+    return run
+
+
+def run_error(run):
+    """Error reply for a run that did not complete (failed, cancelled, expired, incomplete)."""
+    status = getattr(run.status, "value", run.status)
+    return {"error": f"Run {status}", "details": run.last_error}
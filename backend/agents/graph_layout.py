@@ -0,0 +1,213 @@
+import os
+from html import escape
+
+import numpy as np
+
+from agents.dependency_graph import get_dependency_graph
+from utils.inventory import BuildArtifactCache, get_inventory
+
+LAYOUT_FILE = "dependency_layout.npz"
+MAX_CACHED_LAYOUTS = 16
+CLUSTER_GAP = 2.0
+MAX_SVG_NODES = 5000
+MAX_SVG_EDGES = 20000
+MAX_TILE_NODES = 5000
+MAX_TILE_EDGES = 20000
+SITE_COLORS = ("#4e79a7", "#f28e2b", "#59a14f", "#e15759", "#76b7b2", "#edc948", "#b07aa1", "#9c755f")
+
+
+def scc_depths(engine):
+    """
+    Layer per app: the longest dependency chain below its SCC in the condensation,
+    so dependencies sit left of their dependents and a cycle shares one layer.
+    """
+    comp_src, comp_dst = engine.scc[engine.src], engine.scc[engine.dst]
+    keep = comp_src != comp_dst
+    comp_src, comp_dst = comp_src[keep], comp_dst[keep]
+    # Tarjan labels dependencies before dependents, so one pass in source-label
+    # order sees every dependency's depth finalized
+    order = np.argsort(comp_src, kind="stable")
+    depth = [0] * (int(engine.scc.max()) + 1 if engine.node_count else 0)
+    for c, d in zip(comp_src[order].tolist(), comp_dst[order].tolist()):
+        if depth[d] + 1 > depth[c]:
+            depth[c] = depth[d] + 1
+    return np.asarray(depth, dtype=np.int64)[engine.scc] if engine.node_count else np.zeros(0, dtype=np.int64)
+
+
+def _shelf_pack(widths, heights, gap=CLUSTER_GAP):
+    """Offsets for boxes packed tallest-first onto shelves about as wide as the packing is tall."""
+    n = len(widths)
+    offsets = np.zeros((n, 2))
+    if n == 0:
+        return offsets
+    row_width = max(float(widths.max()), float(np.sqrt(((widths + gap) * (heights + gap)).sum())))
+    x = y = shelf_height = 0.0
+    for i in np.argsort(-heights, kind="stable").tolist():
+        if x > 0 and x + widths[i] > row_width:
+            x, y, shelf_height = 0.0, y + shelf_height + gap, 0.0
+        offsets[i] = (x, y)
+        x += widths[i] + gap
+        shelf_height = max(shelf_height, heights[i])
+    return offsets
+
+
+class GraphLayout:
+    """
+    Node positions for the application dependency graph: each weakly connected
+    cluster gets a layered layout (x = dependency depth, y = slot within the
+    layer), and clusters are shelf-packed side by side. Linear in apps and
+    edges, unlike force-directed layouts, and it keeps clusters readable.
+    """
+
+    ARRAYS = ("x", "y", "layer")
+
+    def __init__(self, x, y, layer):
+        self.x, self.y, self.layer = x, y, layer
+
+    @classmethod
+    def compute(cls, engine):
+        n = engine.node_count
+        layer = scc_depths(engine)
+        if n == 0:
+            return cls(np.zeros(0), np.zeros(0), layer)
+        # Within a (cluster, layer), keep the topological order so related apps stay adjacent
+        rank = np.empty(n, dtype=np.int64)
+        rank[engine.topo] = np.arange(n)
+        order = np.lexsort((rank, layer, engine.wcc))
+        group = engine.wcc[order] * (int(layer.max()) + 1) + layer[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(group)) + 1]
+        slot = np.empty(n, dtype=np.int64)
+        slot[order] = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+
+        clusters = int(engine.wcc.max()) + 1
+        widths = np.zeros(clusters)
+        heights = np.zeros(clusters)
+        np.maximum.at(widths, engine.wcc, layer.astype(float))
+        np.maximum.at(heights, engine.wcc, slot.astype(float))
+        offsets = _shelf_pack(widths, heights)
+        x = layer + offsets[engine.wcc, 0]
+        y = slot + offsets[engine.wcc, 1]
+        return cls(x.astype(np.float32), y.astype(np.float32), layer)
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, **{name: getattr(self, name) for name in self.ARRAYS})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(*(data[name] for name in cls.ARRAYS))
+
+    def bounds(self):
+        if not len(self.x):
+            return [0.0, 0.0, 0.0, 0.0]
+        return [float(self.x.min()), float(self.y.min()), float(self.x.max()), float(self.y.max())]
+
+    def window(self, engine, bbox=None):
+        """Node indices inside bbox (x0, y0, x1, y1), all nodes when None, and the edges touching them."""
+        if bbox is None:
+            nodes = np.arange(engine.node_count)
+        else:
+            x0, y0, x1, y1 = bbox
+            nodes = np.flatnonzero((self.x >= x0) & (self.x <= x1) & (self.y >= y0) & (self.y <= y1))
+        inside = np.zeros(engine.node_count, dtype=bool)
+        inside[nodes] = True
+        edges = np.flatnonzero(inside[engine.src] | inside[engine.dst])
+        return nodes, edges
+
+    def tile(self, engine, bbox=None, max_nodes=MAX_TILE_NODES, max_edges=MAX_TILE_EDGES):
+        """
+        JSON-ready slice of the layout for the frontend to draw: at most max_nodes
+        nodes in bbox plus up to max_edges edges touching them (with the far
+        endpoint's position, so edges leaving the tile can still be drawn).
+        `truncated` tells the frontend to ask for smaller tiles.
+        """
+        nodes, edges = self.window(engine, bbox)
+        truncated = len(nodes) > max_nodes
+        if truncated:
+            nodes = nodes[:max_nodes]
+            kept = np.zeros(engine.node_count, dtype=bool)
+            kept[nodes] = True
+            edges = edges[kept[engine.src[edges]] | kept[engine.dst[edges]]]
+        truncated = truncated or len(edges) > max_edges
+        edges = edges[:max_edges]
+        in_cycle = engine.in_cycle()
+        return {
+            "bounds": self.bounds(),
+            "truncated": truncated,
+            "nodes": [
+                {"id": app_id, "x": float(x), "y": float(y), "site": site, "cluster": int(cluster), "in_cycle": bool(cyclic)}
+                for app_id, x, y, site, cluster, cyclic in zip(
+                    engine.ids[nodes].tolist(), self.x[nodes].tolist(), self.y[nodes].tolist(),
+                    engine.site[nodes].tolist(), engine.wcc[nodes].tolist(), in_cycle[nodes].tolist(),
+                )
+            ],
+            "edges": [
+                {"source": s, "target": t, "type": kind, "points": [sx, sy, tx, ty]}
+                for s, t, kind, sx, sy, tx, ty in zip(
+                    engine.ids[engine.src[edges]].tolist(), engine.ids[engine.dst[edges]].tolist(),
+                    engine.edge_type_names[engine.edge_type[edges]].tolist(),
+                    self.x[engine.src[edges]].tolist(), self.y[engine.src[edges]].tolist(),
+                    self.x[engine.dst[edges]].tolist(), self.y[engine.dst[edges]].tolist(),
+                )
+            ],
+        }
+
+    def svg(self, engine, bbox=None, scale=40, max_nodes=MAX_SVG_NODES, max_edges=MAX_SVG_EDGES):
+        """
+        Standalone SVG of the layout (or of bbox), at most max_nodes apps and the
+        max_edges edges among them; labels are dropped past a few hundred nodes.
+        """
+        nodes, _ = self.window(engine, bbox)
+        nodes = nodes[:max_nodes]
+        # Only edges between drawn nodes, so a truncated drawing stays bounded too
+        kept = np.zeros(engine.node_count, dtype=bool)
+        kept[nodes] = True
+        edges = np.flatnonzero(kept[engine.src] & kept[engine.dst])[:max_edges]
+        x0, y0, x1, y1 = bbox if bbox is not None else self.bounds()
+        pad = 1.0
+        width, height = (x1 - x0 + 2 * pad) * scale, (y1 - y0 + 2 * pad) * scale
+        px = lambda v: (v - x0 + pad) * scale
+        py = lambda v: (v - y0 + pad) * scale
+
+        sites = {site: SITE_COLORS[i % len(SITE_COLORS)] for i, site in enumerate(np.unique(engine.site).tolist())}
+        in_cycle = engine.in_cycle()
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+            f'viewBox="0 0 {width:.0f} {height:.0f}" font-family="sans-serif" font-size="9">',
+            '<g stroke="#999" stroke-width="1" opacity="0.6">',
+        ]
+        for s, t in zip(engine.src[edges].tolist(), engine.dst[edges].tolist()):
+            stroke = ' stroke="#d62728"' if in_cycle[s] and in_cycle[t] and engine.scc[s] == engine.scc[t] else ""
+            parts.append(
+                f'<line x1="{px(self.x[s]):.1f}" y1="{py(self.y[s]):.1f}" '
+                f'x2="{px(self.x[t]):.1f}" y2="{py(self.y[t]):.1f}"{stroke}/>'
+            )
+        parts.append("</g><g>")
+        labels = len(nodes) <= 300
+        for i in nodes.tolist():
+            cx, cy = px(self.x[i]), py(self.y[i])
+            app_id = escape(str(engine.ids[i]))
+            outline = ' stroke="#d62728" stroke-width="2"' if in_cycle[i] else ""
+            parts.append(f'<circle cx="{cx:.1f}" cy="{cy:.1f}" r="6" fill="{sites[engine.site[i]]}"{outline}>'
+                         f'<title>{app_id}</title></circle>')
+            if labels:
+                parts.append(f'<text x="{cx + 8:.1f}" y="{cy + 3:.1f}">{app_id}</text>')
+        parts.append("</g></svg>")
+        return "".join(parts)
+
+
+_layouts = BuildArtifactCache(LAYOUT_FILE, GraphLayout.load, GraphLayout.save, MAX_CACHED_LAYOUTS)
+
+
+def get_graph_layout(store=None):
+    """
+    (graph, layout) for an inventory store, computed once per inventory build
+    and cached the same way as the graph itself. (None, None) without dependencies.
+    """
+    store = store or get_inventory()
+    engine = get_dependency_graph(store)
+    if engine is None:
+        return None, None
+    return engine, _layouts.get(store, lambda: GraphLayout.compute(engine))
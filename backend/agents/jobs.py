@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.sqlite_utils import connect
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+ACTIVE_STATES = ("queued", "running")
+FINAL_STATES = ("done", "failed")
+
+
+# Jobs record which worker process runs them, so a restart only fails its own jobs
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_is_dead(owner, host):
+    owner_host, _, pid = (owner or "").rpartition(":")
+    if owner_host != host or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return True
+    if os.name == "nt":
+        return False  # signal 0 means CTRL_C_EVENT on Windows; don't probe
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+def dedupe_key(kind, payload):
+    return hashlib.sha256(f"{kind}\n{json.dumps(payload, sort_keys=True)}".encode("utf-8")).hexdigest()
+
+
+class JobStore:
+    """SQLite-backed job records, so results survive restarts and can be read by any worker process."""
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = connect(db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, dedupe_key TEXT NOT NULL, status TEXT NOT NULL,"
+            " created REAL NOT NULL, updated REAL NOT NULL, result TEXT, error TEXT, owner TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key, status)")
+        self._conn.commit()
+
+    def create_or_get_active(self, kind, key):
+        """Insert a queued job unless an identical one is still queued/running. Returns (job_id, created)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN (?, ?) ORDER BY created DESC LIMIT 1",
+                (key, *ACTIVE_STATES),
+            ).fetchone()
+            if row:
+                return row[0], False
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, dedupe_key, status, created, updated, owner)"
+                " VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, key, now, now, OWNER),
+            )
+            self._conn.commit()
+            return job_id, True
+
+    def update(self, job_id, status, result=None, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated = ?, result = ?, error = ? WHERE id = ?",
+                (status, time.time(), None if result is None else json.dumps(result), error, job_id),
+            )
+            self._conn.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, status, created, updated, result, error FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, kind, status, created, updated, result, error = row
+        return {
+            "job_id": job_id, "kind": kind, "status": status, "created": created, "updated": updated,
+            "result": json.loads(result) if result is not None else None, "error": error,
+        }
+
+    def fail_abandoned(self):
+        """
+        Fail queued/running jobs whose worker process on this host is gone. Jobs of
+        live sibling workers (the store is shared between them) are left alone.
+        """
+        host = socket.gethostname()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, owner FROM jobs WHERE status IN (?, ?)", ACTIVE_STATES
+            ).fetchall()
+            dead = [job_id for job_id, owner in rows if _owner_is_dead(owner, host)]
+            self._conn.executemany(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted by a server restart', updated = ?"
+                " WHERE id = ?",
+                [(time.time(), job_id) for job_id in dead],
+            )
+            self._conn.commit()
+
+
+class JobManager:
+    """
+    Runs long agent work (agent call + ROI/formatting) on a local worker pool.
+
+    submit() returns a job id straight away; identical submissions (same kind and
+    payload) while one is still queued or running get the existing job id back,
+    so a double-click doesn't start a second expensive run.
+    """
+
+    def __init__(self, store, workers=JOB_WORKERS):
+        self.store = store
+        self._handlers = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._changed = threading.Condition()
+
+    def register(self, kind, handler):
+        """handler(payload) -> JSON-serializable result; exceptions mark the job failed."""
+        self._handlers[kind] = handler
+
+    def submit(self, kind, payload):
+        if kind not in self._handlers:
+            raise KeyError(f"Unknown job kind: {kind}")
+        job_id, created = self.store.create_or_get_active(kind, dedupe_key(kind, payload))
+        if created:
+            self._executor.submit(self._run, job_id, kind, payload)
+        return job_id, created
+
+    def _set(self, job_id, status, result=None, error=None):
+        self.store.update(job_id, status, result=result, error=error)
+        with self._changed:
+            self._changed.notify_all()
+
+    def _run(self, job_id, kind, payload):
+        self._set(job_id, "running")
+        try:
+            self._set(job_id, "done", result=self._handlers[kind](payload))
+        except Exception as e:
+            self._set(job_id, "failed", error=str(e))
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def wait_for_change(self, timeout):
+        with self._changed:
+            self._changed.wait(timeout)
+
+    def iter_events(self, job_id, poll_seconds=1.0):
+        """Yield the job each time its status changes, ending once it is done or failed."""
+        last_status = None
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield job
+            if job["status"] in FINAL_STATES:
+                return
+            # Woken early by local workers; the timeout covers jobs run by other processes
+            self.wait_for_change(poll_seconds)
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# Max in-flight runs per agent; calls beyond this queue on the agent's semaphore
+AGENT_CONCURRENCY = {
+    "lease": int(os.getenv("LEASE_AGENT_CONCURRENCY", "4")),
+    "dependency": int(os.getenv("DEPENDENCY_AGENT_CONCURRENCY", "4")),
+    "migration_plan": int(os.getenv("MIGRATION_PLAN_AGENT_CONCURRENCY", "4")),
+    "chatbot": int(os.getenv("CHATBOT_AGENT_CONCURRENCY", "8")),
+}
+DEFAULT_CONCURRENCY = 4
+AGENT_TIMEOUT_SECONDS = float(os.getenv("AGENT_TIMEOUT_SECONDS", "300"))
+
+
+class AgentTimeout(Exception):
+    pass
+
+
+_current = threading.local()
+
+
+def current_cancel_event():
+    """
+    Event set once the orchestrator stops waiting for the call running on this
+    thread (None outside an orchestrated call), so long-running agent work can
+    cancel itself instead of holding its slot until it finishes on its own.
+    """
+    return getattr(_current, "cancel", None)
+
+
+def _with_cancel_event(cancel, fn, args, kwargs):
+    _current.cancel = cancel
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _current.cancel = None
+
+
+class Orchestrator:
+    """
+    Runs blocking agent calls from one background asyncio loop.
+
+    Each agent gets a semaphore bounding its in-flight runs, every call has a
+    timeout, and independent calls can be awaited together. The Foundry SDK is
+    synchronous, so calls execute on a worker pool. When a call times out its
+    cancel event is set (see current_cancel_event; foundry_client.process_run
+    cancels the Foundry run on it), and it keeps its agent slot until the worker
+    actually returns so the concurrency bound stays honest.
+    """
+
+    def __init__(self, concurrency=None, timeout=AGENT_TIMEOUT_SECONDS):
+        self.concurrency = dict(AGENT_CONCURRENCY if concurrency is None else concurrency)
+        self.timeout = timeout
+        self._loop = None
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                workers = sum(self.concurrency.values()) + DEFAULT_CONCURRENCY
+                loop.set_default_executor(ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent"))
+                threading.Thread(target=loop.run_forever, name="agent-orchestrator", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _semaphore(self, agent):
+        # Only touched from the loop thread
+        if agent not in self._semaphores:
+            self._semaphores[agent] = asyncio.Semaphore(self.concurrency.get(agent, DEFAULT_CONCURRENCY))
+        return self._semaphores[agent]
+
+    async def call(self, agent, fn, *args, timeout=None, **kwargs):
+        """Run fn(*args, **kwargs) under `agent`'s concurrency limit; raises AgentTimeout."""
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout if timeout is None else timeout
+        semaphore = await self._acquire(agent, timeout)
+
+        cancel = threading.Event()
+        future = loop.run_in_executor(None, _with_cancel_event, cancel, fn, args, kwargs)
+        future.add_done_callback(lambda _: semaphore.release())
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            cancel.set()
+            raise AgentTimeout(f"{agent} agent did not answer within {timeout:g}s; its run was cancelled")
+
+    async def gather(self, calls, timeout=None):
+        """
+        Run {name: (agent, fn, args)} concurrently. Returns {name: result}, where a
+        failed or timed-out call maps to its exception instead of a result.
+        """
+        names = list(calls)
+        results = await asyncio.gather(
+            *(self.call(agent, fn, *args, timeout=timeout) for agent, fn, args in calls.values()),
+            return_exceptions=True,
+        )
+        return dict(zip(names, results))
+
+    def submit(self, coro):
+        """Schedule a coroutine on the orchestrator loop from any thread; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, agent, fn, *args, timeout=None, **kwargs):
+        """Blocking helper for Flask views: run one agent call through the loop and wait for it."""
+        return self.submit(self.call(agent, fn, *args, timeout=timeout, **kwargs)).result()
+
+    def run_many(self, calls, timeout=None):
+        return self.submit(self.gather(calls, timeout=timeout)).result()
+
+    async def _acquire(self, agent, timeout):
+        """Take one of `agent`'s slots on the loop thread; returns the semaphore to release."""
+        semaphore = self._semaphore(agent)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise AgentTimeout(f"{agent} agent is busy; timed out after {timeout:g}s waiting for a slot")
+        return semaphore
+
+    @contextmanager
+    def slot(self, agent, timeout=None):
+        """
+        Hold one of `agent`'s slots while the caller drives the agent itself, e.g. a
+        streamed run consumed chunk by chunk from a Flask response.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        semaphore = self.submit(self._acquire(agent, timeout)).result()
+        try:
+            yield
+        finally:
+            self._loop.call_soon_threadsafe(semaphore.release)
+
+
+_orchestrator = Orchestrator()
+
+
+def get_orchestrator():
+    return _orchestrator
@@ -0,0 +1,209 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from config import (
+    CACHE_FOLDER,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_SIMILARITY,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+from utils.sqlite_utils import connect
+
+EMBEDDING_DIM = 512
+
+
+def normalize_prompt(prompt):
+    return re.sub(r"\s+", " ", prompt or "").strip().casefold()
+
+
+def hashed_embedding(text, dim=EMBEDDING_DIM):
+    """
+    Cheap local embedding: word unigrams and bigrams hashed into a fixed-size,
+    L2-normalized vector. Good enough to match reworded or lightly edited prompts
+    without calling an embedding model.
+    """
+    words = re.findall(r"\w+", normalize_prompt(text))
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        vector[zlib.crc32(token.encode("utf-8")) % dim] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def is_cacheable(result):
+    # Failed runs and transport errors must be retried, not replayed
+    if isinstance(result, dict):
+        return "error" not in result
+    if isinstance(result, str):
+        return not result.startswith("[Error")
+    return result is not None
+
+
+class ResponseCache:
+    """
+    Agent replies keyed by (agent id, normalized prompt, dataset content hash).
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    dropped beyond `max_entries`. When `similarity` > 0, a miss falls back to the
+    closest cached prompt for the same agent and dataset whose embedding cosine
+    similarity reaches that threshold.
+    """
+
+    def __init__(self, db_path=None, ttl=RESPONSE_CACHE_TTL_SECONDS, max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                 similarity=RESPONSE_CACHE_SIMILARITY, embed=hashed_embedding):
+        self.db_path = db_path or os.path.join(CACHE_FOLDER, "response_cache.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.embed = embed
+        self._lock = threading.Lock()
+        self._conn = connect(self.db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, agent TEXT NOT NULL, dataset TEXT NOT NULL, value TEXT NOT NULL,"
+            " embedding BLOB, created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_scope ON responses (agent, dataset)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(agent, prompt, dataset):
+        return hashlib.sha256(f"{agent}\0{dataset}\0{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+    def _touch(self, key):
+        self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+
+    def get(self, agent, prompt, dataset=""):
+        key = self.key(agent, prompt, dataset)
+        oldest = time.time() - self.ttl
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND created >= ?", (key, oldest)
+            ).fetchone()
+            if row is not None:
+                self._touch(key)
+                return json.loads(row[0])
+            if self.similarity <= 0:
+                return None
+            rows = self._conn.execute(
+                "SELECT key, value, embedding FROM responses"
+                " WHERE agent = ? AND dataset = ? AND created >= ? AND embedding IS NOT NULL",
+                (agent, dataset, oldest),
+            ).fetchall()
+            if not rows:
+                return None
+            matrix = np.frombuffer(b"".join(r[2] for r in rows), dtype=np.float32).reshape(len(rows), -1)
+            scores = matrix @ self.embed(prompt)
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity:
+                return None
+            self._touch(rows[best][0])
+            return json.loads(rows[best][1])
+
+    def put(self, agent, prompt, dataset, value):
+        now = time.time()
+        embedding = self.embed(prompt).astype(np.float32).tobytes() if self.similarity > 0 else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, agent, dataset, value, embedding, created, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.key(agent, prompt, dataset), agent, dataset, json.dumps(value), embedding, now, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache()
+        return _shared_cache
+
+
+def cached_agent_call(agent_id, per_dataset=True):
+    """
+    Serve repeat calls of fn(prompt, ...) from the response cache.
+
+    Callers pass dataset=<utils.datasets.Dataset>; its content version is part of
+    the key unless per_dataset is False (for callers whose prompt already embeds
+    the data), and it is forwarded to fn if fn takes a `dataset` argument. Pass
+    refresh=True to skip the lookup and overwrite the cached reply.
+    """
+    def decorate(fn):
+        takes_dataset = "dataset" in inspect.signature(fn).parameters
+
+        @functools.wraps(fn)
+        def wrapper(prompt, *args, refresh=False, dataset=None, **kwargs):
+            cache = get_response_cache()
+            version = dataset.version if per_dataset and dataset is not None else ""
+            if takes_dataset:
+                kwargs["dataset"] = dataset
+            if not refresh:
+                cached = cache.get(agent_id, prompt, version)
+                if cached is not None:
+                    return cached
+            result = fn(prompt, *args, **kwargs)
+            if is_cacheable(result):
+                cache.put(agent_id, prompt, version, result)
+            return result
+
+        wrapper.uncached = fn
+        return wrapper
+    return decorate
+
+
+def cached_agent_stream(agent_id, per_dataset=True):
+    """
+    cached_agent_call for streaming variants, fn(prompt, ...) yielding reply
+    text: a cached reply is yielded as one chunk, and a stream that runs to the
+    end is cached as {"response": text}, so streamed and blocking calls of the
+    same agent share entries.
+    """
+    def decorate(fn):
+        takes_dataset = "dataset" in inspect.signature(fn).parameters
+
+        @functools.wraps(fn)
+        def wrapper(prompt, *args, refresh=False, dataset=None, **kwargs):
+            cache = get_response_cache()
+            version = dataset.version if per_dataset and dataset is not None else ""
+            if takes_dataset:
+                kwargs["dataset"] = dataset
+            if not refresh:
+                cached = cache.get(agent_id, prompt, version)
+                if isinstance(cached, dict) and "response" in cached:
+                    yield cached["response"]
+                    return
+            parts = []
+            for text in fn(prompt, *args, **kwargs):
+                parts.append(text)
+                yield text
+            cache.put(agent_id, prompt, version, {"response": "".join(parts)})
+
+        wrapper.uncached = fn
+        return wrapper
+    return decorate
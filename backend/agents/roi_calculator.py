@@ -1,7 +1,10 @@
 import json
 import math
+import numpy as np
 import pandas as pd
 
+from agents.tracing import current_trace
+
 # === Constants ===
 SERVER_POWER_KW = {
     "DL380": 0.45,
@@ -85,21 +88,17 @@ def process_site(site_key, data):
     roi = (savings - one_time) / one_time if one_time > 0 else float("inf")
     payback = investment / savings if savings > 0 else float("inf")
 
-    # Debug output
-    print(f"\n--- DEBUG: {site_key} ---")
-    print(f"Applications: {app_count}, DL380: {dl380}, R740/R750: {r740_750}, SR650: {sr650}")
-    print(f"Storage (GB, adjusted): {storage_gb}")
-    print(f"Bandwidth (Mbps): {bandwidth}")
-    print(f"Lease Monthly Rent: {lease_cost}")
-    print(f"Power Rate: {power_rate}, Power Monthly: {power:.2f}")
-    print(f"On-Prem Monthly = Rent({lease_cost}) + Power({power:.2f}) + Labor({LABOR_MONTHLY}) = {onprem_monthly:.2f}")
-    print(f"On-Prem Yearly: {onprem_yearly}")
-    print(f"Cloud Monthly Breakdown: Compute={compute:.2f}, Storage={storage:.2f}, VPN={vpn}, Support={support}, CloudOps={cloudops}, ExtraNet={extra_net:.2f}")
-    print(f"Cloud Monthly Total: {cloud_monthly:.2f}")
-    print(f"Cloud Yearly: {cloud_yearly}")
-    print(f"One-Time Cost = Transfer({transfer:.2f}) + Labor({labor}) = {one_time:.2f}")
-    print(f"Investment: {investment}, Savings: {savings}")
-    print(f"ROI: {roi}, Payback: {payback}\n")
+    trace = current_trace()
+    if trace is not None:
+        trace.record(
+            "roi_site", site=site_key, applications=app_count, dl380=dl380, r740_r750=r740_750, sr650=sr650,
+            storage_gb=storage_gb, bandwidth=bandwidth, lease_monthly=lease_cost, power_rate=power_rate,
+            power_monthly=power, labor_monthly=LABOR_MONTHLY, onprem_monthly=onprem_monthly,
+            onprem_yearly=onprem_yearly, compute=compute, storage=storage, vpn=vpn, support=support,
+            cloudops=cloudops, extra_net=extra_net, cloud_monthly=cloud_monthly, cloud_yearly=cloud_yearly,
+            transfer=transfer, labor=labor, one_time=one_time, investment=investment, savings=savings,
+            roi=roi, payback=payback,
+        )
 
     return {
         "Site": site_key,
@@ -117,3 +116,196 @@ def run_roi_calculations_from_json(lease_data):
     for site_key, site_data in lease_data.items():
         results.append(process_site(site_key, site_data))
     return pd.DataFrame(results)
+
+# === Vectorized scenario engine ===
+# Scenario knobs and their neutral values (neutral reproduces process_site exactly).
+# power_rate=None means "use each site's own power_rate".
+SCENARIO_DEFAULTS = {
+    "power_rate": None,
+    "storage_growth": 1.0,
+    "labor_per_app": LABOR_PER_APP,
+    "labor_monthly": LABOR_MONTHLY,
+    "server_cost_multiplier": 1.0,
+}
+SITE_INPUTS = {
+    "number_of_applications": 0,
+    "DL380_count": 0,
+    "R740_R750_count": 0,
+    "SR650_count": 0,
+    "total_GB": 0,
+    "Monthly Rent": 0,
+    "sum_of_bandwidth": 0,
+    "power_rate": 0.08,
+}
+MAX_SWEEP_ROWS = 2_000_000
+
+def sites_frame(lease_data):
+    """
+    One row per site with the numeric inputs process_site reads (missing,
+    non-numeric and non-finite values use its defaults). Raises ValueError
+    unless lease_data is {site: {field: value}}.
+    """
+    if not isinstance(lease_data, dict) or not all(isinstance(data, dict) for data in lease_data.values()):
+        raise ValueError("Site data must be an object of {site: {field: value}}")
+    rows = []
+    for site_key, data in lease_data.items():
+        row = {"Site": site_key}
+        for field, default in SITE_INPUTS.items():
+            try:
+                value = float(data.get(field, default))
+            except (TypeError, ValueError):
+                value = float(default)
+            row[field] = value if math.isfinite(value) else float(default)
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["Site"] + list(SITE_INPUTS))
+
+def _check_scenario(names, values):
+    """ValueError for unknown knobs, or values that are not finite numbers (None only where the default is None)."""
+    unknown = set(names) - set(SCENARIO_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown scenario parameters: {', '.join(sorted(unknown))}")
+    for name, value in values:
+        if value is None and SCENARIO_DEFAULTS[name] is None:
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = math.nan
+        if isinstance(value, bool) or not math.isfinite(number):
+            raise ValueError(f"Scenario parameter {name} must be a finite number, got {value!r}")
+
+def scenario_grid(**axes):
+    """Cartesian product of the given knob values, e.g. scenario_grid(power_rate=[0.08, 0.12], storage_growth=[1, 1.5])."""
+    names = list(axes)
+    values = [list(v) if isinstance(v, (list, tuple)) else [v] for v in axes.values()]
+    _check_scenario(names, [(name, v) for name, axis in zip(names, values) for v in axis])
+    if not names:
+        return pd.DataFrame([{}]).assign(Scenario=0)
+    index = pd.MultiIndex.from_product(values, names=names)
+    return index.to_frame(index=False).assign(Scenario=lambda df: range(len(df)))
+
+def scenario_rows(rows):
+    """Scenarios given as a list of {knob: value} rows, checked like scenario_grid; knobs a row omits stay neutral."""
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError("Scenario rows must be a list of objects")
+    _check_scenario({name for row in rows for name in row}, [item for row in rows for item in row.items()])
+    return pd.DataFrame(rows).assign(Scenario=range(len(rows)))
+
+def run_roi_scenarios(sites_df, scenarios_df):
+    """
+    Evaluate every site under every scenario in one pass with NumPy broadcasting.
+
+    sites_df comes from sites_frame(); scenarios_df has any of the SCENARIO_DEFAULTS
+    columns (missing ones take their neutral value) plus an optional Scenario id.
+    Returns a tidy frame with one row per (site, scenario): the scenario knobs, the
+    monthly cost breakdown and the yearly/one-time totals, with ROI and payback as
+    floats (inf where process_site reports N/A).
+    """
+    n_sites, n_scen = len(sites_df), len(scenarios_df)
+    if n_sites * n_scen > MAX_SWEEP_ROWS:
+        raise ValueError(f"Sweep too large: {n_sites} sites x {n_scen} scenarios exceeds {MAX_SWEEP_ROWS} rows")
+
+    def site_col(name):
+        return sites_df[name].to_numpy(dtype=float)[:, None]
+
+    def scen_col(name):
+        default = SCENARIO_DEFAULTS[name]
+        if name in scenarios_df:
+            values = pd.to_numeric(scenarios_df[name], errors="coerce").to_numpy(dtype=float)
+        else:
+            values = np.full(n_scen, np.nan if default is None else default, dtype=float)
+        return values[None, :]
+
+    site_keys = sites_df["Site"].astype(str).to_numpy()
+    apps = site_col("number_of_applications")
+    dl380, r740_750, sr650 = site_col("DL380_count"), site_col("R740_R750_count"), site_col("SR650_count")
+    lease_cost = site_col("Monthly Rent")
+    bandwidth = site_col("sum_of_bandwidth")
+
+    manual = np.array([MANUAL_STORAGE.get(k, np.nan) for k in site_keys], dtype=float)[:, None]
+    base_storage = np.where(np.isnan(manual), site_col("total_GB") * 1.3, manual)
+    storage_gb = base_storage * scen_col("storage_growth")
+
+    scen_rate = scen_col("power_rate")
+    power_rate = np.where(np.isnan(scen_rate), site_col("power_rate"), scen_rate)
+    server_scale = scen_col("server_cost_multiplier")
+    labor_per_app = scen_col("labor_per_app")
+    labor_monthly = scen_col("labor_monthly")
+
+    # Cloud Costs
+    compute = (dl380 * SERVER_COST["DL380"] + r740_750 * SERVER_COST["R740"] + sr650 * SERVER_COST["SR650"]) * server_scale
+    storage = storage_gb * STORAGE_COST_PER_GB
+    transfer = storage_gb * TRANSFER_COST_PER_GB
+    extra_net = np.broadcast_to(extra_network_cost(bandwidth), compute.shape)
+    labor = LABOR_BASE + labor_per_app * apps
+
+    cloud_monthly = compute + storage + VPN_MONTHLY + SUPPORT_MONTHLY + CLOUDOPS_MONTHLY + extra_net
+    cloud_yearly = 12 * cloud_monthly
+    one_time = transfer + labor
+    investment = cloud_yearly + one_time
+
+    total_kw = dl380 * SERVER_POWER_KW["DL380"] + r740_750 * SERVER_POWER_KW["R740"] + sr650 * SERVER_POWER_KW["SR650"]
+    power = total_kw * 24 * 30.44 * power_rate
+    onprem_monthly = lease_cost + power + labor_monthly
+    onprem_yearly = 12 * onprem_monthly
+
+    savings = onprem_yearly - cloud_yearly
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(one_time > 0, (savings - one_time) / one_time, np.inf)
+        payback = np.where(savings > 0, investment / savings, np.inf)
+
+    shape = (n_sites, n_scen)
+    scenario_ids = scenarios_df["Scenario"].to_numpy() if "Scenario" in scenarios_df else np.arange(n_scen)
+    columns = {
+        "Site": np.repeat(site_keys, n_scen),
+        "Scenario": np.tile(scenario_ids, n_sites),
+        "power_rate": power_rate,
+        "storage_growth": np.broadcast_to(scen_col("storage_growth"), shape),
+        "labor_per_app": np.broadcast_to(labor_per_app, shape),
+        "labor_monthly": np.broadcast_to(labor_monthly, shape),
+        "server_cost_multiplier": np.broadcast_to(server_scale, shape),
+        "Compute_Monthly": compute,
+        "Storage_Monthly": storage,
+        "ExtraNet_Monthly": extra_net,
+        "VPN_Monthly": np.full(shape, VPN_MONTHLY, dtype=float),
+        "Support_Monthly": np.full(shape, SUPPORT_MONTHLY, dtype=float),
+        "CloudOps_Monthly": np.full(shape, CLOUDOPS_MONTHLY, dtype=float),
+        "Power_Monthly": power,
+        "Transfer_Cost": transfer,
+        "Labor_Cost": np.broadcast_to(labor, shape),
+        "OnPrem_Yearly": onprem_yearly,
+        "Cloud_Yearly": cloud_yearly,
+        "OneTime_Cost": one_time,
+        "Investment": investment,
+        "Savings": savings,
+        "ROI": roi,
+        "Payback_Years": payback,
+    }
+    return pd.DataFrame({
+        name: np.broadcast_to(values, shape).ravel() if np.ndim(values) == 2 else values
+        for name, values in columns.items()
+    })
+
+SUMMARY_TOTALS = ("OnPrem_Yearly", "Cloud_Yearly", "OneTime_Cost", "Investment", "Savings")
+
+def roi_summary(lease_data):
+    """
+    The per-site table run_roi_calculations_from_json builds (same columns,
+    rounding and text), computed column-wise from sites_frame through the
+    vectorized engine at its neutral scenario.
+    """
+    results = run_roi_scenarios(sites_frame(lease_data), scenario_grid())
+    trace = current_trace()
+    if trace is not None:
+        for row in results.to_dict(orient="records"):
+            trace.record("roi_site", **{k.lower(): v for k, v in row.items() if k != "Scenario"})
+
+    roi = results["ROI"].to_numpy(dtype=float)
+    payback = results["Payback_Years"].to_numpy(dtype=float)
+    finite = np.isfinite(payback)
+    return pd.DataFrame({
+        "Site": results["Site"].to_numpy(),
+        **{col: np.round(results[col].to_numpy(dtype=float)).astype(np.int64) for col in SUMMARY_TOTALS},
+        "ROI": np.char.add(np.char.mod("%.1f", roi * 100), "%"),
+        "Payback_Years": np.where(finite, np.char.mod("%.1f", np.where(finite, payback, 0)), "N/A"),
+    })
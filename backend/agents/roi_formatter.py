@@ -1,53 +1,89 @@
 import json
 import pandas as pd
 import re
-from agents.roi_calculator import run_roi_calculations_from_json
+from agents.roi_calculator import roi_summary
+from agents.tracing import span
 
-def format_lease_site_details(lease_data):
-    html = ""
-    for site, data in lease_data.items():
-        storage_gb = data.get("total_GB", 0)
-        app_count = data.get("number_of_applications", 0)
-        one_time_moving_fee = round(storage_gb * 0.01 + 1000 + 500 * app_count, 2)
-
-        html += f"""
+# Templates are built once at import; rendering only fills them in
+_SITE_TEMPLATE = """
         <h4>{site}:</h4>
         <ul>
-            <li><strong>Monthly Rent:</strong> ${data.get('Monthly Rent', 'N/A')}</li>
-            <li><strong>Termination Fee:</strong> {data.get('termination_fee_clause', 'N/A')}</li>
-            <li><strong>Under Occupancy Clause:</strong> {data.get('under_occupancy', 'N/A')}</li>
-            <li><strong>Monthly Storage Cost:</strong> ${round(storage_gb * 0.021, 2)}</li>
-            <li><strong>One-Time Moving Fee:</strong> ${one_time_moving_fee}</li>
+            <li><strong>Monthly Rent:</strong> ${rent}</li>
+            <li><strong>Termination Fee:</strong> {termination}</li>
+            <li><strong>Under Occupancy Clause:</strong> {under_occupancy}</li>
+            <li><strong>Monthly Storage Cost:</strong> ${storage_cost}</li>
+            <li><strong>One-Time Moving Fee:</strong> ${moving_fee}</li>
             <li><strong>On-Premise Cost:</strong> Calculated in ROI table below</li>
         </ul>
         <hr>
-        """
-    return html
+        """.format
+_TABLE_HEAD = "<h4>Summary Table</h4><table class='table table-bordered'><thead><tr>"
+_TABLE_BODY = "</tr></thead><tbody>"
+_TABLE_TAIL = "</tbody></table>"
+# Rows are emitted in batches so streamed responses go out in reasonably sized chunks
+ROWS_PER_CHUNK = 256
 
+def iter_lease_site_details(lease_data):
+    site_html = []
+    for site, data in lease_data.items():
+        storage_gb = data.get("total_GB", 0)
+        app_count = data.get("number_of_applications", 0)
+        site_html.append(_SITE_TEMPLATE(
+            site=site,
+            rent=data.get('Monthly Rent', 'N/A'),
+            termination=data.get('termination_fee_clause', 'N/A'),
+            under_occupancy=data.get('under_occupancy', 'N/A'),
+            storage_cost=round(storage_gb * 0.021, 2),
+            moving_fee=round(storage_gb * 0.01 + 1000 + 500 * app_count, 2),
+        ))
+        if len(site_html) == ROWS_PER_CHUNK:
+            yield "".join(site_html)
+            site_html = []
+    if site_html:
+        yield "".join(site_html)
 
-def format_roi_summary_table(roi_df):
-    table_html = "<h4>Summary Table</h4><table class='table table-bordered'><thead><tr>"
-    table_html += ''.join(f"<th>{col}</th>" for col in roi_df.columns)
-    table_html += "</tr></thead><tbody>"
-    for _, row in roi_df.iterrows():
-        table_html += "<tr>" + ''.join(f"<td>{val}</td>" for val in row) + "</tr>"
-    table_html += "</tbody></table>"
-    return table_html
+def iter_roi_summary_table(roi_df):
+    """Render the table column-wise: each column becomes its <td> strings in one vectorized pass."""
+    yield _TABLE_HEAD + ''.join(f"<th>{col}</th>" for col in roi_df.columns) + _TABLE_BODY
+    if len(roi_df):
+        rows = pd.Series("<tr>", index=roi_df.index)
+        for col in roi_df.columns:
+            rows = rows + "<td>" + roi_df[col].astype(str) + "</td>"
+        rows = (rows + "</tr>").tolist()
+        for i in range(0, len(rows), ROWS_PER_CHUNK):
+            yield "".join(rows[i:i + ROWS_PER_CHUNK])
+    yield _TABLE_TAIL
 
-def get_html_output(lease_json_path):
-    with open(lease_json_path, "r") as f:
-        raw = json.load(f)
+def format_lease_site_details(lease_data):
+    return "".join(iter_lease_site_details(lease_data))
 
-    # Extract and clean embedded JSON
-    response_str = raw.get("response", "")
+
+def format_roi_summary_table(roi_df):
+    return "".join(iter_roi_summary_table(roi_df))
+
+def parse_lease_response(response_str):
+    """Strip the ```json fences the agent tends to add and parse the lease JSON."""
     cleaned_str = re.sub(r"^```json|```$", "", response_str.strip(), flags=re.MULTILINE)
-    lease_data = json.loads(cleaned_str)
+    return json.loads(cleaned_str)
 
-    # Run ROI calculations
-    roi_df = run_roi_calculations_from_json(lease_data)
+def iter_lease_report(lease_data):
+    """Yield the lease report as HTML chunks, suitable for a streamed response."""
+    # Run ROI calculations (column-wise over all sites at once)
+    with span("roi_calculations", sites=len(lease_data)):
+        roi_df = roi_summary(lease_data)
 
     # Format HTML
-    lease_html = format_lease_site_details(lease_data)
-    roi_html = format_roi_summary_table(roi_df)
+    yield from iter_lease_site_details(lease_data)
+    yield from iter_roi_summary_table(roi_df)
+
+def render_lease_report(lease_data):
+    with span("render_report"):
+        return "".join(iter_lease_report(lease_data))
 
-    return lease_html + roi_html
+def get_html_output(lease_json_path):
+    with open(lease_json_path, "r") as f:
+        raw = json.load(f)
+
+    # Extract and clean embedded JSON
+    lease_data = parse_lease_response(raw.get("response", ""))
+    return render_lease_report(lease_data)
@@ -0,0 +1,105 @@
+import pandas as pd
+
+from utils.inventory import get_inventory
+
+METRIC_FIELDS = (
+    "DL380_count", "R740_R750_count", "SR650_count",
+    "total_GB", "number_of_applications", "sum_of_bandwidth",
+)
+
+
+def _site_prefix(ids):
+    # "VA-APP001" -> "VA", "AZ-CO" -> "AZ"
+    return ids.astype(str).str.split("-", n=1).str[0].str.strip()
+
+
+def powered_off_hosts(vms):
+    """Host_Server_IDs whose VMs are all powered off (hosts without VMs are not counted as off)."""
+    if vms.empty:
+        return pd.Index([])
+    off = vms["Power_State"].astype(str).str.strip().str.lower().eq("off")
+    all_off = off.groupby(vms["Host_Server_ID"]).all()
+    return all_off.index[all_off.to_numpy()]
+
+
+def compute_site_metrics(store=None):
+    """
+    Per-site lease/ROI inputs computed locally from the uploaded inventory:
+
+    - DL380_count / R740_R750_count / SR650_count: active physical servers by model,
+      where a server is inactive when every VM on it is powered off
+    - total_GB: sum of storage_volumes.Used_Cap_GB per Site (volumes carry no
+      server link, so they can't be filtered by server activity)
+    - number_of_applications: App_IDs carrying the site prefix
+    - sum_of_bandwidth: Bandwidth_Gbps of network_links whose Link_ID carries the site prefix
+
+    Returns {site: {field: value}} with plain ints/floats, or {} when nothing is uploaded.
+    """
+    store = store or get_inventory()
+    if store is None:
+        return {}
+
+    servers = store.frame("physical_servers", ["Server_ID", "Site", "Model"])
+    vms = store.frame("virtual_machines", ["Host_Server_ID", "Power_State"])
+    storage = store.frame("storage_volumes", ["Site", "Used_Cap_GB"])
+    apps = store.frame("applications", ["App_ID"])
+    links = store.frame("network_links", ["Link_ID", "Bandwidth_Gbps"])
+
+    active = servers[~servers["Server_ID"].isin(powered_off_hosts(vms))]
+    model = active["Model"].astype(str)
+    server_counts = pd.DataFrame({
+        "Site": active["Site"].astype(str),
+        "DL380_count": model.str.contains("DL380", regex=False),
+        "R740_R750_count": model.str.contains("R740", regex=False) | model.str.contains("R750", regex=False),
+        "SR650_count": model.str.contains("SR650", regex=False),
+    }).groupby("Site").sum()
+
+    total_gb = pd.to_numeric(storage["Used_Cap_GB"], errors="coerce").groupby(storage["Site"].astype(str)).sum()
+    app_counts = _site_prefix(apps["App_ID"]).value_counts()
+    bandwidth = pd.to_numeric(links["Bandwidth_Gbps"], errors="coerce").groupby(_site_prefix(links["Link_ID"])).sum()
+
+    metrics = pd.concat(
+        [
+            server_counts,
+            total_gb.rename("total_GB"),
+            app_counts.rename("number_of_applications"),
+            bandwidth.rename("sum_of_bandwidth"),
+        ],
+        axis=1,
+    ).reindex(columns=list(METRIC_FIELDS)).fillna(0)
+    metrics = metrics[metrics.index.astype(str).str.len() > 0]
+
+    result = {}
+    for site, row in zip(metrics.index, metrics.to_numpy()):
+        values = dict(zip(METRIC_FIELDS, row))
+        result[str(site)] = {
+            field: float(value) if field in ("total_GB", "sum_of_bandwidth") else int(value)
+            for field, value in values.items()
+        }
+    return result
+
+
+def _site_key(site):
+    # The agent may answer "va" or " VA" for the inventory's "VA"
+    return str(site).strip().upper()
+
+
+def merge_lease_metrics(lease_data, metrics):
+    """
+    Overlay locally computed metrics on the lease clauses the agent extracted,
+    site by site. Site keys are matched case-insensitively, and a site missing
+    from either side is still kept: one the agent skipped gets its inventory
+    numbers without clauses, one without inventory gets zeros.
+    """
+    lease = {}
+    for site, entry in lease_data.items():
+        lease.setdefault(_site_key(site), {}).update(entry if isinstance(entry, dict) else {})
+    local = {_site_key(site): values for site, values in metrics.items()}
+
+    merged = {}
+    for site in list(lease) + [s for s in local if s not in lease]:
+        entry = lease.get(site, {})
+        entry["site"] = site
+        entry.update(local.get(site, {field: 0 for field in METRIC_FIELDS}))
+        merged[site] = entry
+    return merged
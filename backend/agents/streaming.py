@@ -0,0 +1,42 @@
+import json
+
+from azure.ai.agents.models import AgentStreamEvent, MessageDeltaChunk
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+# Run events that end a run without a complete reply
+UNFINISHED_RUN_EVENTS = {
+    AgentStreamEvent.THREAD_RUN_FAILED: "failed",
+    AgentStreamEvent.THREAD_RUN_CANCELLED: "cancelled",
+    AgentStreamEvent.THREAD_RUN_EXPIRED: "expired",
+    AgentStreamEvent.THREAD_RUN_INCOMPLETE: "incomplete",
+}
+
+
+def stream_run(project, thread_id, agent_id):
+    """
+    Start a run on `thread_id` and yield the assistant's text as it is generated.
+    Raises RuntimeError unless the run completes, so a partial reply is never
+    treated (or cached) as a finished one.
+    """
+    completed = False
+    with project.agents.runs.stream(thread_id=thread_id, agent_id=agent_id) as events:
+        for event_type, data, _ in events:
+            if isinstance(data, MessageDeltaChunk):
+                if data.text:
+                    yield data.text
+            elif event_type == AgentStreamEvent.THREAD_RUN_COMPLETED:
+                completed = True
+            elif event_type in UNFINISHED_RUN_EVENTS:
+                raise RuntimeError(f"Agent run {UNFINISHED_RUN_EVENTS[event_type]}: {getattr(data, 'last_error', None)}")
+            elif event_type == AgentStreamEvent.ERROR:
+                raise RuntimeError(f"Agent stream error: {data}")
+            elif event_type == AgentStreamEvent.DONE:
+                break
+    if not completed:
+        raise RuntimeError("Agent stream ended before the run completed")
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,105 @@
+import contextvars
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Per-request trace for the ROI / report pipeline. Off unless a request asks for it
+# (X-Trace: 1 header or ?trace=1); when off, instrumentation is a single
+# ContextVar lookup and nothing is formatted or stored.
+TRACE_HEADER = "X-Trace"
+TRACE_ID_HEADER = "X-Trace-Id"
+MAX_STORED_TRACES = 200
+
+_current = contextvars.ContextVar("request_trace", default=None)
+_stored = OrderedDict()
+_stored_lock = threading.Lock()
+
+
+class RequestTrace:
+    def __init__(self, name=""):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.started = time.time()
+        self.events = []
+
+    def record(self, stage, **fields):
+        self.events.append({"stage": stage, "t_ms": round((time.time() - self.started) * 1000, 3), **fields})
+
+    def to_dict(self):
+        # inf/nan (e.g. payback with no savings) aren't valid JSON
+        events = [
+            {k: None if isinstance(v, float) and not math.isfinite(v) else v for k, v in event.items()}
+            for event in self.events
+        ]
+        return {"id": self.id, "name": self.name, "started": self.started, "events": events}
+
+
+def current_trace():
+    """The active trace, or None when tracing is off (the common case)."""
+    return _current.get()
+
+
+def start_trace(name=""):
+    trace = RequestTrace(name)
+    token = _current.set(trace)
+    with _stored_lock:
+        _stored[trace.id] = trace
+        while len(_stored) > MAX_STORED_TRACES:
+            _stored.popitem(last=False)
+    return trace, token
+
+
+def end_trace(token):
+    _current.reset(token)
+
+
+def get_trace(trace_id):
+    with _stored_lock:
+        return _stored.get(trace_id)
+
+
+@contextmanager
+def span(stage, **fields):
+    """Record how long a block took, if tracing is on."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.record(stage, duration_ms=round((time.perf_counter() - started) * 1000, 3), **fields)
+
+
+def init_app(app):
+    """Wire per-request tracing into a Flask app and expose GET /traces/<id>."""
+    from flask import g, jsonify, request
+
+    @app.before_request
+    def _begin_trace():
+        if request.headers.get(TRACE_HEADER) == "1" or request.args.get("trace") == "1":
+            g.trace, g.trace_token = start_trace(f"{request.method} {request.path}")
+
+    @app.after_request
+    def _expose_trace_id(response):
+        trace = g.get("trace")
+        if trace is not None:
+            response.headers[TRACE_ID_HEADER] = trace.id
+        return response
+
+    @app.teardown_request
+    def _finish_trace(exc):
+        token = g.pop("trace_token", None)
+        if token is not None:
+            end_trace(token)
+
+    @app.route('/traces/<trace_id>', methods=['GET'])
+    def trace_route(trace_id):
+        trace = get_trace(trace_id)
+        if trace is None:
+            return jsonify({"error": "Trace not found"}), 404
+        return jsonify(trace.to_dict())
@@ -0,0 +1,179 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import WAVE_DAYS, WAVE_MAX_DATA_GB, WAVE_MAX_VMS
+
+
+def app_attributes(store, engine):
+    """VM count, Data_Size_GB and Priority (1 = most important) per graph node, in engine.ids order."""
+    apps = store.frame("applications", ["App_ID", "Data_Size_GB", "Priority"])
+    apps = apps.astype({"App_ID": str}).drop_duplicates("App_ID").set_index("App_ID")
+    vm_links = store.frame("application_vms", ["App_ID", "VM_ID"]) if store.has_table("application_vms") \
+        else pd.DataFrame({"App_ID": pd.Series(dtype=str)})
+    frame = pd.DataFrame({
+        "VMs": vm_links.groupby(vm_links["App_ID"].astype(str)).size(),
+        "Data_Size_GB": pd.to_numeric(apps.get("Data_Size_GB", pd.Series(dtype=float)), errors="coerce"),
+        "Priority": pd.to_numeric(apps.get("Priority", pd.Series(dtype=float)), errors="coerce"),
+    }, index=apps.index).reindex(engine.ids)
+    # Apps only named in the dependency table carry no size and the lowest priority
+    return frame.fillna({"VMs": 0, "Data_Size_GB": 0, "Priority": np.inf}).reset_index(drop=True)
+
+
+def lease_deadlines(lease_data):
+    """{site: date} from lease analysis output, skipping sites without a parseable lease_end_date."""
+    deadlines = {}
+    for site, entry in (lease_data or {}).items():
+        end = pd.to_datetime((entry or {}).get("lease_end_date"), errors="coerce")
+        if not pd.isna(end):
+            deadlines[str(site)] = end.date()
+    return deadlines
+
+
+def plan_waves(engine, attributes, lease_end_dates=None, start=None, max_vms=WAVE_MAX_VMS,
+               max_data_gb=WAVE_MAX_DATA_GB, wave_days=WAVE_DAYS, previous=None):
+    """
+    Partition the dependency graph into migration waves.
+
+    - Circular dependencies (SCCs) always move as one unit.
+    - An app never lands in an earlier wave than anything it depends on.
+    - A weakly connected cluster that fits the per-wave VM and Data_Size_GB
+      limits moves in a single wave; larger clusters are filled wave by wave in
+      topological order, which keeps dependency chains in adjacent waves.
+    - Clusters whose site lease ends first, then higher priority, go first.
+    - With `previous` ({App_ID: wave}), apps keep their earlier wave wherever
+      that is still valid, so re-planning after an upload only moves what changed.
+
+    Waves are `wave_days` long from `start`; apps whose site lease ends before
+    their wave does are listed under lease_risk. A unit larger than the limits
+    gets a wave of its own, flagged over_capacity. Non-positive limits raise ValueError.
+    """
+    if not (max_vms > 0 and max_data_gb > 0 and wave_days > 0):
+        raise ValueError("max_vms, max_data_gb and wave_days must be positive")
+    start = start or date.today()
+    lease_end_dates = lease_end_dates or {}
+    n = engine.node_count
+    scc, wcc = engine.scc, engine.wcc
+    n_units = int(scc.max()) + 1 if n else 0
+    n_clusters = int(wcc.max()) + 1 if n else 0
+
+    vms = attributes["VMs"].to_numpy(dtype=float)
+    data_gb = attributes["Data_Size_GB"].to_numpy(dtype=float)
+    priority = attributes["Priority"].to_numpy(dtype=float)
+    deadline = np.array(
+        [(lease_end_dates[s] - start).days if s in lease_end_dates else np.inf for s in engine.site.tolist()],
+        dtype=float,
+    )
+
+    unit_vms = np.bincount(scc, weights=vms, minlength=n_units)
+    unit_gb = np.bincount(scc, weights=data_gb, minlength=n_units)
+    unit_cluster = np.zeros(n_units, dtype=np.int64)
+    unit_cluster[scc] = wcc
+    cluster_vms = np.bincount(wcc, weights=vms, minlength=n_clusters)
+    cluster_gb = np.bincount(wcc, weights=data_gb, minlength=n_clusters)
+    cluster_deadline = np.full(n_clusters, np.inf)
+    np.minimum.at(cluster_deadline, wcc, deadline)
+    cluster_priority = np.full(n_clusters, np.inf)
+    np.minimum.at(cluster_priority, wcc, priority)
+
+    # Dependencies between units; Tarjan labels them dependencies-first, so
+    # sorting by label within a cluster is a valid placement order
+    comp_src, comp_dst = scc[engine.src], scc[engine.dst]
+    keep = comp_src != comp_dst
+    dep_order = np.argsort(comp_src[keep], kind="stable")
+    dep_units = comp_dst[keep][dep_order]
+    dep_ptr = np.zeros(n_units + 1, dtype=np.int64)
+    np.cumsum(np.bincount(comp_src[keep], minlength=n_units), out=dep_ptr[1:])
+
+    # Units whose apps all sat in the same wave last time stay pinned there if possible
+    pinned = np.full(n_units, -1, dtype=np.int64)
+    if previous:
+        prev = pd.Series(engine.ids).map(previous).fillna(0).to_numpy(dtype=np.int64) - 1
+        low = np.full(n_units, np.iinfo(np.int64).max)
+        high = np.full(n_units, -1, dtype=np.int64)
+        np.minimum.at(low, scc, prev)
+        np.maximum.at(high, scc, prev)
+        pinned = np.where((low == high) & (low >= 0), low, -1)
+
+    order = np.lexsort((np.arange(n_units), unit_cluster, cluster_priority[unit_cluster], cluster_deadline[unit_cluster]))
+    wave_of = np.full(n_units, -1, dtype=np.int64)
+    load_vms, load_gb = [], []
+    first_open = 0
+
+    def fits(w, v, gb):
+        if w >= len(load_vms) or (load_vms[w] == 0 and load_gb[w] == 0):
+            return True
+        return load_vms[w] + v <= max_vms and load_gb[w] + gb <= max_data_gb
+
+    def first_fit(lo, v, gb):
+        w = max(lo, first_open)
+        while not fits(w, v, gb):
+            w += 1
+        return w
+
+    def place(units, w, v, gb):
+        nonlocal first_open
+        while len(load_vms) <= w:
+            load_vms.append(0.0)
+            load_gb.append(0.0)
+        load_vms[w] += v
+        load_gb[w] += gb
+        wave_of[units] = w
+        while first_open < len(load_vms) and (load_vms[first_open] >= max_vms or load_gb[first_open] >= max_data_gb):
+            first_open += 1
+
+    bounds = np.flatnonzero(np.diff(unit_cluster[order])) + 1
+    for cluster_units in np.split(order, bounds) if n_units else []:
+        cluster = unit_cluster[cluster_units[0]]
+        whole = cluster_vms[cluster] <= max_vms and cluster_gb[cluster] <= max_data_gb
+        pinned_waves = np.unique(pinned[cluster_units][pinned[cluster_units] >= 0])
+        if whole and not len(pinned_waves):
+            place(cluster_units, first_fit(0, cluster_vms[cluster], cluster_gb[cluster]),
+                  cluster_vms[cluster], cluster_gb[cluster])
+            continue
+        # A cluster kept together last time stays together, new members joining its wave
+        if whole and len(pinned_waves) == 1 and fits(int(pinned_waves[0]), cluster_vms[cluster], cluster_gb[cluster]):
+            place(cluster_units, int(pinned_waves[0]), cluster_vms[cluster], cluster_gb[cluster])
+            continue
+        for u in cluster_units.tolist():
+            deps = dep_units[dep_ptr[u]:dep_ptr[u + 1]]
+            lo = int(wave_of[deps].max()) if len(deps) else 0
+            w = int(pinned[u])
+            if w < lo or not fits(w, unit_vms[u], unit_gb[u]):
+                w = first_fit(lo, unit_vms[u], unit_gb[u])
+            place([u], w, unit_vms[u], unit_gb[u])
+
+    app_wave = wave_of[scc] if n else np.zeros(0, dtype=np.int64)
+    # Waves are numbered from 1 with no gaps (pinned waves may leave holes)
+    used = np.unique(app_wave)
+    app_wave = np.searchsorted(used, app_wave)
+
+    by_wave = np.argsort(app_wave, kind="stable")
+    wave_members = np.split(by_wave, np.flatnonzero(np.diff(app_wave[by_wave])) + 1) if n else []
+    waves = []
+    for w, members in enumerate(wave_members):
+        wave_start = start + timedelta(days=w * wave_days)
+        wave_end = wave_start + timedelta(days=wave_days)
+        at_risk = members[deadline[members] < (wave_end - start).days]
+        wave_vms, wave_gb = float(vms[members].sum()), float(data_gb[members].sum())
+        waves.append({
+            "wave": w + 1,
+            "apps": engine.ids[members].tolist(),
+            "vms": int(wave_vms),
+            "data_gb": wave_gb,
+            "start": wave_start.isoformat(),
+            "end": wave_end.isoformat(),
+            "over_capacity": wave_vms > max_vms or wave_gb > max_data_gb,
+            "lease_risk": engine.ids[at_risk].tolist(),
+        })
+
+    cross = (app_wave[engine.src] != app_wave[engine.dst]) if n else np.zeros(0, dtype=bool)
+    return {
+        "total_apps": int(n),
+        "migration_strategy": "Dependency-ordered waves with cycles and clusters kept together",
+        "limits": {"max_vms": max_vms, "max_data_gb": max_data_gb, "wave_days": wave_days},
+        "waves": waves,
+        "assignment": dict(zip(engine.ids.tolist(), (app_wave + 1).tolist())),
+        "cross_wave_dependencies": int(cross.sum()),
+    }
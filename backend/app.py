@@ -1,68 +1,85 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
-import zipfile
-import csv
 import json
+import math
+import threading
 import traceback
-from pathlib import Path
-import fitz  # PyMuPDF
-import tempfile
+from functools import partial
+from datetime import date
 from dotenv import load_dotenv
 
 # === Local Imports ===
-from agents.agent_lease import analyze_lease
-from agents.agent_dependency import analyze_dependencies
-from agents.agent_Lease_call import run_lease_agent
+from agents.agent_dependency import dependency_report, narrative_prompt
+from agents.graph_layout import get_graph_layout
+from agents.cluster_analysis import get_cluster_analysis, plan_context
+from agents.agent_Lease_call import run_lease_agent, stream_lease_agent
 from agents.agent_dependency_call import run_dependency_agent
-from agents.agent_migrationplan_call import run_migrationplan_agent
-from agents.agent_migration import build_migration_plan
-from agents.agent_chatbot import run_chatbot_agent
-from agents.roi_formatter import get_html_output  # <-- Make sure this exists and is imported
+from agents.agent_migrationplan_call import run_migrationplan_agent, stream_migrationplan_agent
+from agents.agent_migration import plan_migration_waves
+from agents.agent_chatbot import run_chatbot_agent, stream_chatbot_agent
+from agents.roi_formatter import iter_lease_report, parse_lease_response, render_lease_report
+from agents.orchestrator import AgentTimeout, get_orchestrator
+from agents.jobs import JobManager, JobStore
+from agents.roi_calculator import run_roi_scenarios, scenario_grid, scenario_rows, sites_frame
+from agents import tracing
+from agents.tracing import TRACE_ID_HEADER
+from agents.site_metrics import compute_site_metrics, merge_lease_metrics
+from agents.streaming import SSE_HEADERS, sse_event
+from config import CACHE_FOLDER
+from utils.datasets import DATASET_HEADER, InvalidDatasetId, get_dataset
+from utils.fs_utils import atomic_write_json
+from utils.ingest import ingest_zip
+from utils.summarizer import summarize_file
 
 load_dotenv()
 
 app = Flask(__name__)
-CORS(app)
-
-UPLOAD_FOLDER = './uploads'
-OUTPUT_FOLDER = './app_files'
-SUMMARY_CACHE_FILE = os.path.join(tempfile.gettempdir(), "summary_cache.json")
-LEASE_JSON_PATH = os.path.join(tempfile.gettempdir(), "lease_output.json")
-
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+CORS(app, expose_headers=[TRACE_ID_HEADER], allow_headers=["Content-Type", DATASET_HEADER, "X-Trace"])
+tracing.init_app(app)
+
+# Jobs are shared by every worker process using the same CACHE_FOLDER
+JOBS_DB_FILE = os.path.join(CACHE_FOLDER, "jobs.sqlite3")
+# With a retrieval index, the chat thread only gets this much of each file summary up front
+CATALOGUE_CHARS = 300
+CHAT_TOP_K = 8
+
+# PDF extraction runs in spawned processes, which re-import this module as
+# __mp_main__; nothing with side effects (job store, orchestrator) is created at import
+_jobs = None
+_jobs_lock = threading.Lock()
+
+@app.before_request
+def _select_dataset():
+    """
+    Every request works on one dataset: the X-Dataset-Id header, a `dataset` query or
+    form field, or the default dataset. Uploads, indexes, lease output and agent
+    threads all live in that dataset's folder, so sessions don't see each other's data.
+    """
+    dataset_id = (
+        request.headers.get(DATASET_HEADER)
+        or request.args.get("dataset")
+        or request.form.get("dataset")
+        or (request.get_json(silent=True) or {}).get("dataset")
+    )
+    try:
+        g.dataset = get_dataset(dataset_id)
+    except InvalidDatasetId as e:
+        return jsonify({"error": str(e)}), 400
 
 def summarize_folder(directory, max_chars=2500):
     summaries = []
     for root, dirs, files in os.walk(directory):
         for filename in files:
-            file_path = os.path.join(root, filename)
-            ext = filename.lower().split(".")[-1]
-            try:
-                if ext in ["csv", "json"]:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    summaries.append({"filename": filename, "type": ext, "content": content[:max_chars]})
-                elif ext == "pdf":
-                    doc = fitz.open(file_path)
-                    text = "\n".join(page.get_text() for page in doc)
-                    doc.close()
-                    summaries.append({"filename": filename, "type": "pdf", "content": text[:max_chars]})
-            except Exception as e:
-                summaries.append({"filename": filename, "type": ext, "content": f"[Error reading file: {str(e)}]"})
+            summary = summarize_file(os.path.join(root, filename), filename, max_chars=max_chars)
+            if summary:
+                summaries.append(summary)
     return summaries
 
-def process_zip_and_extract_summary(zip_file, extract_dir="./uploads", max_chars=2500):
-    zip_path = os.path.join(UPLOAD_FOLDER, zip_file.filename)
-    zip_file.save(zip_path)
-    extract_path = os.path.join(UPLOAD_FOLDER, os.path.splitext(zip_file.filename)[0])
-    os.makedirs(extract_path, exist_ok=True)
-
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(extract_path)
-
-    summaries = summarize_folder(extract_path, max_chars=max_chars)
+def process_zip_and_extract_summary(zip_file, extract_dir, max_chars=2500):
+    # Members are streamed out of the upload itself; the ZIP is never written to disk
+    extract_path = os.path.join(extract_dir, os.path.splitext(os.path.basename(zip_file.filename))[0])
+    summaries = ingest_zip(zip_file.stream, extract_path, max_chars=max_chars)
     return summaries, [{"filename": s["filename"], "type": s["type"]} for s in summaries]
 
 @app.route('/upload', methods=['POST'])
@@ -70,24 +87,35 @@ def upload_zip():
     if 'files' not in request.files:
         return jsonify({"error": "No file part"}), 400
 
+    dataset = g.dataset
     uploaded_files = request.files.getlist("files")
     all_full_summaries, all_display_outputs = [], []
 
+    # Extract into a fresh directory; the previous upload stays current until this one is indexed
+    upload_dir = dataset.new_upload_dir()
     for file in uploaded_files:
         if file.filename.endswith(".zip"):
-            full_summaries, display_summaries = process_zip_and_extract_summary(file)
+            full_summaries, display_summaries = process_zip_and_extract_summary(file, upload_dir)
             all_full_summaries.extend(full_summaries)
             all_display_outputs.extend(display_summaries)
 
-    with open(SUMMARY_CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_full_summaries, f, indent=2)
+    # Swaps in the summary index, retrieval chunks, inventory store and content version
+    # (which keys cached agent replies) for this dataset
+    dataset.commit_upload(upload_dir, all_full_summaries)
 
-    return jsonify({"message": "Files processed successfully", "output_files": all_display_outputs})
+    response = {
+        "message": "Files processed successfully",
+        "dataset_id": dataset.id,
+        "output_files": all_display_outputs,
+    }
+    # Inventory CSVs that failed schema validation were left out of the inventory
+    store = dataset.inventory()
+    if store is not None and store.errors():
+        response["inventory_errors"] = store.errors()
+    return jsonify(response)
 
-@app.route('/analyze/lease', methods=['POST'])
-def lease_route():
-    data = request.get_json()
-    prompt = data.get('prompt', """You are a data extraction assistant. Your goal is to parse the provided PDF and JSON files and return a single valid JSON object where each key is a site name (\\"VA\\", \\"AZ\\", or \\"CO\\") and the value is a dictionary with the following fields:
+# Used when no inventory has been uploaded: the agent has to compute every number itself
+LEASE_FULL_PROMPT = """You are a data extraction assistant. Your goal is to parse the provided PDF and JSON files and return a single valid JSON object where each key is a site name (\\"VA\\", \\"AZ\\", or \\"CO\\") and the value is a dictionary with the following fields:
 
 Required fields for each site:
 - site (str): Name of the site
@@ -134,46 +162,225 @@ Rules:
 - Use numeric types (int or float) where appropriate.
 - Use "" or 0 if a field is missing.
 - Do not include any explanation, headers, or extra formatting—only the JSON.
-""")
+"""
+
+# Used when site metrics are computed locally: the agent only reads the lease PDFs
+LEASE_CLAUSE_PROMPT = """You are a data extraction assistant. Your goal is to parse the provided lease PDFs and return a single valid JSON object where each key is a site name (\\"VA\\", \\"AZ\\", or \\"CO\\") and the value is a dictionary with the following fields:
+
+Required fields for each site:
+- site (str): Name of the site
+- Monthly Rent (int)
+- termination_fee_clause (str): Text describing early termination penalties from the lease PDF
+- under_occupancy (str): Text describing any under-occupancy clause or penalty
+- lease_end_date (str): Lease expiration date in YYYY-MM-DD format (best effort)
+
+Instructions for extracting values from the lease PDFs (e.g., \\"VA Lease.pdf\\"):
+- termination_fee_clause: Extract from sections about “Termination,” “Early Exit,” or “Penalty”
+- under_occupancy: Extract from sections about “Occupancy,” “Utilization,” or “Under-occupancy”
+- lease_end_date: Extract any explicit date marking end of lease term; format as YYYY-MM-DD
+
+Server counts, storage, application counts and bandwidth are computed separately; do not include them.
+
+Rules:
+- Return a single valid JSON object only.
+- Use numeric types (int or float) where appropriate.
+- Use "" or 0 if a field is missing.
+- Do not include any explanation, headers, or extra formatting—only the JSON.
+"""
+
+def site_metrics_for(dataset):
+    # No inventory in this dataset means no local metrics, not the default dataset's
+    store = dataset.inventory()
+    return compute_site_metrics(store) if store is not None else {}
+
+def finish_lease_analysis(result, site_metrics, dataset):
+    """Turn the lease agent's reply into merged per-site lease data and save it for later sweeps."""
+    if not result or not isinstance(result, dict):
+        raise ValueError("Invalid JSON returned by agent")
+
+    # Merge in the locally computed metrics
+    lease_data = parse_lease_response(result.get("response", ""))
+    if site_metrics:
+        lease_data = merge_lease_metrics(lease_data, site_metrics)
+
+    atomic_write_json(dataset.lease_json_path, {"response": json.dumps(lease_data, indent=2)}, indent=2)
+    return lease_data
+
+def lease_job(payload):
+    dataset = get_dataset(payload.get('dataset'))
+    site_metrics = site_metrics_for(dataset)
+    prompt = payload.get('prompt') or (LEASE_CLAUSE_PROMPT if site_metrics else LEASE_FULL_PROMPT)
+    result = get_orchestrator().run("lease", run_lease_agent, prompt, refresh=bool(payload.get('refresh')), dataset=dataset)
+    return {"html": render_lease_report(finish_lease_analysis(result, site_metrics, dataset))}
+
+def plan_job(payload):
+    dataset = get_dataset(payload.get('dataset'))
+    prompt = plan_prompt(payload.get('prompt') or MIGRATION_PLAN_PROMPT, dataset)
+    return get_orchestrator().run(
+        "migration_plan", run_migrationplan_agent, prompt, refresh=bool(payload.get('refresh')), dataset=dataset
+    )
+
+def get_jobs():
+    """The job manager, created on first use; jobs left behind by dead workers are failed then."""
+    global _jobs
+    with _jobs_lock:
+        if _jobs is None:
+            job_store = JobStore(JOBS_DB_FILE)
+            job_store.fail_abandoned()
+            _jobs = JobManager(job_store)
+            _jobs.register("lease", lease_job)
+            _jobs.register("plan", plan_job)
+        return _jobs
+
+def submit_job(kind, data):
+    job_id, created = get_jobs().submit(kind, {
+        "dataset": g.dataset.id, "prompt": data.get('prompt'), "refresh": bool(data.get('refresh')),
+    })
+    return jsonify({"job_id": job_id, "deduplicated": not created, "status_url": f"/jobs/{job_id}"}), 202
+
+@app.route('/jobs/<kind>', methods=['POST'])
+def submit_job_route(kind):
+    """Start a lease or plan run in the background; poll GET /jobs/<id> or stream /jobs/<id>/events."""
+    if kind not in ("lease", "plan"):
+        return jsonify({"error": f"Unknown job kind: {kind}"}), 404
+    return submit_job(kind, request.get_json(silent=True) or {})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status_route(job_id):
+    job = get_jobs().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events_route(job_id):
+    """Server-sent events: one `status` event per state change, the last one carrying the result."""
+    if get_jobs().get(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def events():
+        for job in get_jobs().iter_events(job_id):
+            yield sse_event("status", job)
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers=SSE_HEADERS)
+
+def stream_agent_response(agent, chunks, on_complete=None):
+    """
+    Forward a streamed agent reply as server-sent events: `delta` events with text
+    as it arrives, then `done` with the full response (plus whatever on_complete
+    adds), or `error`. The agent slot is held for as long as the stream runs.
+    """
+    def events():
+        parts = []
+        try:
+            with get_orchestrator().slot(agent):
+                for text in chunks:
+                    parts.append(text)
+                    yield sse_event("delta", {"text": text})
+            done = {"response": "".join(parts)}
+            if on_complete:
+                done.update(on_complete(done["response"]))
+            yield sse_event("done", done)
+        except Exception as e:
+            traceback.print_exc()
+            yield sse_event("error", {"error": str(e)})
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers=SSE_HEADERS)
+
+@app.route('/analyze/lease', methods=['POST'])
+def lease_route():
+    data = request.get_json(silent=True) or {}
+    if request.args.get("async") == "1":
+        return submit_job("lease", data)
+
+    dataset = g.dataset
+
+    # Server counts, storage, app counts and bandwidth come from the uploaded CSVs,
+    # so the agent only has to pull the lease clauses out of the PDFs
+    site_metrics = site_metrics_for(dataset)
+    prompt = data.get('prompt', LEASE_CLAUSE_PROMPT if site_metrics else LEASE_FULL_PROMPT)
 
     try:
         # 1. Run lease agent
-        result = run_lease_agent(prompt)
-        if not result or not isinstance(result, dict):
-            return jsonify({"error": "Invalid JSON returned by agent"}), 500
-
-        # 2. Save output
-        with open(LEASE_JSON_PATH, "w") as f:
-            json.dump(result, f, indent=2)
-
-        # 3. Collect CSVs
-        csvs = {
-            "applications": os.path.join(OUTPUT_FOLDER, "applications.csv"),
-            "servers": os.path.join(OUTPUT_FOLDER, "physical_servers.csv"),
-            "vms": os.path.join(OUTPUT_FOLDER, "virtual_machines.csv"),
-            "storage": os.path.join(OUTPUT_FOLDER, "storage_volumes.csv"),
-            "network": os.path.join(OUTPUT_FOLDER, "network_links.csv")
-        }
-
-        # 4. Format and return
-        html_output = get_html_output(LEASE_JSON_PATH)
+        # "refresh": true skips the response cache and re-asks the agent
+        result = get_orchestrator().run(
+            "lease", run_lease_agent, prompt, refresh=bool(data.get('refresh')), dataset=dataset
+        )
+
+        # 2. Merge and save output
+        lease_data = finish_lease_analysis(result, site_metrics, dataset)
+
+        # 3. Format and return (?stream=1 sends the report as chunks while it renders)
+        if request.args.get("stream") == "1":
+            return Response(stream_with_context(iter_lease_report(lease_data)), mimetype="text/html")
+        html_output = render_lease_report(lease_data)
         return html_output  # instead of jsonify({"html_table": html_output})
 
+    except AgentTimeout as e:
+        return jsonify({"error": str(e)}), 504
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": f"Lease analysis failed: {str(e)}"}), 500
 
-@app.route('/analyze/dependencies', methods=['POST'])
-def dependency_route():
+@app.route('/analyze/lease/stream', methods=['POST'])
+def lease_stream_route():
+    """Stream the lease agent's reply as it is generated; the final `done` event carries the rendered report."""
     data = request.get_json(silent=True) or {}
-    prompt = data.get('prompt', 'Please provide a table of the dependencies and call out any circular dependencies.')
-    result = run_dependency_agent(prompt)
-    return jsonify(result)
-
-@app.route('/generate-plan', methods=['POST'])
-def generate_plan_route():
+    dataset = g.dataset
+    site_metrics = site_metrics_for(dataset)
+    prompt = data.get('prompt', LEASE_CLAUSE_PROMPT if site_metrics else LEASE_FULL_PROMPT)
+
+    def report(response):
+        return {"html": render_lease_report(finish_lease_analysis({"response": response}, site_metrics, dataset))}
+
+    return stream_agent_response("lease", stream_lease_agent(prompt, dataset), on_complete=report)
+
+@app.route('/analyze/roi/sweep', methods=['POST'])
+def roi_sweep_route():
+    """
+    What-if ROI over sites x scenarios. Body (all optional):
+      sites:     {site: {...lease fields...}}; defaults to the last lease analysis,
+                 then to the locally computed site metrics
+      scenarios: {knob: [values]} swept as a grid, or a list of {knob: value} rows
+      format:    "json" (default) or "csv"
+    """
     data = request.get_json(silent=True) or {}
-    prompt = data.get('prompt', f"""
+
+    lease_data = data.get("sites")
+    if not lease_data and os.path.exists(g.dataset.lease_json_path):
+        with open(g.dataset.lease_json_path, "r") as f:
+            lease_data = parse_lease_response(json.load(f).get("response", ""))
+    if not lease_data:
+        lease_data = site_metrics_for(g.dataset)
+    if not lease_data:
+        return jsonify({"error": "No site data found. Upload inventory or run a lease analysis first."}), 400
+
+    try:
+        scenarios = data.get("scenarios") or {}
+        if isinstance(scenarios, list):
+            scenarios_df = scenario_rows(scenarios)
+        elif isinstance(scenarios, dict):
+            scenarios_df = scenario_grid(**scenarios)
+        else:
+            raise ValueError("scenarios must be an object of {knob: [values]} or a list of {knob: value} rows")
+        results = run_roi_scenarios(sites_frame(lease_data), scenarios_df)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    if data.get("format") == "csv":
+        return Response(results.to_csv(index=False), mimetype="text/csv")
+    # inf (no payback / no one-time cost) isn't valid JSON
+    for col in ("ROI", "Payback_Years"):
+        results[col] = results[col].astype(object).where(results[col].abs() != float("inf"), None)
+    return jsonify({
+        "sites": len(lease_data),
+        "scenarios": len(scenarios_df),
+        "results": results.to_dict(orient="records"),
+    })
+
+DEPENDENCY_PROMPT = 'Please provide a table of the dependencies and call out any circular dependencies.'
+
+MIGRATION_PLAN_PROMPT = """
 You are a cloud migration planning Agent that focuses on analysis of dependencies in an organization's data infrastructure
 You have already ingested the client’s infrastructure CSVs and network flow data. Using that information:
 
@@ -208,29 +415,268 @@ You have already ingested the client’s infrastructure CSVs and network flow da
 - Use consistent units (GB/day) and terminology (“cluster,” “node,” “edge”).  
 - Return only valid Markdown as specified.  
  
-        """)
-    result = run_migrationplan_agent(prompt)
+        """
+
+DEPENDENCY_NARRATIVE_PROMPT = 'Explain the migration risks of these dependencies, especially the circular ones, and how to sequence them.'
+
+def local_dependency_report(dataset):
+    # Only this dataset's inventory; without one there is nothing to analyze locally
+    store = dataset.inventory()
+    return dependency_report(store) if store is not None else None
+
+def dataset_cluster_analysis(dataset):
+    store = dataset.inventory()
+    return get_cluster_analysis(store) if store is not None else None
+
+def plan_prompt(prompt, dataset):
+    """The plan prompt plus this dataset's locally computed clusters, cross-site flows and hotspots."""
+    analysis = dataset_cluster_analysis(dataset)
+    if analysis is None:
+        return prompt
+    return (
+        f"{prompt}\n\nPrecomputed analysis of the uploaded inventory. Use these clusters, flows and "
+        "hotspots as given instead of deriving your own; flows are estimated GB/day:\n"
+        f"{plan_context(analysis)}"
+    )
+
+@app.route('/analyze/clusters', methods=['GET', 'POST'])
+def cluster_analysis_route():
+    """Traffic-weighted app clusters, cross-site flows and co-location hotspots for the current upload."""
+    analysis = dataset_cluster_analysis(g.dataset)
+    if analysis is None:
+        return jsonify({"error": "No application_dependencies.csv in the current upload"}), 404
+    return jsonify(analysis)
+
+@app.route('/analyze/dependencies', methods=['POST'])
+def dependency_route():
+    """
+    Dependency table and circular dependencies computed locally from
+    application_dependencies.csv. The agent is only called for a narrative
+    (narrative=true or a custom prompt), or when the upload has no dependency CSV.
+    """
+    data = request.get_json(silent=True) or {}
+    prompt = data.get('prompt')
+    options = {"refresh": bool(data.get('refresh')), "dataset": g.dataset}
+    report = local_dependency_report(g.dataset)
+    try:
+        if report is None:
+            return jsonify(get_orchestrator().run("dependency", run_dependency_agent, prompt or DEPENDENCY_PROMPT, **options))
+        if data.get('narrative') or prompt:
+            report["narrative"] = get_orchestrator().run(
+                "dependency", run_dependency_agent,
+                narrative_prompt(report, prompt or DEPENDENCY_NARRATIVE_PROMPT), **options
+            )
+    except AgentTimeout as e:
+        if report is None:
+            return jsonify({"error": str(e)}), 504
+        report["narrative"] = {"error": str(e)}
+    return jsonify(report)
+
+def layout_request():
+    """
+    (graph, layout, bbox) for the current dataset; bbox comes from ?bbox=x0,y0,x1,y1
+    and is () when malformed, non-finite or inverted.
+    """
+    store = g.dataset.inventory()
+    engine, layout = get_graph_layout(store) if store is not None else (None, None)
+    bbox = request.args.get("bbox")
+    try:
+        bbox = tuple(float(v) for v in bbox.split(",")) if bbox else None
+    except ValueError:
+        bbox = ()
+    if bbox and (len(bbox) != 4 or not all(map(math.isfinite, bbox)) or bbox[0] > bbox[2] or bbox[1] > bbox[3]):
+        bbox = ()
+    return engine, layout, bbox
+
+@app.route('/graph/dependencies', methods=['GET'])
+def dependency_layout_route():
+    """Positioned nodes and edges of the dependency graph (optionally one bbox tile) for the frontend to draw."""
+    engine, layout, bbox = layout_request()
+    if layout is None:
+        return jsonify({"error": "No application_dependencies.csv in the current upload"}), 404
+    if bbox is not None and len(bbox) != 4:
+        return jsonify({"error": "bbox must be x0,y0,x1,y1 with x0 <= x1 and y0 <= y1"}), 400
+    return jsonify(layout.tile(engine, bbox))
+
+@app.route('/graph/dependencies.svg', methods=['GET'])
+def dependency_svg_route():
+    engine, layout, bbox = layout_request()
+    if layout is None:
+        return jsonify({"error": "No application_dependencies.csv in the current upload"}), 404
+    if bbox is not None and len(bbox) != 4:
+        return jsonify({"error": "bbox must be x0,y0,x1,y1 with x0 <= x1 and y0 <= y1"}), 400
+    return Response(layout.svg(engine, bbox), mimetype="image/svg+xml")
+
+@app.route('/generate-plan', methods=['POST'])
+def generate_plan_route():
+    data = request.get_json(silent=True) or {}
+    if request.args.get("async") == "1":
+        return submit_job("plan", data)
+    prompt = plan_prompt(data.get('prompt', MIGRATION_PLAN_PROMPT), g.dataset)
+    try:
+        result = get_orchestrator().run(
+            "migration_plan", run_migrationplan_agent, prompt, refresh=bool(data.get('refresh')), dataset=g.dataset
+        )
+    except AgentTimeout as e:
+        return jsonify({"error": str(e)}), 504
     return jsonify(result)
 
-@app.route('/analyze/prompt', methods=['POST'])
-def analyze_custom_prompt():
+def json_flag(value, default):
+    """Strict boolean for a JSON option: true/false, 1/0 or "true"/"false"; anything else raises ValueError."""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ("true", "false", "1", "0"):
+        return value.strip().lower() in ("true", "1")
+    raise ValueError(value)
+
+@app.route('/plan/waves', methods=['POST'])
+def wave_plan_route():
+    """
+    Dependency-aware migration waves computed locally. Optional JSON: max_vms,
+    max_data_gb, wave_days, start (YYYY-MM-DD), replan (default true: keep the
+    committed plan's waves where they still fit) and commit (default false:
+    what-if plans are not saved; true makes this the plan later replans keep).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        limits = {key: float(data[key]) for key in ("max_vms", "max_data_gb") if data.get(key) is not None}
+        if data.get("wave_days") is not None:
+            limits["wave_days"] = int(data["wave_days"])
+        if not all(math.isfinite(value) and value > 0 for value in limits.values()):
+            raise ValueError(limits)
+        start = date.fromisoformat(data["start"]) if data.get("start") else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_vms, max_data_gb and wave_days must be positive numbers and start YYYY-MM-DD"}), 400
+    try:
+        replan = json_flag(data.get("replan"), True)
+        commit = json_flag(data.get("commit"), False)
+    except ValueError:
+        return jsonify({"error": "replan and commit must be true or false"}), 400
+    plan = plan_migration_waves(g.dataset, start=start, replan=replan, save=commit, **limits)
+    if plan is None:
+        return jsonify({"error": "No application_dependencies.csv in the current upload"}), 404
+    return jsonify(plan)
+
+@app.route('/generate-plan/stream', methods=['POST'])
+def generate_plan_stream_route():
+    data = request.get_json(silent=True) or {}
+    prompt = plan_prompt(data.get('prompt', MIGRATION_PLAN_PROMPT), g.dataset)
+    # Shares cached replies with /generate-plan; "refresh": true re-asks the agent
+    return stream_agent_response(
+        "migration_plan", stream_migrationplan_agent(prompt, refresh=bool(data.get('refresh')), dataset=g.dataset)
+    )
+
+@app.route('/analyze/all', methods=['POST'])
+def analyze_all_route():
+    """Run the lease, dependency and migration-plan agents for the current upload in parallel."""
+    data = request.get_json(silent=True) or {}
+    try:
+        timeout = float(data['timeout']) if data.get('timeout') else None
+        if timeout is not None and not timeout > 0:
+            raise ValueError(timeout)
+    except (TypeError, ValueError):
+        return jsonify({"error": "timeout must be a positive number of seconds"}), 400
+    dataset = g.dataset
+    site_metrics = site_metrics_for(dataset)
+    lease_prompt = data.get('lease_prompt', LEASE_CLAUSE_PROMPT if site_metrics else LEASE_FULL_PROMPT)
+
+    options = {"refresh": bool(data.get('refresh')), "dataset": dataset}
+
+    calls = {
+        "lease": ("lease", partial(run_lease_agent, **options), (lease_prompt,)),
+        "plan": ("migration_plan", partial(run_migrationplan_agent, **options), (plan_prompt(data.get('plan_prompt', MIGRATION_PLAN_PROMPT), dataset),)),
+    }
+    # Dependencies are analyzed locally; the agent only adds a narrative when asked to
+    report = local_dependency_report(dataset)
+    dependency_prompt = data.get('dependency_prompt')
+    if report is None:
+        calls["dependencies"] = ("dependency", partial(run_dependency_agent, **options), (dependency_prompt or DEPENDENCY_PROMPT,))
+    elif data.get('narrative') or dependency_prompt:
+        calls["dependencies"] = ("dependency", partial(run_dependency_agent, **options),
+                                 (narrative_prompt(report, dependency_prompt or DEPENDENCY_NARRATIVE_PROMPT),))
+
+    results = get_orchestrator().run_many(calls, timeout=timeout)
+
+    response = {}
+    if report is not None:
+        response["dependencies"] = report
+    for name, result in results.items():
+        if name == "dependencies" and report is not None:
+            report["narrative"] = {"error": str(result)} if isinstance(result, Exception) else result
+        elif isinstance(result, Exception):
+            response[name] = {"error": str(result)}
+        elif name == "lease":
+            try:
+                response[name] = {"html": render_lease_report(finish_lease_analysis(result, site_metrics, dataset))}
+            except Exception as e:
+                response[name] = {"error": f"Lease analysis failed: {str(e)}"}
+        else:
+            response[name] = result
+    return jsonify(response)
+
+def chat_request():
+    """
+    The user's prompt, the file summaries that open the chat thread and the
+    excerpts retrieved for this question, from a form or JSON body.
+    """
     user_prompt = request.form.get("prompt") or (request.get_json(silent=True) or {}).get("prompt") or "What can you tell me about the uploaded data?"
 
-    if not os.path.exists(SUMMARY_CACHE_FILE):
-        return jsonify({"error": "No uploaded data found. Please upload a ZIP first."}), 400
+    # Optional list of filenames to limit the context to; defaults to every summarized file
+    requested_files = (request.get_json(silent=True) or {}).get("files") or request.form.getlist("files") or None
+
+    summary_index = g.dataset.summary_index
+    retrieval_index = g.dataset.retrieval_index
 
-    with open(SUMMARY_CACHE_FILE, "r", encoding="utf-8") as f:
-        extracted_summaries = json.load(f)
+    # Only new or modified files in app_files get re-summarized
+    summary_index.refresh_folder(
+        "app_files", g.dataset.app_files_dir, lambda path, filename: summarize_file(path, filename)
+    )
+    combined_summaries = list(summary_index.iter_summaries("upload", requested_files)) + list(
+        summary_index.iter_summaries("app_files", requested_files)
+    )
 
-    app_file_summaries = summarize_folder("./app_files")
-    combined_summaries = extracted_summaries + app_file_summaries
+    # Uploads indexed for retrieval: a short catalogue opens the thread and each turn
+    # carries the top-k chunks for its question; otherwise fall back to full summaries
+    context_chunks = None
+    if retrieval_index.count("upload"):
+        context_chunks = retrieval_index.search(user_prompt, k=CHAT_TOP_K, filenames=requested_files)
+        combined_summaries = [{**s, "content": s["content"][:CATALOGUE_CHARS]} for s in combined_summaries]
+    return user_prompt, combined_summaries, context_chunks
+
+@app.route('/analyze/prompt', methods=['POST'])
+def analyze_custom_prompt():
+    if g.dataset.summary_index.count("upload") == 0:
+        return jsonify({"error": "No uploaded data found. Please upload a ZIP first."}), 400
+
+    user_prompt, combined_summaries, context_chunks = chat_request()
 
     try:
-        result = run_chatbot_agent(prompt=user_prompt, file_summaries=combined_summaries)
+        result = get_orchestrator().run(
+            "chatbot", run_chatbot_agent,
+            prompt=user_prompt, file_summaries=combined_summaries, context_chunks=context_chunks,
+            dataset=g.dataset,
+        )
         return jsonify({"result": result})
+    except AgentTimeout as e:
+        return jsonify({"error": str(e)}), 504
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)})
 
+@app.route('/analyze/prompt/stream', methods=['POST'])
+def analyze_custom_prompt_stream():
+    if g.dataset.summary_index.count("upload") == 0:
+        return jsonify({"error": "No uploaded data found. Please upload a ZIP first."}), 400
+
+    user_prompt, combined_summaries, context_chunks = chat_request()
+    return stream_agent_response(
+        "chatbot", stream_chatbot_agent(user_prompt, combined_summaries, context_chunks, g.dataset)
+    )
+
 if __name__ == '__main__':
+    get_jobs()
     app.run(debug=True, port=5000)
@@ -11,3 +11,16 @@ AGENT_MIGRATION_ID = os.getenv("AGENT_MIGRATION_ID")
 
 UPLOAD_FOLDER = "./uploads"
 OUTPUT_FOLDER = "./app_files"
+CACHE_FOLDER = os.getenv("CACHE_FOLDER", "./cache")
+CONTENT_CACHE_MAX_BYTES = int(os.getenv("CONTENT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+INVENTORY_FOLDER = os.getenv("INVENTORY_FOLDER", "./inventory")
+# Per-dataset uploads, indexes and agent state; share it between workers to scale out
+DATASETS_FOLDER = os.getenv("DATASETS_FOLDER", "./datasets")
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(24 * 3600)))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+# Cosine similarity at which a differently worded prompt reuses a cached reply; 0 disables the tier
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+# Default per-wave limits and cadence for the migration wave planner
+WAVE_MAX_VMS = int(os.getenv("WAVE_MAX_VMS", "50"))
+WAVE_MAX_DATA_GB = float(os.getenv("WAVE_MAX_DATA_GB", "20000"))
+WAVE_DAYS = int(os.getenv("WAVE_DAYS", "90"))
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from config import CACHE_FOLDER, CONTENT_CACHE_MAX_BYTES
+from utils.sqlite_utils import connect
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(file_path):
+    """
+    Cache key for a file from its path, size and mtime, without reading it. Use
+    it where hashing the whole file would cost more than the work being cached.
+    """
+    stat = os.stat(file_path)
+    key = f"{os.path.abspath(file_path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+    return "stat:" + hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class ContentCache:
+    """
+    Persistent content-addressed cache: (SHA-256 of the source bytes, kind) -> JSON value.
+
+    `kind` names what was derived from the bytes ("summary:csv:2500", "pdf-text",
+    "records-json", ...) so one file can have several cached products. Entries are
+    evicted least-recently-used once the stored values exceed max_bytes.
+    """
+
+    def __init__(self, db_path=None, max_bytes=CONTENT_CACHE_MAX_BYTES):
+        self.db_path = db_path or os.path.join(CACHE_FOLDER, "content_cache.sqlite3")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = connect(self.db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " digest TEXT NOT NULL, kind TEXT NOT NULL, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_access REAL NOT NULL,"
+            " PRIMARY KEY (digest, kind))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+        self._conn.commit()
+
+    def get(self, digest, kind):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE digest = ? AND kind = ?", (digest, kind)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE digest = ? AND kind = ?", (time.time(), digest, kind)
+            )
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, digest, kind, value):
+        encoded = json.dumps(value)
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (digest, kind, value, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (digest, kind, encoded, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def get_or_compute(self, digest, kind, compute):
+        value = self.get(digest, kind)
+        if value is None:
+            value = compute()
+            self.put(digest, kind, value)
+        return value
+
+    def total_bytes(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT digest, kind, size FROM entries ORDER BY last_access ASC").fetchall()
+        for digest, kind, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE digest = ? AND kind = ?", (digest, kind))
+            total -= size
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_content_cache():
+    """Process-wide cache instance, opened on first use."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ContentCache()
+        return _shared_cache
@@ -0,0 +1,27 @@
+import hashlib
+import json
+
+from utils.fs_utils import atomic_write_json
+
+
+def dataset_fingerprint(summaries):
+    """SHA-256 over the (filename, content digest) pairs of an upload, independent of member order."""
+    digest = hashlib.sha256()
+    for filename, member_digest in sorted((s["filename"], s.get("digest") or "") for s in summaries):
+        digest.update(f"{filename}\0{member_digest}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def write_dataset_version(summaries, path):
+    version = dataset_fingerprint(summaries)
+    atomic_write_json(path, {"version": version})
+    return version
+
+
+def current_dataset_version(path):
+    """Content hash of the most recent upload, or "" before anything was uploaded."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("version", "")
+    except (OSError, ValueError):
+        return ""
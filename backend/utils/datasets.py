@@ -0,0 +1,152 @@
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+
+from config import DATASETS_FOLDER
+from utils.dataset_version import current_dataset_version, write_dataset_version
+from utils.fs_utils import atomic_write_json, file_lock
+from utils.inventory import (
+    MANIFEST as INVENTORY_MANIFEST, discard_inventory, find_inventory_csvs, get_inventory, publish_inventory,
+    stage_inventory,
+)
+from utils.retrieval import RetrievalIndex
+from utils.summary_index import SummaryIndex
+
+DEFAULT_DATASET = "default"
+CURRENT_UPLOAD = "current_upload.json"
+DATASET_HEADER = "X-Dataset-Id"
+MAX_OPEN_DATASETS = 64
+_VALID_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class InvalidDatasetId(ValueError):
+    pass
+
+
+class Dataset:
+    """
+    One upload namespace (a browser session, a customer, ...) with everything the
+    backend keeps about it under DATASETS_FOLDER/<id>/:
+
+        uploads/<upload id>/  extracted ZIP members of the current upload
+        app_files/            generated outputs the chatbot may also read
+        inventory/            columnar inventory store
+        summary_index.sqlite3, retrieval.sqlite3
+        dataset_version.json, current_upload.json, lease_output.json, *_thread.json
+
+    JSON state is written atomically and each upload extracts into a fresh
+    directory that only becomes current once it is fully indexed, so concurrent
+    requests and worker processes sharing the folder never see partial data.
+    """
+
+    def __init__(self, dataset_id, root=None):
+        if not _VALID_ID.match(dataset_id or ""):
+            raise InvalidDatasetId(f"Invalid dataset id: {dataset_id!r}")
+        self.id = dataset_id
+        self.path = os.path.join(root or DATASETS_FOLDER, dataset_id)
+        self.uploads_dir = os.path.join(self.path, "uploads")
+        self.app_files_dir = os.path.join(self.path, "app_files")
+        self.inventory_dir = os.path.join(self.path, "inventory")
+        self.lease_json_path = os.path.join(self.path, "lease_output.json")
+        os.makedirs(self.uploads_dir, exist_ok=True)
+        os.makedirs(self.app_files_dir, exist_ok=True)
+        self.summary_index = SummaryIndex(os.path.join(self.path, "summary_index.sqlite3"))
+        self.retrieval_index = RetrievalIndex(os.path.join(self.path, "retrieval.sqlite3"))
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    @property
+    def version(self):
+        """Content hash of the current upload ("" before the first one)."""
+        return current_dataset_version(self.file("dataset_version.json"))
+
+    def inventory(self):
+        return get_inventory(self.inventory_dir)
+
+    def read_json(self, name, default=None):
+        try:
+            with open(self.file(name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def write_json(self, name, data, **dump_kwargs):
+        atomic_write_json(self.file(name), data, **dump_kwargs)
+
+    def new_upload_dir(self):
+        upload_dir = os.path.join(self.uploads_dir, uuid.uuid4().hex)
+        os.makedirs(upload_dir)
+        return upload_dir
+
+    def commit_upload(self, upload_dir, summaries):
+        """
+        Make an extracted upload current: build its inventory, index its
+        summaries and text chunks, then swap in the inventory, record the new
+        content version and drop the previous upload. The inventory is built
+        before anything is swapped and published last, so a file that fails to
+        convert leaves the previous upload current for chat, retrieval, the
+        inventory and cached replies alike. Commits to one dataset hold a file
+        lock, so concurrent uploads (from any worker process) apply one at a time.
+        """
+        with file_lock(self.file("commit")):
+            return self._commit_upload(upload_dir, summaries)
+
+    def _commit_upload(self, upload_dir, summaries):
+        inventory_csvs = find_inventory_csvs(s["path"] for s in summaries)
+        staged = None
+        try:
+            if inventory_csvs:
+                staged = stage_inventory(inventory_csvs, self.inventory_dir)
+            # Chunking for retrieval re-reads the files, so it goes before the cheap summary swap
+            self.retrieval_index.replace_source("upload", summaries)
+            self.summary_index.replace_source("upload", summaries)
+        except BaseException:
+            if staged is not None:
+                discard_inventory(staged, self.inventory_dir)
+            shutil.rmtree(upload_dir, ignore_errors=True)
+            raise
+
+        if staged is not None:
+            publish_inventory(staged, self.inventory_dir)
+        else:
+            # Dropping the manifest first makes the old inventory disappear in one step
+            try:
+                os.remove(os.path.join(self.inventory_dir, INVENTORY_MANIFEST))
+            except OSError:
+                pass
+            shutil.rmtree(self.inventory_dir, ignore_errors=True)
+        version = write_dataset_version(summaries, self.file("dataset_version.json"))
+
+        # Only the upload this one replaces goes; others may still be extracting
+        current = os.path.basename(upload_dir)
+        previous = (self.read_json(CURRENT_UPLOAD) or {}).get("upload")
+        self.write_json(CURRENT_UPLOAD, {"upload": current})
+        if previous and previous != current:
+            shutil.rmtree(os.path.join(self.uploads_dir, previous), ignore_errors=True)
+        return version
+
+
+_open = OrderedDict()
+_open_lock = threading.Lock()
+
+
+def get_dataset(dataset_id=None, root=None):
+    """The Dataset for an id (DEFAULT_DATASET when empty), kept open for reuse within the process."""
+    dataset_id = dataset_id or DEFAULT_DATASET
+    key = (os.path.abspath(root or DATASETS_FOLDER), dataset_id)
+    with _open_lock:
+        dataset = _open.get(key)
+        if dataset is not None:
+            _open.move_to_end(key)
+            return dataset
+    dataset = Dataset(dataset_id, root)
+    with _open_lock:
+        dataset = _open.setdefault(key, dataset)
+        while len(_open) > MAX_OPEN_DATASETS:
+            _open.popitem(last=False)
+    return dataset
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.summarizer import SUPPORTED_TYPES, file_type, summarize_file
+
+CHUNK_SIZE = 1024 * 1024
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+
+
+def is_wanted_member(info):
+    """Skip directories, macOS resource forks and anything we can't summarize."""
+    if info.is_dir():
+        return False
+    name = info.filename
+    if name.startswith("__MACOSX/") or os.path.basename(name).startswith("._"):
+        return False
+    return file_type(name) in SUPPORTED_TYPES
+
+
+def safe_member_path(extract_dir, member_name):
+    # Same sanitizing extractall() does: no absolute paths, no "..", no empty parts
+    parts = [p for p in member_name.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+    if not parts:
+        return None
+    return os.path.join(extract_dir, *parts)
+
+
+def _spool_if_needed(stream):
+    try:
+        if stream.seekable():
+            return stream
+    except AttributeError:
+        pass
+    spooled = tempfile.TemporaryFile()
+    shutil.copyfileobj(stream, spooled, CHUNK_SIZE)
+    spooled.seek(0)
+    return spooled
+
+
+def _ingest_member(zip_ref, info, target_path, max_chars):
+    filename = os.path.basename(info.filename)
+    digest = hashlib.sha256()
+    try:
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        # Hash while copying so the content cache lookup costs no extra read
+        with zip_ref.open(info) as src, open(target_path, "wb") as dst:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                dst.write(chunk)
+    except Exception as e:
+        summary = {"filename": filename, "type": file_type(filename), "content": f"[Error extracting file: {str(e)}]"}
+    else:
+        summary = summarize_file(target_path, filename, max_chars=max_chars, digest=digest.hexdigest())
+        summary["digest"] = digest.hexdigest()
+    summary["path"] = target_path
+    return summary
+
+
+def ingest_zip(zip_stream, extract_dir, max_chars=2500, max_workers=None):
+    """
+    Stream every supported member of a ZIP straight out of the archive into
+    extract_dir and summarize it, using a bounded worker pool.
+
+    Members are copied in CHUNK_SIZE pieces and at most 2 * max_workers members
+    are in flight at once, so memory stays flat regardless of archive size.
+    Summaries come back in archive order, each with the "path" it was extracted to
+    and the SHA-256 "digest" of its bytes.
+    """
+    max_workers = max_workers or MAX_WORKERS
+    zip_stream = _spool_if_needed(zip_stream)
+    os.makedirs(extract_dir, exist_ok=True)
+
+    in_flight = threading.BoundedSemaphore(max_workers * 2)
+    futures = []
+    with zipfile.ZipFile(zip_stream, "r") as zip_ref, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for info in zip_ref.infolist():
+            if not is_wanted_member(info):
+                continue
+            target_path = safe_member_path(extract_dir, info.filename)
+            if target_path is None:
+                continue
+            in_flight.acquire()
+            future = pool.submit(_ingest_member, zip_ref, info, target_path, max_chars)
+            future.add_done_callback(lambda _: in_flight.release())
+            futures.append(future)
+
+        return [future.result() for future in futures]
@@ -0,0 +1,525 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config import INVENTORY_FOLDER
+from utils.fs_utils import atomic_write_json, file_lock
+
+# Declared column types for the inventory CSVs we know about. "str" columns are
+# stored as UTF-8 bytes plus per-row offsets so they can be memory-mapped like
+# numbers without padding every row to the longest value; low-cardinality
+# "category" columns as small integer codes plus a category list.
+INVENTORY_SCHEMAS = {
+    "applications": {
+        "App_ID": "str", "Site": "category", "Name": "str", "Middleware": "str", "DB_Engine": "str",
+        "Data_Size_GB": "float64", "Num_Tiers": "int64", "VMs_Assigned": "str", "Owner_Email": "str",
+        "Priority": "int64", "Compliance": "str", "Migration_Type": "str",
+    },
+    "application_dependencies": {
+        "App_ID": "str", "Depends_On_App_ID": "str", "Dependency_Type": "str",
+    },
+    "physical_servers": {
+        "Server_ID": "str", "Site": "category", "Hostname": "str", "Model": "category",
+        "CPU_Cores": "int64", "RAM_GB": "int64", "Storage_GB": "float64", "Hypervisor": "str",
+    },
+    "virtual_machines": {
+        "VM_ID": "str", "Site": "category", "Host_Server_ID": "str", "OS": "str",
+        "CPU_Cores": "int64", "RAM_GB": "int64", "Storage_GB": "float64", "Power_State": "category",
+    },
+    "storage_volumes": {
+        "Volume_ID": "str", "Site": "category", "Array_Type": "str", "RAID_Level": "str",
+        "Total_Cap_GB": "float64", "Used_Cap_GB": "float64", "Avg_IOPS": "float64",
+        "Backup_Retention_Days": "int64", "Encrypted": "bool",
+    },
+    "network_links": {
+        "Link_ID": "str", "From": "str", "To": "str",
+        "Bandwidth_Gbps": "float64", "Latency_ms": "float64", "Packet_Loss_%": "float64",
+    },
+}
+
+# Columns a file must have to be accepted as that table
+REQUIRED_COLUMNS = {
+    "applications": ("App_ID",),
+    "application_dependencies": ("App_ID", "Depends_On_App_ID"),
+    "physical_servers": ("Server_ID",),
+    "virtual_machines": ("VM_ID",),
+    "storage_volumes": ("Volume_ID",),
+    "network_links": ("Link_ID",),
+}
+
+# Multi-valued columns normalized into link tables at build time:
+# link table -> (source table, key column, list column, value column name)
+LINK_TABLES = {
+    "application_vms": ("applications", "App_ID", "VMs_Assigned", "VM_ID"),
+}
+
+MANIFEST = "manifest.json"
+# CSV rows converted at a time; memory use is bounded by this, not by file size
+CSV_CHUNK_ROWS = int(os.getenv("INVENTORY_CSV_CHUNK_ROWS", "100000"))
+
+
+class InventorySchemaError(ValueError):
+    pass
+
+
+def table_for_filename(filename):
+    """'virtual_machines.csv' / 'virtual_machines.json' -> 'virtual_machines', or None if unknown."""
+    name = os.path.splitext(os.path.basename(filename))[0].strip().lower()
+    return name if name in INVENTORY_SCHEMAS else None
+
+
+def find_inventory_csvs(paths):
+    """Pick the known inventory tables out of a list of file paths (last one wins on duplicates)."""
+    found = {}
+    for path in paths:
+        if path.lower().endswith(".csv"):
+            table = table_for_filename(path)
+            if table:
+                found[table] = path
+    return found
+
+
+def validate_columns(table, columns):
+    missing = [c for c in REQUIRED_COLUMNS.get(table, ()) if c not in columns]
+    if missing:
+        raise InventorySchemaError(f"{table}: missing required column(s) {', '.join(missing)}")
+
+
+def _code_dtype(n_categories):
+    return np.int8 if n_categories < 2 ** 7 else np.int16 if n_categories < 2 ** 15 else np.int32
+
+
+class _ColumnWriter:
+    """
+    Accumulates one typed column chunk by chunk in temporary part files, then
+    assembles the final .npy with a memory map, so only one chunk is ever in RAM.
+    String columns become a UTF-8 byte buffer (.data.npy) plus row offsets, int64
+    columns fall back to float64 if any value is missing, and category codes are
+    renumbered so categories end up sorted.
+    """
+
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = dtype
+        self.parts = []
+        self.rows = 0
+        self.data_parts = []
+        self.data_bytes = 0
+        self.invalid = 0
+        self.has_missing = False
+        self.categories = {}
+
+    def append(self, series):
+        if self.dtype == "str":
+            encoded = [value.encode("utf-8") for value in series.fillna("").astype(str).tolist()]
+            data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+            data_part = f"{self.path}.data{len(self.data_parts)}.npy"
+            np.save(data_part, data, allow_pickle=False)
+            self.data_parts.append(data_part)
+            self.data_bytes += len(data)
+            # Part arrays hold per-row byte lengths; finish() turns them into offsets
+            array = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        elif self.dtype == "category":
+            values = series.fillna("").astype(str)
+            for value in pd.unique(values):
+                self.categories.setdefault(value, len(self.categories))
+            array = pd.Index(list(self.categories)).get_indexer(values).astype(np.int32)
+        elif self.dtype == "bool":
+            array = series.astype(str).str.strip().str.lower().isin(["true", "1", "yes"]).to_numpy()
+        else:
+            values = pd.to_numeric(series, errors="coerce")
+            self.invalid += int((values.isna() & series.notna()).sum())
+            self.has_missing = self.has_missing or bool(values.isna().any())
+            array = values.to_numpy(dtype="float64")
+        part = f"{self.path}.part{len(self.parts)}.npy"
+        np.save(part, array, allow_pickle=False)
+        self.parts.append(part)
+        self.rows += len(array)
+
+    def finish(self):
+        """Write the final column and return its manifest spec (without "name"/"file")."""
+        if self.dtype == "str":
+            return self._finish_strings()
+        spec = {}
+        if self.dtype == "category":
+            categories = sorted(self.categories)
+            # Old (first-seen) code -> position in the sorted category list
+            remap = np.argsort(np.argsort(list(self.categories), kind="stable")).astype(np.int64) \
+                if categories else np.zeros(0, dtype=np.int64)
+            dtype = np.dtype(_code_dtype(len(categories)))
+            spec["categories"] = categories
+        elif self.dtype == "bool":
+            dtype = np.dtype(bool)
+        elif self.dtype == "int64" and self.has_missing:
+            # Keep missing values visible rather than inventing zeros
+            dtype = np.dtype("float64")
+        else:
+            dtype = np.dtype(self.dtype)
+
+        out = np.lib.format.open_memmap(self.path, mode="w+", dtype=dtype, shape=(self.rows,))
+        offset = 0
+        for part in self.parts:
+            array = np.load(part)
+            if self.dtype == "category":
+                array = remap[array]
+            out[offset:offset + len(array)] = array
+            offset += len(array)
+            os.remove(part)
+        out.flush()
+        del out
+        spec["dtype"] = dtype.str
+        if self.invalid:
+            spec["invalid"] = self.invalid
+        return spec
+
+    def _finish_strings(self):
+        """Concatenate the byte parts into .data.npy and the per-row lengths into offsets."""
+        data_path = self.path[:-len(".npy")] + ".data.npy"
+        data = np.lib.format.open_memmap(data_path, mode="w+", dtype=np.uint8, shape=(self.data_bytes,))
+        offsets = np.lib.format.open_memmap(self.path, mode="w+", dtype=np.int64, shape=(self.rows + 1,))
+        offsets[0] = 0
+        row = byte = 0
+        for part, data_part in zip(self.parts, self.data_parts):
+            lengths = np.load(part)
+            chunk = np.load(data_part)
+            offsets[row + 1:row + 1 + len(lengths)] = byte + np.cumsum(lengths)
+            data[byte:byte + len(chunk)] = chunk
+            row += len(lengths)
+            byte += len(chunk)
+            os.remove(part)
+            os.remove(data_part)
+        offsets.flush()
+        data.flush()
+        del offsets, data
+        return {"dtype": "str", "data": os.path.basename(data_path)}
+
+
+class _TableWriter:
+    """Streams DataFrame chunks of one table into a directory of column files."""
+
+    def __init__(self, table_dir, columns, schema):
+        os.makedirs(table_dir, exist_ok=True)
+        self.table_dir = table_dir
+        self.columns = list(columns)
+        self.writers = [
+            _ColumnWriter(os.path.join(table_dir, f"c{i}.npy"), schema.get(name, "str"))
+            for i, name in enumerate(self.columns)
+        ]
+
+    def append(self, chunk):
+        for name, writer in zip(self.columns, self.writers):
+            writer.append(chunk[name])
+
+    def finish(self):
+        columns = []
+        for i, (name, writer) in enumerate(zip(self.columns, self.writers)):
+            columns.append({"name": name, "file": f"c{i}.npy", **writer.finish()})
+        return {"rows": self.writers[0].rows if self.writers else 0, "columns": columns}
+
+
+def _read_csv_chunks(table, csv_path, chunk_rows):
+    """(columns, chunk iterator) over a CSV read as strings, after checking the header against the schema."""
+    header = pd.read_csv(csv_path, dtype=str, nrows=0)
+    columns = [c.strip() for c in header.columns]
+    validate_columns(table, columns)
+    reader = pd.read_csv(csv_path, dtype=str, keep_default_na=False, na_values=[""], chunksize=chunk_rows)
+
+    def chunks():
+        with reader:
+            for chunk in reader:
+                chunk.columns = columns
+                yield chunk
+    return columns, chunks()
+
+
+def _link_frame(df, key, list_column, value_name):
+    """One (key, value) row per entry of a comma-joined list column."""
+    values = df[list_column].fillna("").astype(str).str.split(",")
+    links = pd.DataFrame({key: df[key], value_name: values}).explode(value_name)
+    links[value_name] = links[value_name].str.strip()
+    return links[links[value_name].fillna("") != ""].drop_duplicates().reset_index(drop=True)
+
+
+def _write_table(build_dir, table, csv_path, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Convert one inventory CSV into column files, chunk_rows at a time, plus any
+    link tables derived from it. Returns {table name: manifest entry}.
+    """
+    columns, chunks = _read_csv_chunks(table, csv_path, chunk_rows)
+    writers = {table: _TableWriter(os.path.join(build_dir, table), columns, INVENTORY_SCHEMAS[table])}
+    links = {
+        link_table: spec for link_table, spec in LINK_TABLES.items()
+        if spec[0] == table and spec[1] in columns and spec[2] in columns
+    }
+    for link_table, (_, key, _, value_name) in links.items():
+        writers[link_table] = _TableWriter(os.path.join(build_dir, link_table), [key, value_name], {})
+
+    for chunk in chunks:
+        writers[table].append(chunk)
+        for link_table, (_, key, list_column, value_name) in links.items():
+            writers[link_table].append(_link_frame(chunk, key, list_column, value_name))
+    entries = {name: writer.finish() for name, writer in writers.items()}
+    # A pair can still repeat across chunk boundaries; those go once the table is assembled
+    for link_table in links:
+        entries[link_table] = _drop_duplicate_rows(os.path.join(build_dir, link_table), entries[link_table], chunk_rows)
+    return entries
+
+
+def _drop_duplicate_rows(table_dir, entry, chunk_rows):
+    """
+    Remove repeated rows from a finished table of string columns, keeping first
+    occurrences in order. Rows are compared by value through per-column integer
+    codes (one column decoded at a time), and kept rows are rewritten chunk_rows
+    at a time. Returns the table's manifest entry.
+    """
+    names = [c["name"] for c in entry["columns"]]
+    columns = [
+        StringColumn(np.load(os.path.join(table_dir, c["file"]), mmap_mode="r"),
+                     np.load(os.path.join(table_dir, c["data"]), mmap_mode="r"))
+        for c in entry["columns"]
+    ]
+    codes = {name: pd.factorize(column.to_numpy())[0] for name, column in zip(names, columns)}
+    rows = np.flatnonzero(~pd.DataFrame(codes).duplicated().to_numpy())
+    if len(rows) == entry["rows"]:
+        return entry
+
+    deduped_dir = f"{table_dir}.dedupe"
+    writer = _TableWriter(deduped_dir, names, {})
+    for start in range(0, len(rows), chunk_rows):
+        block = rows[start:start + chunk_rows]
+        writer.append(pd.DataFrame({name: column[block] for name, column in zip(names, columns)}))
+    deduped = writer.finish()
+    del columns
+    shutil.rmtree(table_dir)
+    os.replace(deduped_dir, table_dir)
+    return deduped
+
+
+def stage_inventory(csv_paths, root=INVENTORY_FOLDER, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Convert the inventory CSVs ({table: path}) into one .npy file per column in
+    a new build directory under root, chunk_rows CSV rows at a time, and return
+    its manifest. Nothing reads the build until publish_inventory swaps it in.
+    """
+    os.makedirs(root, exist_ok=True)
+    build_id = f"build-{uuid.uuid4().hex}"
+    build_dir = os.path.join(root, build_id)
+
+    manifest = {"dir": build_id, "tables": {}, "errors": {}}
+    try:
+        for table, csv_path in csv_paths.items():
+            try:
+                manifest["tables"].update(_write_table(build_dir, table, csv_path, chunk_rows))
+            except (pd.errors.ParserError, UnicodeDecodeError, ValueError) as e:
+                # One malformed export shouldn't drop the rest of the inventory;
+                # InventorySchemaError is a ValueError too
+                manifest["errors"][table] = str(e)
+                for name in [table] + [link for link, spec in LINK_TABLES.items() if spec[0] == table]:
+                    shutil.rmtree(os.path.join(build_dir, name), ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    return manifest
+
+
+def publish_inventory(manifest, root=INVENTORY_FOLDER):
+    """
+    Make a staged build current by renaming its manifest into place, so readers
+    never see a half-written inventory. Returns the loaded store.
+
+    Only builds a manifest once named are retired, never one still being
+    staged, and the build just replaced stays on disk for one more publish:
+    stores map their columns lazily, so readers holding the previous manifest
+    keep working. Publishing holds a lock on the manifest so the hand-over of
+    the retired list is never lost to a concurrent publish.
+    """
+    manifest_path = os.path.join(root, MANIFEST)
+    with file_lock(manifest_path):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = {}
+        # Deletion can fail while a build is still mapped (Windows); it is retried next publish
+        for build_id in previous.get("retired", []):
+            if build_id != manifest["dir"]:
+                shutil.rmtree(os.path.join(root, build_id), ignore_errors=True)
+        retired = [b for b in previous.get("retired", [])
+                   if b != manifest["dir"] and os.path.isdir(os.path.join(root, b))]
+        if previous.get("dir") and previous["dir"] != manifest["dir"]:
+            retired.append(previous["dir"])
+        atomic_write_json(manifest_path, dict(manifest, retired=retired))
+    return get_inventory(root)
+
+
+def discard_inventory(manifest, root=INVENTORY_FOLDER):
+    """Drop a staged build that will not be published."""
+    shutil.rmtree(os.path.join(root, manifest["dir"]), ignore_errors=True)
+
+
+def build_inventory(csv_paths, root=INVENTORY_FOLDER, chunk_rows=CSV_CHUNK_ROWS):
+    """Stage and publish an inventory in one step; see stage_inventory."""
+    return publish_inventory(stage_inventory(csv_paths, root, chunk_rows), root)
+
+
+class StringColumn:
+    """
+    Read-only string column over two memory maps: UTF-8 bytes for every row back
+    to back, and rows + 1 offsets into them. Values are decoded on access.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            i = range(len(self))[i]
+            return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+        rows = np.arange(len(self))[i]
+        return np.array([self[int(r)] for r in rows], dtype=object)
+
+    def __iter__(self):
+        return iter(self.to_numpy())
+
+    def to_numpy(self):
+        """Every value as an object array, decoded in one pass over the buffer."""
+        raw = self.data.tobytes()
+        bounds = self.offsets.tolist()
+        values = np.empty(len(self), dtype=object)
+        values[:] = [raw[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+        return values
+
+
+class InventoryStore:
+    """Read-only, memory-mapped columnar view of an inventory built by build_inventory."""
+
+    def __init__(self, root):
+        self.root = root
+        with open(os.path.join(root, MANIFEST), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        # Stores built before versioned builds keep their tables directly under root
+        self.data_dir = os.path.join(root, self.manifest.get("dir", ""))
+        self._columns = {}
+
+    def has_table(self, table):
+        return table in self.manifest["tables"]
+
+    def tables(self):
+        return list(self.manifest["tables"])
+
+    def row_count(self, table):
+        return self.manifest["tables"][table]["rows"]
+
+    def columns(self, table):
+        return [c["name"] for c in self.manifest["tables"][table]["columns"]]
+
+    def errors(self):
+        """{table: message} for inventory files rejected by schema validation in this build."""
+        return self.manifest.get("errors", {})
+
+    def column(self, table, name):
+        """
+        Memory-mapped column; category columns come back as a pandas Categorical
+        over the mapped codes and string columns as a StringColumn.
+        """
+        key = (table, name)
+        if key not in self._columns:
+            spec = next(c for c in self.manifest["tables"][table]["columns"] if c["name"] == name)
+            array = np.load(os.path.join(self.data_dir, table, spec["file"]), mmap_mode="r")
+            if "categories" in spec:
+                array = pd.Categorical.from_codes(array, spec["categories"])
+            elif "data" in spec:
+                array = StringColumn(array, np.load(os.path.join(self.data_dir, table, spec["data"]), mmap_mode="r"))
+            self._columns[key] = array
+        return self._columns[key]
+
+    def frame(self, table, columns=None):
+        """DataFrame over the requested columns (all by default); an empty frame if the table is missing."""
+        if not self.has_table(table):
+            return pd.DataFrame(columns=columns or list(INVENTORY_SCHEMAS.get(table, {})))
+        names = columns or self.columns(table)
+        present = [n for n in names if n in self.columns(table)]
+        return pd.DataFrame({n: self._frame_column(table, n) for n in present})
+
+    def _frame_column(self, table, name):
+        column = self.column(table, name)
+        if isinstance(column, StringColumn):
+            return column.to_numpy()
+        return column if isinstance(column, pd.Categorical) else np.asarray(column)
+
+    def records(self, table):
+        """List-of-dict rows, for callers that still expect the old JSON shape."""
+        return self.frame(table).to_dict(orient="records")
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_inventory(root=INVENTORY_FOLDER):
+    """The store under root, loaded once and reloaded only when a new inventory is swapped in."""
+    manifest_path = os.path.join(root, MANIFEST)
+    try:
+        stat = os.stat(manifest_path)
+    except OSError:
+        return None
+    version = (stat.st_mtime_ns, stat.st_ino)
+    key = os.path.abspath(root)
+    with _stores_lock:
+        cached = _stores.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, InventoryStore(root))
+            _stores[key] = cached
+        return cached[1]
+
+
+class BuildArtifactCache:
+    """
+    Data derived from an inventory build (graph, layout, analyses), computed
+    once per build: kept in memory per process and saved as `filename` beside
+    the build so other workers (and restarts) load it instead of recomputing.
+    `load(path)` returns the artifact and `save(artifact, path)` writes it.
+    """
+
+    def __init__(self, filename, load, save, max_entries=16):
+        self.filename = filename
+        self._load, self._save = load, save
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, store, compute):
+        if not store.manifest.get("dir"):
+            # Stores from before versioned builds reuse one directory, so nothing can be keyed on it
+            return compute()
+        key = os.path.abspath(store.data_dir)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        path = os.path.join(store.data_dir, self.filename)
+        try:
+            artifact = self._load(path)
+        except (OSError, KeyError, ValueError):
+            artifact = compute()
+            try:
+                self._save(artifact, path)
+            except OSError:
+                pass
+
+        with self._lock:
+            self._entries[key] = artifact
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return artifact
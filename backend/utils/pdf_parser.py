@@ -1 +1,116 @@
 #pdf_parser.py
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+from utils.content_cache import get_content_cache, sha256_file
+
+PAGES_PER_TASK = 8
+# Below this many pages the process hop costs more than it saves
+MIN_PAGES_FOR_POOL = 24
+PDF_WORKERS = max(1, os.cpu_count() or 1)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: Flask serves requests from threads and fitz isn't fork-safe
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _extract_page_range(file_path, start, stop):
+    doc = fitz.open(file_path)
+    try:
+        return [doc[i].get_text() for i in range(start, stop)]
+    finally:
+        doc.close()
+
+
+def _page_count(file_path):
+    doc = fitz.open(file_path)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def _chars(pages):
+    return sum(len(p) for p in pages)
+
+
+def _extract_serial(file_path, start, page_count, pages, max_chars):
+    doc = fitz.open(file_path)
+    total = _chars(pages)
+    try:
+        for i in range(start, page_count):
+            if max_chars is not None and total >= max_chars:
+                break
+            text = doc[i].get_text()
+            pages.append(text)
+            total += len(text)
+    finally:
+        doc.close()
+    return pages
+
+
+def _extract_parallel(file_path, start, page_count, pages, max_chars):
+    """Fan page ranges out over the process pool, a window at a time, stopping once the budget is met."""
+    pool = _get_pool()
+    ranges = [(s, min(s + PAGES_PER_TASK, page_count)) for s in range(start, page_count, PAGES_PER_TASK)]
+    total = _chars(pages)
+    window = PDF_WORKERS * 2
+    for offset in range(0, len(ranges), window):
+        futures = [pool.submit(_extract_page_range, file_path, s, e) for s, e in ranges[offset:offset + window]]
+        for i, future in enumerate(futures):
+            chunk = future.result()
+            pages.extend(chunk)
+            total += _chars(chunk)
+            if max_chars is not None and total >= max_chars:
+                for pending in futures[i + 1:]:
+                    pending.cancel()
+                return pages
+    return pages
+
+
+def extract_pdf_pages(file_path, max_chars=None, digest=None):
+    """
+    Return the text of each page, in order.
+
+    With max_chars set, extraction stops as soon as the pages gathered so far hold
+    at least that many characters, so the result may be a prefix of the document.
+    Page text is cached by document hash; a later call with a bigger budget only
+    extracts the pages the cache doesn't have yet.
+    """
+    cache = get_content_cache()
+    digest = digest or sha256_file(file_path)
+    cached = cache.get(digest, "pdf-pages") or {}
+    pages = cached.get("pages", [])
+    page_count = cached.get("page_count")
+    if page_count is None:
+        page_count = _page_count(file_path)
+
+    if len(pages) >= page_count or (max_chars is not None and _chars(pages) >= max_chars):
+        return pages
+
+    before = len(pages)
+    if page_count - before >= MIN_PAGES_FOR_POOL:
+        pages = _extract_parallel(file_path, before, page_count, pages, max_chars)
+    else:
+        pages = _extract_serial(file_path, before, page_count, pages, max_chars)
+
+    if len(pages) > before:
+        cache.put(digest, "pdf-pages", {"page_count": page_count, "pages": pages})
+    return pages
+
+
+def extract_pdf_text(file_path, max_chars=None, digest=None, separator="\n"):
+    text = separator.join(extract_pdf_pages(file_path, max_chars=max_chars, digest=digest))
+    return text[:max_chars] if max_chars is not None else text
@@ -0,0 +1,152 @@
+import csv
+import re
+import threading
+
+from utils.pdf_parser import extract_pdf_pages
+from utils.sqlite_utils import connect
+from utils.summarizer import file_type
+
+ROWS_PER_CHUNK = 5
+PDF_CHUNK_CHARS = 800
+PDF_CHUNK_OVERLAP = 150
+INSERT_BATCH = 2000
+DEFAULT_TOP_K = 8
+
+
+def csv_chunks(file_path, rows_per_chunk=ROWS_PER_CHUNK):
+    """Yield (label, text) for every few rows, each row written as "column: value" pairs."""
+    with open(file_path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        lines, first = [], 2  # line numbers as a spreadsheet would show them
+        for line_no, row in enumerate(reader, start=2):
+            lines.append("; ".join(f"{col}: {val}" for col, val in zip(header, row) if val != ""))
+            if len(lines) == rows_per_chunk:
+                yield f"rows {first}-{line_no}", "\n".join(lines)
+                lines, first = [], line_no + 1
+        if lines:
+            yield f"rows {first}-{first + len(lines) - 1}", "\n".join(lines)
+
+
+def pdf_chunks(file_path, digest=None, chunk_chars=PDF_CHUNK_CHARS, overlap=PDF_CHUNK_OVERLAP):
+    """Yield (label, text) windows over each page, overlapping so clauses aren't cut in half."""
+    step = chunk_chars - overlap
+    for page_no, text in enumerate(extract_pdf_pages(file_path, digest=digest), start=1):
+        text = " ".join(text.split())
+        for start in range(0, max(len(text) - overlap, 1), step):
+            chunk = text[start:start + chunk_chars]
+            if chunk:
+                yield f"page {page_no}", chunk
+
+
+def file_chunks(file_path, digest=None):
+    ftype = file_type(file_path)
+    if ftype == "csv":
+        return csv_chunks(file_path)
+    if ftype == "pdf":
+        return pdf_chunks(file_path, digest)
+    return iter(())
+
+
+def match_query(text):
+    """Turn free text into an FTS5 OR-query of quoted terms (so punctuation can't break the syntax)."""
+    terms = dict.fromkeys(t for t in re.findall(r"\w+", text.lower()) if len(t) > 1)
+    return " OR ".join(f'"{t}"' for t in terms)
+
+
+class RetrievalIndex:
+    """
+    BM25 index over the uploaded files: CSVs in small row groups, PDFs in
+    overlapping text windows. Built once at upload time in an SQLite FTS5 table,
+    so a chat turn only ships the top-k chunks for its question instead of
+    every file's summary.
+
+    Which source a chunk belongs to lives in the ordinary chunk_sources table
+    (indexed, keyed by the chunk's rowid) with per-source totals in
+    source_counts, since filtering an FTS5 table on an UNINDEXED column scans
+    every row.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = connect(db_path)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(chunks)")]
+        if "source" in columns:
+            # Chunks from before chunk_sources existed; they are rebuilt by the next upload
+            self._conn.execute("DROP TABLE chunks")
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5("
+            " text, filename UNINDEXED, type UNINDEXED, label UNINDEXED, tokenize = 'unicode61')"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS chunk_sources (rowid INTEGER PRIMARY KEY, source TEXT NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunk_sources_source ON chunk_sources (source)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS source_counts (source TEXT PRIMARY KEY, chunks INTEGER NOT NULL)")
+        self._conn.commit()
+
+    def replace_source(self, source, files):
+        """Re-index `source` from [{"path", "filename", "digest"?}] (e.g. the upload's summaries)."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM chunks WHERE rowid IN (SELECT rowid FROM chunk_sources WHERE source = ?)", (source,)
+            )
+            self._conn.execute("DELETE FROM chunk_sources WHERE source = ?", (source,))
+            next_rowid = self._conn.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM chunk_sources").fetchone()[0]
+            first_rowid, batch = next_rowid, []
+            for f in files:
+                try:
+                    chunks = file_chunks(f["path"], f.get("digest"))
+                    for label, text in chunks:
+                        batch.append((next_rowid + len(batch), text, f["filename"], file_type(f["filename"]), label))
+                        if len(batch) >= INSERT_BATCH:
+                            self._insert(batch, source)
+                            next_rowid += len(batch)
+                            batch = []
+                except Exception as e:
+                    print(f"⚠️ Could not index {f['filename']}: {e}")
+            self._insert(batch, source)
+            total = next_rowid + len(batch) - first_rowid
+            self._conn.execute("INSERT OR REPLACE INTO source_counts (source, chunks) VALUES (?, ?)", (source, total))
+            self._conn.commit()
+
+    def _insert(self, batch, source):
+        if batch:
+            self._conn.executemany(
+                "INSERT INTO chunks (rowid, text, filename, type, label) VALUES (?, ?, ?, ?, ?)", batch
+            )
+            self._conn.executemany(
+                "INSERT INTO chunk_sources (rowid, source) VALUES (?, ?)", [(row[0], source) for row in batch]
+            )
+
+    def count(self, source=None):
+        with self._lock:
+            if source is None:
+                return self._conn.execute("SELECT COALESCE(SUM(chunks), 0) FROM source_counts").fetchone()[0]
+            row = self._conn.execute("SELECT chunks FROM source_counts WHERE source = ?", (source,)).fetchone()
+            return row[0] if row else 0
+
+    def search(self, query, k=DEFAULT_TOP_K, filenames=None, source=None):
+        """Top-k chunks by BM25: [{"filename", "type", "label", "content", "score"}], best first."""
+        match = match_query(query)
+        if not match:
+            return []
+        sql = "SELECT filename, type, label, text, bm25(chunks) AS score FROM chunks WHERE chunks MATCH ?"
+        params = [match]
+        if source is not None:
+            sql += " AND rowid IN (SELECT rowid FROM chunk_sources WHERE source = ?)"
+            params.append(source)
+        if filenames:
+            names = [name.lower() for name in filenames]
+            sql += f" AND lower(filename) IN ({', '.join('?' * len(names))})"
+            params.extend(names)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(k)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        # FTS5's bm25() is lower-is-better; flip it so callers see a conventional score
+        return [
+            {"filename": filename, "type": ftype, "label": label, "content": text, "score": -score}
+            for filename, ftype, label, text, score in rows
+        ]
@@ -0,0 +1,10 @@
+import os
+import sqlite3
+
+
+def connect(db_path):
+    """Open a SQLite file shared between Flask threads (callers serialize access with their own lock)."""
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
@@ -0,0 +1,141 @@
+import csv
+import io
+import os
+
+from utils.content_cache import file_fingerprint, get_content_cache
+from utils.pdf_parser import extract_pdf_text
+
+SUPPORTED_TYPES = ("csv", "json", "pdf")
+
+# Summary modes: "budget" profiles tabular files, "prefix" is the raw first max_chars
+SUMMARY_MODES = ("budget", "prefix")
+CSV_SAMPLE_BYTES = 64 * 1024
+HEAD_ROWS = 3
+SPREAD_ROWS = 3
+TOP_VALUES = 3
+
+
+def file_type(filename):
+    return filename.lower().split(".")[-1]
+
+
+def _read_prefix(file_path, max_chars):
+    # Never reads more than the budget, however large the file is
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read(max_chars)
+
+
+def _spread_rows(f, size, count):
+    """Grab single lines from evenly spaced offsets so the sample isn't just the head of the file."""
+    rows = []
+    for i in range(1, count + 1):
+        f.seek(size * i // (count + 1))
+        f.readline()  # finish the partial line we landed in
+        line = f.readline()
+        if line.strip():
+            rows.append(line.decode("utf-8", errors="replace").rstrip("\r\n"))
+    return rows
+
+
+def _column_stats(name, values):
+    filled = [v for v in values if v != ""]
+    empty = len(values) - len(filled)
+    try:
+        numbers = [float(v) for v in filled]
+    except ValueError:
+        numbers = None
+
+    if numbers:
+        mean = sum(numbers) / len(numbers)
+        return f"- {name}: numeric, min {min(numbers):g}, max {max(numbers):g}, mean {mean:.4g}, {empty} empty"
+
+    counts = {}
+    for v in filled:
+        counts[v] = counts.get(v, 0) + 1
+    top = sorted(counts.items(), key=lambda kv: -kv[1])[:TOP_VALUES]
+    examples = ", ".join(f"{v} ({n})" for v, n in top)
+    return f"- {name}: text, {len(counts)} distinct, top {examples}, {empty} empty"
+
+
+def summarize_table(file_path, max_chars, sample_bytes=CSV_SAMPLE_BYTES):
+    """
+    Fixed-size profile of a CSV: header, row count, per-column stats and sample rows.
+
+    Reads at most sample_bytes from the front of the file (plus a few single lines
+    from further in), so the cost is O(budget) rather than O(file size). When the
+    file is bigger than the sample, the row count is estimated from the average
+    row width and the stats describe the sampled rows.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        raw = f.read(sample_bytes)
+        complete = f.tell() >= size
+        spread = [] if complete else _spread_rows(f, size, SPREAD_ROWS)
+
+    text = raw.decode("utf-8", errors="replace")
+    if not complete:
+        text = text[:text.rfind("\n") + 1]  # drop the partial trailing row
+    rows = list(csv.reader(io.StringIO(text)))
+    if not rows:
+        return ""
+    header, body = rows[0], [r for r in rows[1:] if r]
+
+    if complete:
+        row_line = f"rows: {len(body)}"
+    else:
+        sampled_bytes = len(text.encode("utf-8"))
+        estimate = int(len(body) * size / sampled_bytes) if sampled_bytes else 0
+        row_line = f"rows: ~{estimate} (estimated from the first {sampled_bytes} bytes)"
+
+    lines = [
+        f"columns ({len(header)}): {', '.join(header)}",
+        row_line,
+        f"column stats (over {len(body)} {'rows' if complete else 'sampled rows'}):",
+    ]
+    for i, name in enumerate(header):
+        lines.append(_column_stats(name, [r[i] if i < len(r) else "" for r in body]))
+
+    lines.append("sample rows:")
+    lines.append(",".join(header))
+    head = text.splitlines()[1:HEAD_ROWS + 1]
+    lines.extend(head + spread)
+    return "\n".join(lines)[:max_chars]
+
+
+def _read_summary_content(file_path, ext, max_chars, digest, mode):
+    if ext == "csv" and mode == "budget":
+        return summarize_table(file_path, max_chars)
+    if ext in ["csv", "json"]:
+        return _read_prefix(file_path, max_chars)
+
+    return extract_pdf_text(file_path, max_chars=max_chars, digest=digest)
+
+
+def summarize_file(file_path, filename=None, max_chars=2500, digest=None, mode="budget"):
+    """
+    Return a {"filename", "type", "content"} summary, or None if the type isn't supported.
+
+    Only as much of the file as the max_chars budget needs is read: CSVs get a
+    sampled profile (see summarize_table), JSON a streamed prefix and PDFs stop
+    extracting pages once the budget is met. mode="prefix" keeps the old raw
+    prefix for CSVs too.
+
+    Summaries are looked up in the content cache by `digest`: callers that hash
+    the bytes anyway (ZIP ingest) pass the SHA-256, so the same file uploaded
+    again under any name is never parsed twice. Without it the key is the file's
+    path, size and mtime, so summarizing never reads more than the budget.
+    """
+    filename = filename or os.path.basename(file_path)
+    ext = file_type(filename)
+    if ext not in SUPPORTED_TYPES:
+        return None
+    try:
+        digest = digest or file_fingerprint(file_path)
+        content = get_content_cache().get_or_compute(
+            digest,
+            f"summary:{ext}:{mode}:{max_chars}",
+            lambda: _read_summary_content(file_path, ext, max_chars, digest, mode),
+        )
+        return {"filename": filename, "type": ext, "content": content}
+    except Exception as e:
+        return {"filename": filename, "type": ext, "content": f"[Error reading file: {str(e)}]"}
@@ -0,0 +1,137 @@
+import os
+import threading
+
+from utils.sqlite_utils import connect
+
+
+class SummaryIndex:
+    """
+    On-disk index of per-file summaries, replacing the single JSON summary blob.
+
+    Each row is one file, keyed by its path and tagged with a `source` ("upload",
+    "app_files", ...). Rows record the mtime and size the summary was built from,
+    so a folder refresh only re-summarizes files that actually changed, and
+    readers fetch content one file at a time instead of loading the whole corpus.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = connect(db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " path TEXT PRIMARY KEY, source TEXT NOT NULL, filename TEXT NOT NULL, type TEXT NOT NULL,"
+            " mtime REAL NOT NULL, size INTEGER NOT NULL, content TEXT NOT NULL,"
+            " seq INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_source ON summaries (source, seq)")
+        self._conn.commit()
+
+    # --- writes ---
+
+    def _upsert(self, source, path, summary, seq):
+        try:
+            stat = os.stat(path)
+            mtime, size = stat.st_mtime, stat.st_size
+        except OSError:
+            # e.g. a member that failed to extract; keep its error summary anyway
+            mtime, size = 0, 0
+        self._conn.execute(
+            "INSERT OR REPLACE INTO summaries (path, source, filename, type, mtime, size, content, seq)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, source, summary["filename"], summary["type"], mtime, size, summary["content"], seq),
+        )
+
+    def upsert(self, source, path, summary):
+        with self._lock:
+            seq = self._conn.execute("SELECT COALESCE(MAX(seq), -1) + 1 FROM summaries").fetchone()[0]
+            self._upsert(source, path, summary, seq)
+            self._conn.commit()
+
+    def invalidate(self, path):
+        with self._lock:
+            self._conn.execute("DELETE FROM summaries WHERE path = ?", (path,))
+            self._conn.commit()
+
+    def replace_source(self, source, summaries):
+        """Atomically swap every row of `source` for the given summaries (each must carry a "path")."""
+        with self._lock:
+            self._conn.execute("DELETE FROM summaries WHERE source = ?", (source,))
+            for seq, summary in enumerate(summaries):
+                self._upsert(source, summary["path"], summary, seq)
+            self._conn.commit()
+
+    def refresh_folder(self, source, directory, summarize):
+        """
+        Bring `source` in line with the files under `directory`: summarize new or
+        changed files (by mtime and size), keep unchanged rows, drop deleted files.
+        `summarize(path, filename)` returns a summary dict or None to skip the file.
+        """
+        with self._lock:
+            known = {
+                path: (mtime, size)
+                for path, mtime, size in self._conn.execute(
+                    "SELECT path, mtime, size FROM summaries WHERE source = ?", (source,)
+                )
+            }
+
+        seen = set()
+        seq = 0
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                seq += 1
+                if known.get(path) == (stat.st_mtime, stat.st_size):
+                    seen.add(path)
+                    continue
+                summary = summarize(path, filename)
+                if summary:
+                    seen.add(path)
+                    with self._lock:
+                        self._upsert(source, path, summary, seq)
+                        self._conn.commit()
+
+        stale = [path for path in known if path not in seen]
+        if stale:
+            with self._lock:
+                self._conn.executemany("DELETE FROM summaries WHERE path = ?", [(p,) for p in stale])
+                self._conn.commit()
+
+    # --- reads ---
+
+    def count(self, source=None):
+        with self._lock:
+            if source is None:
+                return self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM summaries WHERE source = ?", (source,)).fetchone()[0]
+
+    def list_files(self, source=None):
+        """Metadata only: [{"path", "filename", "type"}] in upload/walk order."""
+        query = "SELECT path, filename, type FROM summaries"
+        params = ()
+        if source is not None:
+            query += " WHERE source = ?"
+            params = (source,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY source, seq", params).fetchall()
+        return [{"path": path, "filename": filename, "type": ftype} for path, filename, ftype in rows]
+
+    def get_content(self, path):
+        with self._lock:
+            row = self._conn.execute("SELECT content FROM summaries WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def iter_summaries(self, source=None, filenames=None):
+        """Yield {"filename", "type", "content"} one file at a time, optionally limited to `filenames`."""
+        wanted = {name.lower() for name in filenames} if filenames else None
+        for entry in self.list_files(source):
+            if wanted is not None and entry["filename"].lower() not in wanted:
+                continue
+            content = self.get_content(entry["path"])
+            if content is not None:
+                yield {"filename": entry["filename"], "type": entry["type"], "content": content}
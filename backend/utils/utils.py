@@ -3,7 +3,9 @@ import shutil
 import zipfile
 import pandas as pd
 import json
-import fitz  # PyMuPDF
+
+from utils.content_cache import get_content_cache, sha256_file
+from utils.pdf_parser import extract_pdf_text
 
 UPLOAD_DIR = "temp_uploads"
 OUTPUT_DIR = "app_files"
@@ -19,6 +21,10 @@ def list_app_files():
     except Exception as e:
         return [f"[Error listing files]: {e}"]
 
+def csv_to_json_text(path):
+    df = pd.read_csv(path)
+    return json.dumps(df.to_dict(orient="records"), indent=2)
+
 
 async def extract_and_convert_zip(file):
     clear_and_create_folder(UPLOAD_DIR)
@@ -35,18 +41,18 @@ async def extract_and_convert_zip(file):
             # CSV → JSON
             if ext.lower() == ".csv":
                 try:
-                    df = pd.read_csv(full_path)
-                    json_data = df.to_dict(orient="records")
+                    json_text = get_content_cache().get_or_compute(
+                        sha256_file(full_path), "records-json", lambda: csv_to_json_text(full_path)
+                    )
                     with open(os.path.join(OUTPUT_DIR, f"{filename_no_ext}.json"), "w") as out:
-                        json.dump(json_data, out, indent=2)
+                        out.write(json_text)
                 except Exception as e:
                     print(f"Error converting {name} to JSON: {e}")
 
             # PDF → TXT
             elif ext.lower() == ".pdf":
                 try:
-                    doc = fitz.open(full_path)
-                    text = "\n".join(page.get_text() for page in doc)
+                    text = extract_pdf_text(full_path)
                     with open(os.path.join(OUTPUT_DIR, f"{filename_no_ext}.txt"), "w", encoding="utf-8") as out:
                         out.write(text)
                 except Exception as e:
@@ -14,6 +14,11 @@ import "bootstrap/dist/css/bootstrap.min.css";
 import "bootstrap-icons/font/bootstrap-icons.css";
 import "./App.css";
 
+// Each browser session gets its own dataset on the backend, so concurrent users don't see each other's uploads
+const DATASET_ID = sessionStorage.getItem("datasetId") || crypto.randomUUID().replace(/-/g, "");
+sessionStorage.setItem("datasetId", DATASET_ID);
+axios.defaults.headers.common["X-Dataset-Id"] = DATASET_ID;
+
 function App() {
   const [prompt, setPrompt] = useState("");
   const [uploadMessage, setUploadMessage] = useState("");
@@ -78,7 +83,7 @@ function App() {
         );
       } else {
         response = await axios.post(`http://localhost:5000/${endpoint}`, {}, {
-          headers: { "Content-Type": "application/json" },
+          headers: { "Content-Type": "application/json", "X-Dataset-Id": DATASET_ID },
         });
       }
       const contentType = response.headers["content-type"];
@@ -95,12 +100,49 @@ function App() {
     }
   };
 
+  // Reads server-sent events from a streaming POST, calling onEvent(name, data) for each one
+  const readEventStream = async (url, body, onEvent) => {
+    const response = await fetch(url, {
+      method: "POST",
+      headers: { "Content-Type": "application/json", "X-Dataset-Id": DATASET_ID },
+      body: JSON.stringify(body),
+    });
+    if (!response.ok || !response.body) throw new Error(`Request failed: ${response.status}`);
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let end;
+      while ((end = buffer.indexOf("\n\n")) !== -1) {
+        const block = buffer.slice(0, end);
+        buffer = buffer.slice(end + 2);
+        const event = block.match(/^event: (.*)$/m);
+        const data = block.match(/^data: (.*)$/m);
+        if (event && data) onEvent(event[1], JSON.parse(data[1]));
+      }
+    }
+  };
+
   const submitPrompt = async () => {
     setHasInteracted(true);
     try {
       setLoading(true);
-      const response = await axios.post("http://localhost:5000/analyze/prompt", { prompt });
-      setResults(response.data.result);
+      // Tokens are shown as they arrive instead of after the whole reply is generated
+      let text = "";
+      await readEventStream("http://localhost:5000/analyze/prompt/stream", { prompt }, (event, data) => {
+        if (event === "delta") {
+          text += data.text;
+          setResults(text);
+          setLoading(false);
+        } else if (event === "done") {
+          setResults(data.response);
+        } else if (event === "error") {
+          throw new Error(data.error);
+        }
+      });
     } catch {
       setResults(null);
     } finally {
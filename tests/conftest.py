@@ -0,0 +1,217 @@
+import glob
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# Backend modules import each other as top-level packages (config, agents, utils)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+# Keep persistent caches out of the working tree
+os.environ.setdefault("CACHE_FOLDER", tempfile.mkdtemp(prefix="skybridge-cache-"))
+os.environ.setdefault("DATASETS_FOLDER", tempfile.mkdtemp(prefix="skybridge-datasets-"))
+
+SAMPLE_DATA = os.path.join(os.path.dirname(__file__), "..", "sample_data")
+ONE_DEPENDENCY_CSV = "App_ID,Depends_On_App_ID,Dependency_Type\nVA-APP001,VA-APP002,calls\n"
+
+
+class FoundryStub:
+    """
+    Minimal in-process stand-in for the Foundry agents REST API: agents, threads,
+    messages and runs that finish immediately. `reply` decides the assistant's
+    answer from the latest user message and `run_status` how runs end;
+    `requests` records every call.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.threads = {}
+        self.reply = lambda prompt: f"echo: {prompt}"
+        self.run_status = "completed"
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def next_id(self, prefix):
+        with self._lock:
+            self._ids += 1
+            return f"{prefix}_{self._ids}"
+
+    def message(self, thread_id, role, text):
+        return {
+            "id": self.next_id("msg"), "object": "thread.message", "created_at": self._ids,
+            "thread_id": thread_id, "status": "completed", "role": role,
+            "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+            "attachments": [], "metadata": {}, "assistant_id": None, "run_id": None,
+        }
+
+    def stream_events(self, thread_id, reply):
+        # One message delta per word, then the terminal run/done events
+        words = reply.split(" ")
+        events = [
+            ("thread.message.delta", {"id": "msg_stream", "object": "thread.message.delta", "delta": {
+                "role": "assistant",
+                "content": [{"index": 0, "type": "text", "text": {"value": w if i == 0 else " " + w}}],
+            }})
+            for i, w in enumerate(words)
+        ]
+        events.append((f"thread.run.{self.run_status}", {"id": "run_stream", "object": "thread.run",
+                                                          "thread_id": thread_id, "status": self.run_status}))
+        events.append(("done", "[DONE]"))
+        return events
+
+    def handle(self, method, path, query, body):
+        self.requests.append((method, path))
+        if m := re.search(r"/assistants/([^/]+)$", path):
+            return {"id": m.group(1), "object": "assistant", "created_at": 0, "name": "stub", "model": "stub",
+                    "instructions": "", "tools": [], "metadata": {}}
+        if method == "POST" and path.endswith("/threads"):
+            thread_id = self.next_id("thread")
+            self.threads[thread_id] = []
+            return {"id": thread_id, "object": "thread", "created_at": 0, "metadata": {}}
+        if m := re.search(r"/threads/([^/]+)/messages$", path):
+            messages = self.threads.setdefault(m.group(1), [])
+            if method == "POST":
+                messages.append(self.message(m.group(1), body.get("role", "user"), body.get("content", "")))
+                return messages[-1]
+            ordered = list(reversed(messages)) if query.get("order") == ["desc"] else list(messages)
+            if "limit" in query:
+                ordered = ordered[:int(query["limit"][0])]
+            return {"object": "list", "data": ordered, "first_id": None, "last_id": None, "has_more": False}
+        if m := re.search(r"/threads/([^/]+)/runs(?:/([^/]+))?(/cancel)?$", path):
+            thread_id = m.group(1)
+            if method == "POST" and not m.group(2):
+                prompts = [msg for msg in self.threads.get(thread_id, []) if msg["role"] == "user"]
+                prompt = prompts[-1]["content"][0]["text"]["value"] if prompts else ""
+                reply = self.reply(prompt)
+                if self.run_status == "completed":
+                    self.threads.setdefault(thread_id, []).append(self.message(thread_id, "assistant", reply))
+                if body.get("stream"):
+                    return {"__sse__": self.stream_events(thread_id, reply)}
+            return {"id": m.group(2) or self.next_id("run"), "object": "thread.run", "created_at": 0,
+                    "thread_id": thread_id, "assistant_id": "stub",
+                    "status": "cancelled" if m.group(3) else self.run_status, "instructions": "",
+                    "tools": [], "metadata": {}, "parallel_tool_calls": False}
+        if m := re.search(r"/threads/([^/]+)$", path):
+            if m.group(1) not in self.threads:
+                return None
+            return {"id": m.group(1), "object": "thread", "created_at": 0, "metadata": {}}
+        return None
+
+
+@pytest.fixture
+def foundry_stub(monkeypatch, tmp_path):
+    """Point agents.foundry_client at a local stub server for the duration of a test."""
+    from azure.core.credentials import AccessToken
+    from azure.core.pipeline.policies import SansIOHTTPPolicy
+    from agents import foundry_client, response_cache
+
+    stub = FoundryStub()
+    # Replies from earlier tests must not be replayed against this stub
+    monkeypatch.setattr(response_cache, "_shared_cache", response_cache.ResponseCache(str(tmp_path / "responses.sqlite3")))
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _serve(self):
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+            payload = stub.handle(self.command, url.path, parse_qs(url.query), body)
+            if payload and "__sse__" in payload:
+                data = "".join(
+                    f"event: {event}\ndata: {value if isinstance(value, str) else json.dumps(value)}\n\n"
+                    for event, value in payload["__sse__"]
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            data = json.dumps(payload or {"error": {"message": "not found"}}).encode()
+            self.send_response(200 if payload is not None else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_DELETE = _serve
+
+        def log_message(self, *args):
+            pass
+
+    class StaticCredential:
+        def get_token(self, *scopes, **kwargs):
+            return AccessToken("stub-token", 2 ** 40)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    foundry_client.configure(
+        f"http://127.0.0.1:{server.server_port}/api/projects/stub",
+        StaticCredential(),
+        authentication_policy=SansIOHTTPPolicy(),
+    )
+    try:
+        yield stub
+    finally:
+        foundry_client.configure()
+        server.shutdown()
+
+
+@pytest.fixture
+def client(foundry_stub, monkeypatch, tmp_path):
+    """Flask test client for backend/app.py, run from tmp_path against the Foundry stub."""
+    monkeypatch.chdir(tmp_path)
+    import app as app_module
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def upload(client):
+    """
+    upload(dataset_id, files=None) POSTs a ZIP of {name: CSV text} (by default a
+    one-row application_dependencies.csv) to /upload and returns the headers
+    that select that dataset.
+    """
+    def post(dataset_id, files=None):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            for name, text in (files or {"application_dependencies.csv": ONE_DEPENDENCY_CSV}).items():
+                zf.writestr(name, text)
+        archive.seek(0)
+        headers = {"X-Dataset-Id": dataset_id}
+        client.post("/upload", data={"files": (archive, "inventory.zip")}, content_type="multipart/form-data",
+                        headers=headers)
+        return headers
+
+    return post
+
+
+@pytest.fixture
+def sample_inventory(tmp_path):
+    """The sample_data/ CSVs built into an inventory store under tmp_path."""
+    from utils.inventory import build_inventory, find_inventory_csvs
+
+    csvs = find_inventory_csvs(glob.glob(os.path.join(SAMPLE_DATA, "*.csv")))
+    return build_inventory(csvs, str(tmp_path / "sample_inventory"))
+
+
+@pytest.fixture
+def make_graph():
+    """make_graph(edges, apps=()) builds a DependencyGraph from (App_ID, Depends_On_App_ID, Dependency_Type) rows."""
+    import pandas as pd
+    from agents.dependency_graph import DependencyGraph
+
+    def make(edges, apps=()):
+        deps = pd.DataFrame(edges, columns=["App_ID", "Depends_On_App_ID", "Dependency_Type"])
+        return DependencyGraph.from_frames(pd.DataFrame({"App_ID": list(apps)}), deps)
+
+    return make
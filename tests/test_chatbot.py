@@ -0,0 +1,63 @@
+import os
+
+from agents import agent_chatbot
+from agents.agent_chatbot import run_chatbot_agent
+
+SUMMARIES = [{"filename": "applications.csv", "type": "csv", "content": "columns (13): App_ID, Site"}]
+
+
+def user_messages(stub, thread_id):
+    return [m["content"][0]["text"]["value"] for m in stub.threads[thread_id] if m["role"] == "user"]
+
+
+def test_summaries_are_sent_once_per_dataset(foundry_stub, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    assert run_chatbot_agent("How many apps?", SUMMARIES) == "echo: How many apps?"
+    assert run_chatbot_agent("Which site?", SUMMARIES) == "echo: Which site?"
+
+    thread_id = agent_chatbot.load_state()["thread_id"]
+    messages = user_messages(foundry_stub, thread_id)
+    assert len(messages) == 3
+    assert "App_ID, Site" in messages[0]
+    assert messages[1:] == ["How many apps?", "Which site?"]
+
+    # New data opens a fresh thread without the old conversation
+    run_chatbot_agent("And now?", [{**SUMMARIES[0], "content": "columns (2): App_ID, Site"}])
+    state = agent_chatbot.load_state()
+    assert state["thread_id"] != thread_id
+    assert [turn["user"] for turn in state["memory"]] == ["And now?"]
+
+
+def test_long_conversations_roll_into_memory(foundry_stub, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(agent_chatbot, "MAX_TURNS_PER_THREAD", 2)
+    for i in range(3):
+        run_chatbot_agent(f"question {i}", SUMMARIES)
+
+    state = agent_chatbot.load_state()
+    seed = user_messages(foundry_stub, state["thread_id"])[0]
+    assert "App_ID, Site" in seed
+    assert "User: question 1" in seed and "Assistant: echo: question 1" in seed
+    assert state["turns"] == 1
+
+
+def test_turns_are_serialized_across_processes(tmp_path):
+    import subprocess
+    import sys
+    import time
+
+    path = str(tmp_path / "chatbot_thread.json")
+    holder = subprocess.Popen(
+        [sys.executable, "-c",
+         "import sys, time; from utils.fs_utils import file_lock\n"
+         f"with file_lock({path!r}):\n    print('locked', flush=True)\n    time.sleep(0.5)"],
+        cwd=os.path.join(os.path.dirname(__file__), "..", "backend"), stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        start = time.monotonic()
+        with agent_chatbot._state_lock(path):
+            waited = time.monotonic() - start
+    finally:
+        holder.wait()
+    assert waited > 0.2
@@ -0,0 +1,71 @@
+import json
+import os
+
+from agents.cluster_analysis import ANALYSIS_FILE, analyze_clusters, app_vm_links, get_cluster_analysis, plan_context
+from utils.inventory import build_inventory
+
+
+def _store(tmp_path):
+    files = {
+        "applications": "App_ID,Site,Data_Size_GB,VMs_Assigned,Priority\n"
+                        'VA-A,VA,1000,"VA-VM1, VA-VM2",1\nVA-B,VA,1000,VA-VM3,2\nVA-C,VA,1000,VA-VM4,3\n'
+                        "VA-D,VA,10,VA-VM5,3\nAZ-X,AZ,500,AZ-VM1,2\n",
+        "application_dependencies": "App_ID,Depends_On_App_ID,Dependency_Type\n"
+                                    "VA-A,VA-B,streams_to\nVA-B,VA-C,streams_to\nVA-C,VA-A,streams_to\n"
+                                    "VA-D,VA-A,calls\nVA-A,AZ-X,reads_from\n",
+        "virtual_machines": "VM_ID,Host_Server_ID\nVA-VM1,VA-SRV1\nVA-VM2,VA-SRV1\nVA-VM3,VA-SRV1\n"
+                            "VA-VM4,VA-SRV1\nVA-VM5,VA-SRV2\nAZ-VM1,AZ-SRV1\n",
+        "network_links": "Link_ID,From,To,Bandwidth_Gbps,Latency_ms,Packet_Loss_%\nVA-AZ,VA,AZ,10,3.0,0.02\n",
+    }
+    paths = {}
+    for table, text in files.items():
+        path = tmp_path / f"{table}.csv"
+        path.write_text(text)
+        paths[table] = str(path)
+    return build_inventory(paths, str(tmp_path / "inventory"))
+
+
+def test_clusters_flows_and_hotspots(tmp_path):
+    store = _store(tmp_path)
+    assert app_vm_links(store).groupby("App_ID").size().to_dict() == {"AZ-X": 1, "VA-A": 2, "VA-B": 1, "VA-C": 1, "VA-D": 1}
+
+    analysis = analyze_clusters(store)
+    top = analysis["clusters"][0]
+    assert {"VA-A", "VA-B", "VA-C"} <= set(top["apps"])
+    assert top["flow_gb_per_day"] >= 300 and top["priority"] == 1 and top["servers"] >= 1
+    assert analysis["cross_site"] == [{"from_site": "VA", "to_site": "AZ", "dependencies": 1, "flow_gb_per_day": 25.0,
+                                       "bandwidth_gbps": 10.0, "latency_ms": 3.0}]
+    assert analysis["hotspots"][0]["server"] == "VA-SRV1"
+    assert analysis["hotspots"][0]["high_traffic_apps"] == ["VA-A", "VA-B", "VA-C"]
+
+    compact = json.loads(plan_context(analysis, max_clusters=0))
+    assert compact["clusters"] == [] and compact["other_clusters"] == {"count": len(analysis["clusters"]), "apps": 5}
+
+
+def test_plan_context_keeps_only_the_busiest_apps(tmp_path):
+    analysis = analyze_clusters(_store(tmp_path))
+    top = analysis["clusters"][0]
+    assert top["app_count"] == len(top["apps"]) >= 4
+
+    compact = json.loads(plan_context(analysis, max_apps=2))
+    assert compact["clusters"][0]["apps"] == top["apps"][:2]
+    assert compact["clusters"][0]["app_count"] == top["app_count"]
+    # VA-D only calls VA-A, so it carries the least traffic
+    assert "VA-D" not in compact["clusters"][0]["apps"]
+
+
+def test_analysis_is_saved_beside_the_build(tmp_path):
+    store = _store(tmp_path)
+    analysis = get_cluster_analysis(store)
+    assert get_cluster_analysis(store) is analysis
+    with open(os.path.join(store.data_dir, ANALYSIS_FILE), encoding="utf-8") as f:
+        assert json.load(f) == analysis
+
+
+def test_plan_prompt_carries_the_analysis(client, upload):
+    import app as app_module
+    headers = upload("clusters")
+
+    assert client.get("/analyze/clusters", headers=headers).get_json()["clusters"][0]["apps"] == ["VA-APP001", "VA-APP002"]
+    prompt = app_module.plan_prompt("Plan it.", app_module.get_dataset("clusters"))
+    assert prompt.startswith("Plan it.") and '"clusters":[{"cluster":1' in prompt
@@ -0,0 +1,28 @@
+from utils.content_cache import ContentCache
+
+
+def test_cache_roundtrip_and_persistence(tmp_path):
+    db = str(tmp_path / "cache.sqlite3")
+    ContentCache(db).put("abc", "summary:csv:10", "App_ID,Sit")
+    assert ContentCache(db).get("abc", "summary:csv:10") == "App_ID,Sit"
+    assert ContentCache(db).get("abc", "pdf-text") is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache.sqlite3"), max_bytes=30)
+    cache.put("a", "k", "x" * 10)
+    cache.put("b", "k", "y" * 10)
+    cache.get("a", "k")
+    cache.put("c", "k", "z" * 10)
+    assert cache.get("b", "k") is None
+    assert cache.get("a", "k") == "x" * 10
+    assert cache.total_bytes() <= 30
+
+
+def test_get_or_compute_only_computes_once(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache.sqlite3"))
+    calls = []
+    compute = lambda: calls.append(1) or {"rows": 3}
+    assert cache.get_or_compute("d", "k", compute) == {"rows": 3}
+    assert cache.get_or_compute("d", "k", compute) == {"rows": 3}
+    assert len(calls) == 1
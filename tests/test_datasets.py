@@ -0,0 +1,125 @@
+import io
+import os
+import zipfile
+
+import pytest
+from utils.datasets import Dataset, InvalidDatasetId, get_dataset
+
+
+def make_zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    buf.seek(0)
+    return buf
+
+
+def test_dataset_ids_are_validated(tmp_path):
+    with pytest.raises(InvalidDatasetId):
+        Dataset("../etc", str(tmp_path))
+    assert get_dataset("a1", str(tmp_path)) is get_dataset("a1", str(tmp_path))
+    assert get_dataset(None, str(tmp_path)).id == "default"
+
+
+def test_uploads_are_isolated_per_dataset(foundry_stub, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    import app as app_module
+    client = app_module.app.test_client()
+
+    for dataset_id, site in (("alice", "VA"), ("bob", "AZ")):
+        archive = make_zip({"inv/applications.csv": f"App_ID,Site\n{site}-APP001,{site}\n"})
+        response = client.post("/upload", data={"files": (archive, "inv.zip")},
+                               content_type="multipart/form-data", headers={"X-Dataset-Id": dataset_id})
+        assert response.get_json()["dataset_id"] == dataset_id
+
+    alice, bob = get_dataset("alice"), get_dataset("bob")
+    assert alice.version and bob.version and alice.version != bob.version
+    assert list(alice.inventory().column("applications", "Site")) == ["VA"]
+    assert list(bob.inventory().column("applications", "Site")) == ["AZ"]
+    assert bob.retrieval_index.search("VA") == []
+
+    # A re-upload replaces the previous extraction, indexes and inventory
+    client.post("/upload", data={"files": (make_zip({"notes.csv": "x\n1\n"}), "again.zip")},
+                content_type="multipart/form-data", headers={"X-Dataset-Id": "alice"})
+    assert [f["filename"] for f in alice.summary_index.list_files("upload")] == ["notes.csv"]
+    assert alice.inventory() is None
+    assert len(os.listdir(alice.uploads_dir)) == 1
+
+    assert client.post("/analyze/prompt", json={"prompt": "hi"}, headers={"X-Dataset-Id": "../x"}).status_code == 400
+    # An empty dataset has nothing to chat about
+    assert client.post("/analyze/prompt", json={"prompt": "hi", "dataset": "nobody"}).status_code == 400
+
+
+def _commit(dataset, files):
+    upload_dir = dataset.new_upload_dir()
+    summaries = []
+    for name, text in files.items():
+        path = os.path.join(upload_dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        summaries.append({"filename": name, "type": "csv", "content": text, "path": path})
+    return dataset.commit_upload(upload_dir, summaries)
+
+
+def test_failed_commit_leaves_previous_upload_current(monkeypatch, tmp_path):
+    import utils.datasets as datasets
+
+    dataset = Dataset("d1", str(tmp_path))
+    version = _commit(dataset, {"applications.csv": "App_ID,Site\nVA-APP001,VA\n"})
+    store = dataset.inventory()
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    for target, name in ((datasets, "stage_inventory"), (dataset.retrieval_index, "replace_source")):
+        with monkeypatch.context() as m:
+            m.setattr(target, name, fail)
+            with pytest.raises(OSError):
+                _commit(dataset, {"applications.csv": "App_ID,Site\nAZ-APP001,AZ\n"})
+        assert dataset.version == version
+        assert dataset.inventory() is store
+        assert list(store.column("applications", "Site")) == ["VA"]
+        assert dataset.summary_index.list_files("upload")[0]["path"].startswith(dataset.uploads_dir)
+        assert os.path.exists(dataset.summary_index.list_files("upload")[0]["path"])
+        assert dataset.retrieval_index.search("AZ") == []
+        assert len(os.listdir(dataset.uploads_dir)) == 1
+        assert [d for d in os.listdir(dataset.inventory_dir) if d.startswith("build-")] == [store.manifest["dir"]]
+
+
+def test_concurrent_commits_apply_one_at_a_time(monkeypatch, tmp_path):
+    import threading
+    import time
+
+    import utils.datasets as datasets
+
+    dataset = Dataset("d2", str(tmp_path))
+    active, overlaps = [], []
+    stage = datasets.stage_inventory
+
+    def slow_stage(*args, **kwargs):
+        active.append(1)
+        overlaps.append(len(active))
+        time.sleep(0.2)
+        try:
+            return stage(*args, **kwargs)
+        finally:
+            active.pop()
+
+    monkeypatch.setattr(datasets, "stage_inventory", slow_stage)
+    threads = [
+        threading.Thread(target=_commit, args=(dataset, {"applications.csv": f"App_ID,Site\n{site}-APP001,{site}\n"}))
+        for site in ("VA", "AZ")
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert overlaps == [1, 1]
+    # Inventory, summaries and retrieval chunks all come from the same (last) upload, which is still on disk
+    site = list(dataset.inventory().column("applications", "Site"))[0]
+    [summary] = dataset.summary_index.list_files("upload")
+    assert os.path.exists(summary["path"])
+    assert os.listdir(dataset.uploads_dir) == [os.path.basename(os.path.dirname(summary["path"]))]
+    assert len(dataset.retrieval_index.search(site)) == 1
@@ -0,0 +1,64 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from agents.agent_dependency import build_dependency_graph
+from agents.dependency_graph import GRAPH_FILE, DependencyGraph, get_dependency_graph
+
+
+def test_cycles_clusters_and_order(make_graph):
+    graph = make_graph([
+        ("VA-A", "VA-B", "reads_from"),
+        ("VA-B", "VA-C", "reads_from"),
+        ("VA-C", "VA-A", "streams_to"),
+        ("VA-C", "AZ-D", "reads_from"),
+        ("CO-E", "CO-E", "calls"),
+    ], apps=["VA-A", "CO-F"])
+
+    assert graph.cycles() == [["VA-A", "VA-B", "VA-C"], ["CO-E"]]
+    assert dict(zip(graph.ids.tolist(), graph.in_cycle().tolist()))["AZ-D"] is False
+    assert graph.clusters() == [["AZ-D", "VA-A", "VA-B", "VA-C"], ["CO-E"], ["CO-F"]]
+    order = graph.topological_order()
+    assert order.index("AZ-D") < min(order.index(a) for a in ("VA-A", "VA-B", "VA-C"))
+    assert graph.cross_site_edges() == [{"from_site": "VA", "to_site": "AZ", "edges": 1}]
+    assert graph.dependencies_of("VA-C") == ["VA-A", "AZ-D"]
+    assert graph.dependents_of("VA-A") == ["VA-C"]
+    assert graph.summary()["edge_types"] == {"reads_from": 3, "streams_to": 1, "calls": 1}
+
+
+def test_large_chain_is_fast():
+    n = 100_000
+    ids = np.array([f"VA-APP{i}" for i in range(n)])
+    deps = pd.DataFrame({"App_ID": ids[1:], "Depends_On_App_ID": ids[:-1], "Dependency_Type": "reads_from"})
+    start = time.perf_counter()
+    graph = DependencyGraph.from_frames(pd.DataFrame({"App_ID": ids}), deps)
+    assert time.perf_counter() - start < 5
+    assert graph.cycles() == []
+    assert graph.topological_order()[:2] == ["VA-APP0", "VA-APP1"]
+
+
+def test_graph_is_persisted_per_inventory_build(sample_inventory):
+    graph = get_dependency_graph(sample_inventory)
+    assert get_dependency_graph(sample_inventory) is graph
+    loaded = DependencyGraph.load(os.path.join(sample_inventory.data_dir, GRAPH_FILE))
+    assert loaded.topological_order() == graph.topological_order()
+    assert graph.node_count >= sample_inventory.row_count("applications")
+
+    G = build_dependency_graph(sample_inventory)
+    servers = [n for n, d in G.nodes(data=True) if d.get("type") == "server"]
+    assert servers and len(servers) == len(set(servers))
+    assert all(G.nodes[v]["type"] == "vm" for _, v in G.out_edges(servers[0]))
+
+
+def test_dependency_route_answers_locally(client, upload):
+    headers = upload("deps", {"application_dependencies.csv": "App_ID,Depends_On_App_ID,Dependency_Type\n"
+                              "VA-APP001,VA-APP002,calls\nVA-APP002,VA-APP001,reads_from\nVA-APP003,VA-APP001,calls\n"})
+
+    report = client.post("/analyze/dependencies", json={}, headers=headers).get_json()
+    assert report["cycles"] == [{"cycle": 1, "apps": ["VA-APP001", "VA-APP002"]}]
+    assert {a["App_ID"]: a["Cycle"] for a in report["apps"]} == {"VA-APP001": 1, "VA-APP002": 1, "VA-APP003": None}
+    assert [d["Circular"] for d in report["dependencies"]] == [True, True, False]
+    assert report["edge_types"] == {"calls": 2, "reads_from": 1}
+    assert "<table" in report["html_table"] and "narrative" not in report
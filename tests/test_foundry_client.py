@@ -0,0 +1,35 @@
+from agents import foundry_client
+from agents.agent_dependency_call import DEPENDENCY_AGENT_ID, run_dependency_agent
+
+
+def test_agent_handles_are_memoized(foundry_stub):
+    first = foundry_client.get_agent("asst_a")
+    second = foundry_client.get_agent("asst_a")
+    assert first is second
+    assert [r for r in foundry_stub.requests if r[1].endswith("/assistants/asst_a")] == [
+        ("GET", "/api/projects/stub/assistants/asst_a")
+    ]
+    assert foundry_client.get_project() is foundry_client.get_project()
+
+
+def test_run_dependency_agent_against_stub(foundry_stub):
+    foundry_stub.reply = lambda prompt: "| App_ID | Depends_On |\n|---|---|\n| VA-APP001 | VA-APP002 |"
+    result = run_dependency_agent("list dependencies")
+    assert "VA-APP001" in result["html_table"]
+    run_dependency_agent("again")
+    agent_fetches = [r for r in foundry_stub.requests if r[1].endswith(f"/assistants/{DEPENDENCY_AGENT_ID}")]
+    assert len(agent_fetches) == 1
+
+
+def test_cached_token_credential_reuses_tokens():
+    from azure.core.credentials import AccessToken
+    calls = []
+
+    class Credential:
+        def get_token(self, *scopes, **kwargs):
+            calls.append(scopes)
+            return AccessToken(f"t{len(calls)}", 2 ** 40)
+
+    cached = foundry_client.CachedTokenCredential(Credential())
+    assert cached.get_token("scope").token == cached.get_token("scope").token == "t1"
+    assert cached.get_token("other").token == "t2"
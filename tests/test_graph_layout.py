@@ -0,0 +1,91 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from agents.dependency_graph import DependencyGraph
+from agents.graph_layout import LAYOUT_FILE, GraphLayout, get_graph_layout
+
+
+def test_layers_follow_dependencies_and_clusters_do_not_overlap(make_graph):
+    graph = make_graph([
+        ("VA-A", "VA-B", "calls"), ("VA-B", "VA-C", "calls"), ("VA-C", "VA-B", "calls"),
+        ("AZ-X", "AZ-Y", "calls"),
+    ], apps=["CO-Z"])
+    layout = GraphLayout.compute(graph)
+    pos = {app_id: (x, y) for app_id, x, y in zip(graph.ids.tolist(), layout.x.tolist(), layout.y.tolist())}
+
+    # Dependencies sit left of their dependents; a cycle shares a layer
+    assert pos["VA-B"][0] == pos["VA-C"][0] < pos["VA-A"][0]
+    assert pos["AZ-Y"][0] < pos["AZ-X"][0]
+    assert len(set(pos.values())) == len(pos)
+    boxes = {}
+    for app_id, cluster in zip(graph.ids.tolist(), graph.wcc.tolist()):
+        boxes.setdefault(cluster, []).append(pos[app_id])
+    spans = [(min(p[0] for p in b), max(p[0] for p in b), min(p[1] for p in b), max(p[1] for p in b)) for b in boxes.values()]
+    for i, a in enumerate(spans):
+        for b in spans[i + 1:]:
+            assert a[1] < b[0] or b[1] < a[0] or a[3] < b[2] or b[3] < a[2]
+
+
+def test_tiles_and_svg(make_graph):
+    graph = make_graph([("VA-A", "VA-B", "calls"), ("VA-B", "VA-A", "reads_from"), ("VA-C", "VA-A", "calls")])
+    layout = GraphLayout.compute(graph)
+    everything = layout.tile(graph)
+    assert {n["id"] for n in everything["nodes"]} == {"VA-A", "VA-B", "VA-C"}
+    assert len(everything["edges"]) == 3
+
+    x, y = float(layout.x[graph.index["VA-C"]]), float(layout.y[graph.index["VA-C"]])
+    tile = layout.tile(graph, (x, y, x, y))
+    assert [n["id"] for n in tile["nodes"]] == ["VA-C"]
+    assert [(e["source"], e["target"]) for e in tile["edges"]] == [("VA-C", "VA-A")]
+
+    svg = layout.svg(graph)
+    assert svg.startswith("<svg") and svg.count("<circle") == 3 and "VA-C" in svg
+
+    # Truncated drawings only carry edges between the nodes they draw (VA-A and VA-B here)
+    svg = layout.svg(graph, max_nodes=2)
+    assert svg.count("<circle") == 2 and svg.count("<line") == 2 and "VA-C" not in svg
+    assert layout.svg(graph, max_edges=1).count("<line") == 1
+
+    # JSON tiles are capped the same way and say so
+    assert not everything["truncated"]
+    capped = layout.tile(graph, max_nodes=1)
+    assert capped["truncated"] and len(capped["nodes"]) == 1
+    first = capped["nodes"][0]["id"]
+    assert capped["edges"] and all(first in (e["source"], e["target"]) for e in capped["edges"])
+    capped = layout.tile(graph, max_edges=1)
+    assert capped["truncated"] and len(capped["nodes"]) == 3 and len(capped["edges"]) == 1
+
+
+def test_layout_is_cached_per_inventory_build(sample_inventory):
+    engine, layout = get_graph_layout(sample_inventory)
+    assert get_graph_layout(sample_inventory)[1] is layout
+    assert np.array_equal(GraphLayout.load(os.path.join(sample_inventory.data_dir, LAYOUT_FILE)).x, layout.x)
+    assert len(layout.x) == engine.node_count
+
+
+def test_large_layout_is_fast():
+    n = 100_000
+    ids = np.array([f"VA-APP{i}" for i in range(n)])
+    rng = np.random.default_rng(0)
+    deps = pd.DataFrame({"App_ID": ids[rng.integers(0, n, n)], "Depends_On_App_ID": ids[rng.integers(0, n, n)],
+                         "Dependency_Type": "calls"})
+    graph = DependencyGraph.from_frames(pd.DataFrame({"App_ID": ids}), deps)
+    start = time.perf_counter()
+    layout = GraphLayout.compute(graph)
+    assert time.perf_counter() - start < 5
+    assert len(np.unique(np.stack([layout.x, layout.y]), axis=1)[0]) == n
+
+
+def test_layout_routes(client, upload):
+    assert client.get("/graph/dependencies", headers={"X-Dataset-Id": "layout"}).status_code == 404
+    headers = upload("layout")
+
+    assert len(client.get("/graph/dependencies", headers=headers).get_json()["nodes"]) == 2
+    for bbox in ("1,2", "1,0,0,1", "0,1,1,0", "0,0,inf,1", "0,0,nan,1"):
+        assert client.get(f"/graph/dependencies?bbox={bbox}", headers=headers).status_code == 400
+        assert client.get(f"/graph/dependencies.svg?bbox={bbox}", headers=headers).status_code == 400
+    svg = client.get("/graph/dependencies.svg", headers=headers)
+    assert svg.mimetype == "image/svg+xml" and b"VA-APP002" in svg.data
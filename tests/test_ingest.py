@@ -0,0 +1,39 @@
+import hashlib
+import io
+import os
+import zipfile
+from utils.ingest import ingest_zip
+
+
+def make_zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    buf.seek(0)
+    return buf
+
+
+def test_ingest_zip_summarizes_supported_members(tmp_path):
+    archive = make_zip({
+        "inv/applications.csv": "App_ID,Site\nVA-APP001,VA\n",
+        "inv/notes.txt": "ignored",
+        "__MACOSX/inv/._applications.csv": "junk",
+    })
+    summaries = ingest_zip(archive, str(tmp_path), max_chars=10, max_workers=2)
+    assert summaries == [{
+        "filename": "applications.csv",
+        "type": "csv",
+        "content": "columns (2",
+        "digest": hashlib.sha256(b"App_ID,Site\nVA-APP001,VA\n").hexdigest(),
+        "path": os.path.join(str(tmp_path), "inv", "applications.csv"),
+    }]
+    assert os.path.exists(tmp_path / "inv" / "applications.csv")
+    assert not os.path.exists(tmp_path / "inv" / "notes.txt")
+
+
+def test_ingest_zip_blocks_path_traversal(tmp_path):
+    archive = make_zip({"../../evil.csv": "a,b\n1,2\n"})
+    ingest_zip(archive, str(tmp_path / "out"))
+    assert os.path.exists(tmp_path / "out" / "evil.csv")
+    assert not os.path.exists(tmp_path / "evil.csv")
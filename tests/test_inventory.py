@@ -0,0 +1,137 @@
+import glob
+import os
+from utils.inventory import build_inventory, find_inventory_csvs, get_inventory, publish_inventory, stage_inventory
+
+SAMPLE_DATA = os.path.join(os.path.dirname(__file__), "..", "sample_data")
+
+
+def test_build_inventory_from_sample_data(tmp_path):
+    csvs = find_inventory_csvs(glob.glob(os.path.join(SAMPLE_DATA, "*.csv")))
+    assert set(csvs) == {
+        "applications", "application_dependencies", "physical_servers",
+        "virtual_machines", "storage_volumes", "network_links",
+    }
+    root = str(tmp_path / "inventory")
+    store = build_inventory(csvs, root)
+
+    assert store.row_count("applications") == 75
+    used = store.column("storage_volumes", "Used_Cap_GB")
+    assert used.dtype.kind == "f"
+    assert used[0] == 70000
+    assert store.column("storage_volumes", "Encrypted").dtype == bool
+
+    first = store.records("physical_servers")[0]
+    assert first["Server_ID"] == "VA-SRV001" and first["Model"] == "HP ProLiant DL380"
+    assert get_inventory(root) is store
+
+
+def test_rebuild_swaps_in_new_inventory(tmp_path):
+    root = str(tmp_path / "inventory")
+    first = tmp_path / "network_links.csv"
+    first.write_text("Link_ID,From,To,Bandwidth_Gbps,Latency_ms,Packet_Loss_%\nVA-AZ,VA,AZ,10,3.0,0.02\n")
+    old = build_inventory({"network_links": str(first)}, root)
+    first.write_text("Link_ID,From,To,Bandwidth_Gbps,Latency_ms,Packet_Loss_%\nVA-CO,VA,CO,5,25.0,0.05\n")
+    staged = stage_inventory({"network_links": str(first)}, root)
+    store = build_inventory({"network_links": str(first)}, root)
+    assert list(store.column("network_links", "Link_ID")) == ["VA-CO"]
+    # The replaced build stays readable for one more publish; a build still being staged is left alone
+    assert list(old.column("network_links", "Link_ID")) == ["VA-AZ"]
+    assert os.path.isdir(os.path.join(root, staged["dir"]))
+
+    latest = publish_inventory(staged, root)
+    builds = {d for d in os.listdir(root) if d.startswith("build-")}
+    assert builds == {store.manifest["dir"], latest.manifest["dir"]}
+    assert latest.manifest["retired"] == [store.manifest["dir"]]
+
+
+def test_typed_columns_link_tables_and_validation(tmp_path):
+    apps = tmp_path / "applications.csv"
+    apps.write_text('App_ID,Site,Data_Size_GB,VMs_Assigned\nVA-APP001,VA,500,"VA-VM1, VA-VM2"\n'
+                    'VA-APP002,VA,oops,\nAZ-APP001,AZ,10,AZ-VM1\n')
+    vms = tmp_path / "virtual_machines.csv"
+    vms.write_text("VM_ID,Site,Power_State\nVA-VM1,VA,On\nVA-VM2,VA,Off\nAZ-VM1,AZ,On\n")
+    servers = tmp_path / "physical_servers.csv"
+    servers.write_text("Hostname,Model\nva-host-01,Dell R740\n")
+    store = build_inventory({"applications": str(apps), "virtual_machines": str(vms),
+                             "physical_servers": str(servers)}, str(tmp_path / "inventory"))
+
+    site = store.column("applications", "Site")
+    assert list(site.categories) == ["AZ", "VA"] and site.codes.dtype.itemsize == 1
+    assert store.frame("virtual_machines")["Power_State"].dtype == "category"
+    spec = next(c for c in store.manifest["tables"]["applications"]["columns"] if c["name"] == "Data_Size_GB")
+    assert spec["invalid"] == 1
+
+    links = store.frame("application_vms")
+    assert links.values.tolist() == [["VA-APP001", "VA-VM1"], ["VA-APP001", "VA-VM2"], ["AZ-APP001", "AZ-VM1"]]
+
+    assert not store.has_table("physical_servers")
+    assert "Server_ID" in store.errors()["physical_servers"]
+
+
+def test_chunked_build_matches_and_stays_small(tmp_path):
+    import tracemalloc
+    import numpy as np
+    import pandas as pd
+
+    n = 50_000
+    csv = tmp_path / "virtual_machines.csv"
+    pd.DataFrame({
+        "VM_ID": [f"VA-VM{i}" for i in range(n)], "Site": np.where(np.arange(n) % 3, "VA", "AZ"),
+        "Host_Server_ID": [f"VA-SRV{i % 90}" for i in range(n)], "CPU_Cores": np.where(np.arange(n) == 7, "", "4"),
+        "Power_State": "On",
+    }).to_csv(csv, index=False)
+
+    peaks = {}
+    for chunk_rows in (1_000, n):
+        tracemalloc.start()
+        store = build_inventory({"virtual_machines": str(csv)}, str(tmp_path / f"inv{chunk_rows}"), chunk_rows=chunk_rows)
+        peaks[chunk_rows] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        frame = store.frame("virtual_machines")
+        assert len(frame) == n and frame["VM_ID"].iloc[-1] == f"VA-VM{n - 1}"
+        assert list(frame["Site"].cat.categories) == ["AZ", "VA"]
+        # A missing value in any chunk keeps the int column as float
+        assert frame["CPU_Cores"].dtype == "float64" and np.isnan(frame["CPU_Cores"].iloc[7])
+    assert peaks[1_000] * 3 < peaks[n]
+
+
+def test_unparseable_csv_is_skipped_and_cleaned_up(tmp_path):
+    vms = tmp_path / "virtual_machines.csv"
+    vms.write_text("VM_ID,Site\nVA-VM001,VA\nVA-VM002,VA\nVA-VM003,VA\nVA-VM004,VA,extra,fields\n")
+    apps = tmp_path / "applications.csv"
+    apps.write_bytes(b"App_ID,Name\nVA-APP001,\xff\xfe\n")
+    links = tmp_path / "network_links.csv"
+    links.write_text("Link_ID,From,To,Bandwidth_Gbps,Latency_ms,Packet_Loss_%\nVA-AZ,VA,AZ,10,3.0,0.02\n")
+    root = tmp_path / "inventory"
+    store = build_inventory({"virtual_machines": str(vms), "applications": str(apps), "network_links": str(links)},
+                            str(root), chunk_rows=2)
+
+    assert store.tables() == ["network_links"]
+    assert set(store.errors()) == {"virtual_machines", "applications"}
+    assert sorted(os.listdir(store.data_dir)) == ["network_links"]
+
+
+def test_link_pairs_are_unique_across_chunks(tmp_path):
+    apps = tmp_path / "applications.csv"
+    apps.write_text('App_ID,VMs_Assigned\nA,"V1, V2"\nA,"V1, V2"\nA,V1\nB,V1\n')
+    store = build_inventory({"applications": str(apps)}, str(tmp_path / "inventory"), chunk_rows=2)
+    links = store.frame("application_vms")
+    assert links.values.tolist() == [["A", "V1"], ["A", "V2"], ["B", "V1"]]
+    assert store.row_count("application_vms") == 3
+    assert sorted(os.listdir(store.data_dir)) == ["application_vms", "applications"]
+
+
+def test_string_columns_do_not_pad_to_the_longest_value(tmp_path):
+    apps = tmp_path / "applications.csv"
+    long_name = "x" * 10_000
+    apps.write_text(f"App_ID,Name\nVA-APP001,{long_name}\nVA-APP002,Zürich\nVA-APP003,\n" + "VA-APP9,a\n" * 1000,
+                    encoding="utf-8")
+    store = build_inventory({"applications": str(apps)}, str(tmp_path / "inventory"), chunk_rows=100)
+
+    names = store.column("applications", "Name")
+    assert len(names) == 1003
+    assert (names[0], names[1], names[2], names[-1]) == (long_name, "Zürich", "", "a")
+    assert list(names[1:3]) == ["Zürich", ""]
+    assert store.frame("applications")["App_ID"].iloc[-1] == "VA-APP9"
+    data = os.path.join(store.data_dir, "applications", "c1.data.npy")
+    assert os.path.getsize(data) < 12_000
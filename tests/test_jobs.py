@@ -0,0 +1,64 @@
+import threading
+
+from agents.jobs import JobManager, JobStore
+
+
+def test_identical_in_flight_jobs_are_deduplicated(tmp_path):
+    release = threading.Event()
+    calls = []
+
+    def handler(payload):
+        calls.append(payload)
+        release.wait(5)
+        return {"answer": payload["prompt"].upper()}
+
+    jobs = JobManager(JobStore(str(tmp_path / "jobs.sqlite3")), workers=2)
+    jobs.register("plan", handler)
+
+    first, created = jobs.submit("plan", {"prompt": "go"})
+    second, created_again = jobs.submit("plan", {"prompt": "go"})
+    other, _ = jobs.submit("plan", {"prompt": "stop"})
+    assert created and not created_again
+    assert first == second != other
+
+    release.set()
+    events = list(jobs.iter_events(first, poll_seconds=0.05))
+    assert events[-1]["status"] == "done"
+    assert events[-1]["result"] == {"answer": "GO"}
+    assert len([c for c in calls if c["prompt"] == "go"]) == 1
+
+    # Once finished, the same request starts a fresh job
+    assert jobs.submit("plan", {"prompt": "go"})[0] != first
+
+
+def test_failures_and_restarts_are_recorded(tmp_path):
+    db = str(tmp_path / "jobs.sqlite3")
+    jobs = JobManager(JobStore(db))
+
+    def boom(payload):
+        raise ValueError("bad reply")
+
+    jobs.register("lease", boom)
+    job_id, _ = jobs.submit("lease", {})
+    final = list(jobs.iter_events(job_id, poll_seconds=0.05))[-1]
+    assert final["status"] == "failed" and final["error"] == "bad reply"
+
+    # A job left running by a previous process is failed on startup, and the result store persists
+    store = JobStore(db)
+    stuck, _ = store.create_or_get_active("plan", "key")
+    store.fail_abandoned()
+    assert store.get(stuck)["status"] == "failed"
+    assert JobStore(db).get(job_id)["error"] == "bad reply"
+
+
+def test_spawned_workers_reimporting_the_app_do_not_touch_jobs(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    # What a spawned worker does with the main script: run it as __mp_main__
+    backend = os.path.join(os.path.dirname(__file__), "..", "backend")
+    code = "import runpy, sys; sys.path.insert(0, sys.argv[1]); runpy.run_path(sys.argv[1] + '/app.py', run_name='__mp_main__')"
+    env = dict(os.environ, CACHE_FOLDER=str(tmp_path))
+    subprocess.run([sys.executable, "-c", code, backend], env=env, check=True, timeout=60)
+    assert not os.path.exists(tmp_path / "jobs.sqlite3")
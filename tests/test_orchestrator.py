@@ -0,0 +1,92 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from agents.foundry_client import process_run
+from agents.orchestrator import AgentTimeout, Orchestrator
+
+
+def test_calls_for_different_agents_run_concurrently():
+    orchestrator = Orchestrator(concurrency={"lease": 1, "dependency": 1})
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait(name):
+        barrier.wait()  # only passes if both calls are in flight together
+        return name
+
+    results = orchestrator.run_many({
+        "lease": ("lease", wait, ("lease",)),
+        "dependencies": ("dependency", wait, ("dependencies",)),
+    }, timeout=5)
+    assert results == {"lease": "lease", "dependencies": "dependencies"}
+
+
+def test_per_agent_limit_bounds_in_flight_calls():
+    orchestrator = Orchestrator(concurrency={"chatbot": 2})
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work(i):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return i
+
+    results = orchestrator.run_many({i: ("chatbot", work, (i,)) for i in range(6)}, timeout=5)
+    assert results == {i: i for i in range(6)}
+    assert peak[0] == 2
+
+
+def test_timeout_surfaces_as_agent_timeout():
+    orchestrator = Orchestrator(concurrency={"lease": 1})
+    release = threading.Event()
+    with pytest.raises(AgentTimeout):
+        orchestrator.run("lease", release.wait, 5, timeout=0.05)
+    release.set()
+
+    results = orchestrator.run_many({"slow": ("lease", time.sleep, (1,))}, timeout=0.05)
+    assert isinstance(results["slow"], AgentTimeout)
+
+
+def test_slots_only_touch_semaphores_on_the_loop_thread(monkeypatch):
+    orchestrator = Orchestrator(concurrency={"chatbot": 1})
+    threads = []
+    semaphore = Orchestrator._semaphore
+    monkeypatch.setattr(Orchestrator, "_semaphore",
+                        lambda self, agent: threads.append(threading.current_thread().name) or semaphore(self, agent))
+
+    for _ in range(2):  # the second slot is only free if the first was released
+        with orchestrator.slot("chatbot", timeout=1):
+            pass
+    assert orchestrator.run("chatbot", lambda: "done", timeout=1) == "done"
+    assert set(threads) == {"agent-orchestrator"}
+
+
+def test_timed_out_runs_are_cancelled_and_free_their_slot():
+    cancelled = []
+    runs = SimpleNamespace(
+        create=lambda thread_id, agent_id: SimpleNamespace(id="run_1", status="queued"),
+        get=lambda thread_id, run_id: SimpleNamespace(id=run_id, status="in_progress"),
+        cancel=lambda thread_id, run_id: cancelled.append((thread_id, run_id)) or SimpleNamespace(status="cancelling"),
+    )
+    project = SimpleNamespace(agents=SimpleNamespace(runs=runs))
+    orchestrator = Orchestrator(concurrency={"lease": 1})
+
+    with pytest.raises(AgentTimeout):
+        orchestrator.run("lease", process_run, project, "thread_1", "asst_1", 0.01, timeout=0.1)
+    # The next call only gets the single slot once the cancelled run has returned
+    assert orchestrator.run("lease", lambda: "next", timeout=2) == "next"
+    assert cancelled == [("thread_1", "run_1")]
+
+
+def test_analyze_all_rejects_a_bad_timeout(foundry_stub, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    import app as app_module
+    client = app_module.app.test_client()
+    for timeout in ("abc", -5, [1]):
+        response = client.post("/analyze/all", json={"timeout": timeout})
+        assert response.status_code == 400
@@ -0,0 +1,31 @@
+import fitz
+from utils import pdf_parser
+
+
+def make_pdf(path, page_count):
+    doc = fitz.open()
+    for i in range(page_count):
+        doc.new_page().insert_text((72, 72), f"Lease page {i}")
+    doc.save(str(path))
+    doc.close()
+
+
+def test_extract_pdf_text_matches_fitz(tmp_path):
+    path = tmp_path / "lease.pdf"
+    make_pdf(path, 3)
+    doc = fitz.open(str(path))
+    expected = "\n".join(page.get_text() for page in doc)
+    doc.close()
+    assert pdf_parser.extract_pdf_text(str(path)) == expected
+
+
+def test_budget_stops_early_and_cache_extends(tmp_path):
+    path = tmp_path / "packet.pdf"
+    make_pdf(path, pdf_parser.MIN_PAGES_FOR_POOL + 6)
+    first = pdf_parser.extract_pdf_pages(str(path), max_chars=20)
+    assert 0 < len(first) < pdf_parser.MIN_PAGES_FOR_POOL + 6
+    assert first[0].startswith("Lease page 0")
+
+    everything = pdf_parser.extract_pdf_pages(str(path))
+    assert len(everything) == pdf_parser.MIN_PAGES_FOR_POOL + 6
+    assert everything[-1].startswith(f"Lease page {pdf_parser.MIN_PAGES_FOR_POOL + 5}")
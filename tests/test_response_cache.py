@@ -0,0 +1,63 @@
+import time
+
+from agents.response_cache import ResponseCache, cached_agent_call, hashed_embedding
+from agents.agent_migrationplan_call import run_migrationplan_agent
+
+
+def test_key_normalizes_prompt_and_scopes_by_agent_and_dataset(tmp_path):
+    cache = ResponseCache(str(tmp_path / "r.sqlite3"))
+    cache.put("asst_a", "Plan  the\nMigration", "v1", {"response": "plan"})
+    assert cache.get("asst_a", "plan the migration", "v1") == {"response": "plan"}
+    assert cache.get("asst_a", "plan the migration", "v2") is None
+    assert cache.get("asst_b", "plan the migration", "v1") is None
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "r.sqlite3"), ttl=0.05, max_entries=2)
+    cache.put("a", "one", "", 1)
+    cache.put("a", "two", "", 2)
+    cache.get("a", "one")
+    cache.put("a", "three", "", 3)
+    assert cache.count() == 2
+    assert cache.get("a", "two") is None
+    assert cache.get("a", "one") == 1
+    time.sleep(0.06)
+    assert cache.get("a", "three") is None
+
+
+def test_similarity_tier_matches_reworded_prompts(tmp_path):
+    cache = ResponseCache(str(tmp_path / "r.sqlite3"), similarity=0.8)
+    prompt = "Please provide a table of the dependencies and call out any circular dependencies."
+    cache.put("dep", prompt, "v1", {"response": "table"})
+    assert cache.get("dep", "Please provide a table of the dependencies and call out circular dependencies", "v1") == {
+        "response": "table"
+    }
+    assert cache.get("dep", "Summarize the lease termination clauses", "v1") is None
+    assert abs(float(hashed_embedding(prompt) @ hashed_embedding(prompt)) - 1.0) < 1e-5
+
+
+def test_cached_agent_call_skips_errors_and_honours_refresh(foundry_stub):
+    foundry_stub.reply = lambda prompt: "plan v1"
+    assert run_migrationplan_agent("build a plan") == {"response": "plan v1"}
+    foundry_stub.reply = lambda prompt: "plan v2"
+    assert run_migrationplan_agent("build  a plan") == {"response": "plan v1"}
+    assert run_migrationplan_agent("build a plan", refresh=True) == {"response": "plan v2"}
+
+    calls = []
+
+    @cached_agent_call("flaky", per_dataset=False)
+    def flaky(prompt):
+        calls.append(prompt)
+        return {"error": "Run failed"}
+
+    flaky("x")
+    flaky("x")
+    assert len(calls) == 2
+
+
+def test_unfinished_runs_are_not_cached(foundry_stub):
+    foundry_stub.run_status = "expired"
+    assert run_migrationplan_agent("plan the move")["error"] == "Run expired"
+    foundry_stub.run_status = "completed"
+    foundry_stub.reply = lambda prompt: "plan"
+    assert run_migrationplan_agent("plan the move") == {"response": "plan"}
@@ -0,0 +1,52 @@
+from utils.retrieval import RetrievalIndex, csv_chunks, match_query
+
+
+def test_csv_rows_are_chunked_with_column_names(tmp_path):
+    path = tmp_path / "applications.csv"
+    path.write_text("App_ID,Site\n" + "".join(f"VA-APP{i:03d},VA\n" for i in range(7)))
+    chunks = list(csv_chunks(str(path), rows_per_chunk=5))
+    assert [label for label, _ in chunks] == ["rows 2-6", "rows 7-8"]
+    assert chunks[0][1].splitlines()[0] == "App_ID: VA-APP000; Site: VA"
+
+
+def test_search_ranks_matching_rows_first(tmp_path):
+    apps = tmp_path / "applications.csv"
+    apps.write_text("App_ID,Site,Priority\nVA-APP001,VA,High\nAZ-APP002,AZ,Low\nCO-APP003,CO,Medium\n")
+    links = tmp_path / "network_links.csv"
+    links.write_text("Link_ID,Bandwidth_Gbps\nAZ-LNK1,10\n")
+
+    index = RetrievalIndex(str(tmp_path / "retrieval.sqlite3"))
+    files = [{"path": str(apps), "filename": "applications.csv"}, {"path": str(links), "filename": "network_links.csv"}]
+    index.replace_source("upload", files)
+    assert index.count("upload") == 2
+
+    hits = index.search("Which site hosts the high priority apps?", k=1)
+    assert hits[0]["filename"] == "applications.csv" and "Priority: High" in hits[0]["content"]
+    assert index.search("bandwidth", filenames=["NETWORK_LINKS.csv"])[0]["label"] == "rows 2-2"
+    assert index.search("bandwidth", filenames=["applications.csv"]) == []
+
+    # Re-indexing replaces the previous upload's chunks
+    index.replace_source("upload", files[1:])
+    assert index.count("upload") == 1
+    assert match_query('say "hi" OR (x)') == '"say" OR "hi" OR "or"'
+
+
+def test_sources_are_replaced_and_filtered_through_the_side_table(tmp_path):
+    apps = tmp_path / "applications.csv"
+    apps.write_text("App_ID,Site\nVA-APP001,VA\n")
+    notes = tmp_path / "notes.csv"
+    notes.write_text("Note\nVA lease ends soon\n")
+
+    index = RetrievalIndex(str(tmp_path / "retrieval.sqlite3"))
+    index.replace_source("upload", [{"path": str(apps), "filename": "applications.csv"}])
+    index.replace_source("app_files", [{"path": str(notes), "filename": "notes.csv"}] * 3)
+    assert (index.count("upload"), index.count("app_files"), index.count()) == (1, 3, 4)
+    assert [hit["filename"] for hit in index.search("VA", source="upload")] == ["applications.csv"]
+
+    index.replace_source("upload", [])
+    assert (index.count("upload"), index.count()) == (0, 3)
+    assert index.search("VA", source="upload") == []
+    assert len(index.search("VA")) == 3
+    plan = " ".join(row[3] for row in index._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT rowid FROM chunk_sources WHERE source = ?", ("upload",)))
+    assert "chunk_sources_source" in plan
@@ -0,0 +1,83 @@
+import math
+
+import pytest
+from agents.roi_calculator import (
+    process_site, roi_summary, run_roi_calculations_from_json, run_roi_scenarios, scenario_grid, scenario_rows,
+    sites_frame,
+)
+
+LEASE = {
+    "VA": {"Monthly Rent": 60000, "DL380_count": 6, "R740_R750_count": 5, "SR650_count": 8,
+           "total_GB": 629000, "number_of_applications": 30, "sum_of_bandwidth": 95},
+    "TX": {"Monthly Rent": 1000, "DL380_count": 1, "total_GB": 100, "number_of_applications": 2,
+           "sum_of_bandwidth": 1, "power_rate": 0.1},
+}
+
+
+def test_neutral_scenario_matches_process_site():
+    results = run_roi_scenarios(sites_frame(LEASE), scenario_grid())
+    for site, data in LEASE.items():
+        expected = process_site(site, data)
+        row = results[results["Site"] == site].iloc[0]
+        for col in ("OnPrem_Yearly", "Cloud_Yearly", "OneTime_Cost", "Investment", "Savings"):
+            assert round(row[col]) == expected[col]
+        assert f"{row['ROI'] * 100:.1f}%" == expected["ROI"]
+        payback = f"{row['Payback_Years']:.1f}" if math.isfinite(row["Payback_Years"]) else "N/A"
+        assert payback == expected["Payback_Years"]
+
+
+def test_columnar_summary_matches_row_by_row_table():
+    lease = dict(LEASE, ZZ={"Monthly Rent": 0})
+    summary = roi_summary(lease)
+    assert summary.astype(str).equals(run_roi_calculations_from_json(lease).astype(str))
+    assert summary["Payback_Years"].tolist()[-1] == "N/A"
+
+
+def test_sweep_is_sites_times_scenarios():
+    grid = scenario_grid(power_rate=[0.08, 0.12, 0.2], storage_growth=[1.0, 2.0])
+    results = run_roi_scenarios(sites_frame(LEASE), grid)
+    assert len(results) == 2 * 6
+    va = results[results["Site"] == "VA"]
+    cheap = va[(va["power_rate"] == 0.08) & (va["storage_growth"] == 1.0)].iloc[0]
+    grown = va[(va["power_rate"] == 0.08) & (va["storage_growth"] == 2.0)].iloc[0]
+    assert grown["Storage_Monthly"] == 2 * cheap["Storage_Monthly"]
+    assert va["Power_Monthly"].nunique() == 3
+
+
+def test_process_site_is_silent_and_traced_only_on_request(capsys):
+    from agents.tracing import current_trace, end_trace, start_trace
+
+    assert current_trace() is None
+    process_site("VA", LEASE["VA"])
+    assert capsys.readouterr().out == ""
+
+    trace, token = start_trace("test")
+    try:
+        process_site("VA", LEASE["VA"])
+    finally:
+        end_trace(token)
+    event = trace.to_dict()["events"][0]
+    assert event["stage"] == "roi_site" and event["site"] == "VA"
+    assert event["vpn"] == 100 and event["compute"] > 0
+
+
+def test_scenarios_and_sites_are_validated():
+    for bad in ({"power_rate": [float("nan")]}, {"storage_growth": ["lots"]}, {"surge": [1]}):
+        with pytest.raises(ValueError):
+            scenario_grid(**bad)
+        with pytest.raises(ValueError):
+            scenario_rows([{name: values[0] for name, values in bad.items()}])
+    with pytest.raises(ValueError):
+        scenario_rows(["cheap"])
+    with pytest.raises(ValueError):
+        sites_frame(["VA"])
+    assert scenario_rows([{"power_rate": None}, {"power_rate": 0.1}])["Scenario"].tolist() == [0, 1]
+    assert sites_frame({"VA": {"total_GB": "nan"}})["total_GB"].tolist() == [0.0]
+
+
+def test_sweep_route_rejects_bad_input(client):
+    for body in ({"sites": ["VA"]}, {"sites": LEASE, "scenarios": [{"surge": 1}]},
+                 {"sites": LEASE, "scenarios": {"labor_monthly": ["NaN"]}}, {"sites": LEASE, "scenarios": "cheap"}):
+        assert client.post("/analyze/roi/sweep", json=body).status_code == 400
+    ok = client.post("/analyze/roi/sweep", json={"sites": LEASE, "scenarios": [{"power_rate": 0.1}]})
+    assert ok.status_code == 200 and len(ok.get_json()["results"]) == 2
@@ -0,0 +1,24 @@
+import pandas as pd
+from agents import roi_formatter
+
+
+def test_summary_table_matches_row_by_row_rendering():
+    roi_df = pd.DataFrame({
+        "Site": [f"S{i}" for i in range(600)],
+        "Savings": range(600),
+        "ROI": [f"{i / 10:.1f}%" for i in range(600)],
+    })
+    expected = "<h4>Summary Table</h4><table class='table table-bordered'><thead><tr>"
+    expected += "".join(f"<th>{col}</th>" for col in roi_df.columns) + "</tr></thead><tbody>"
+    for _, row in roi_df.iterrows():
+        expected += "<tr>" + "".join(f"<td>{val}</td>" for val in row) + "</tr>"
+    expected += "</tbody></table>"
+
+    chunks = list(roi_formatter.iter_roi_summary_table(roi_df))
+    assert "".join(chunks) == expected
+    assert len(chunks) > 2
+
+
+def test_empty_table_still_renders():
+    html = roi_formatter.format_roi_summary_table(pd.DataFrame(columns=["Site", "ROI"]))
+    assert html.endswith("<th>Site</th><th>ROI</th></tr></thead><tbody></tbody></table>")
@@ -0,0 +1,25 @@
+from agents.site_metrics import compute_site_metrics, merge_lease_metrics
+
+
+def test_site_metrics_from_sample_data(sample_inventory):
+    metrics = compute_site_metrics(sample_inventory)
+    # SR650_count leaves out VA-SRV003, which only hosts powered-off VMs
+    assert metrics["VA"] == {
+        "DL380_count": 6, "R740_R750_count": 5, "SR650_count": 8,
+        "total_GB": 629000.0, "number_of_applications": 30, "sum_of_bandwidth": 95.0,
+    }
+    assert metrics["CO"]["number_of_applications"] == 20
+
+
+def test_merge_keeps_lease_clauses_and_overrides_numbers():
+    lease = {"va": {"Monthly Rent": 50000, "termination_fee_clause": "6 months", "DL380_count": 99},
+             "CO": {"Monthly Rent": 20000}}
+    metrics = {"VA": {"DL380_count": 6}, "AZ": {"DL380_count": 5}}
+    merged = merge_lease_metrics(lease, metrics)
+    assert list(merged) == ["VA", "CO", "AZ"]
+    assert merged["VA"]["Monthly Rent"] == 50000
+    assert merged["VA"]["DL380_count"] == 6
+    assert merged["VA"]["site"] == "VA"
+    # Sites missing from the agent's reply keep their inventory numbers
+    assert merged["AZ"] == {"site": "AZ", "DL380_count": 5}
+    assert merged["CO"]["DL380_count"] == 0
@@ -0,0 +1,59 @@
+import json
+
+from agents.agent_migrationplan_call import stream_migrationplan_agent
+
+
+def _events(response):
+    return [
+        (block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+        for block in response.get_data(as_text=True).strip().split("\n\n")
+    ]
+
+
+def test_stream_migrationplan_agent_yields_deltas(foundry_stub):
+    foundry_stub.reply = lambda prompt: "Wave 1 moves VA first"
+    chunks = list(stream_migrationplan_agent("plan it"))
+    assert len(chunks) == 5
+    assert "".join(chunks) == "Wave 1 moves VA first"
+
+
+def test_generate_plan_stream_route_sends_sse(foundry_stub, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    import app as app_module
+
+    foundry_stub.reply = lambda prompt: "## 1. Dependency Graph Summary"
+    response = app_module.app.test_client().post("/generate-plan/stream", json={"prompt": "plan"})
+    assert response.mimetype == "text/event-stream"
+
+    events = _events(response)
+    assert [name for name, _ in events] == ["delta"] * 5 + ["done"]
+    assert events[-1][1]["response"] == "## 1. Dependency Graph Summary"
+
+
+def test_unfinished_runs_end_the_stream_with_an_error(client, foundry_stub):
+    for status in ("expired", "cancelled", "incomplete", "failed"):
+        foundry_stub.run_status = status
+        events = _events(client.post("/generate-plan/stream", json={"prompt": "plan"}))
+        assert events[-1][0] == "error" and status in events[-1][1]["error"]
+        assert "done" not in [name for name, _ in events]
+
+    # Nothing from the unfinished runs was cached
+    foundry_stub.run_status = "completed"
+    foundry_stub.reply = lambda prompt: "finished"
+    assert _events(client.post("/generate-plan/stream", json={"prompt": "plan"}))[-1] == ("done", {"response": "finished"})
+
+
+def test_plan_stream_is_scoped_and_cached(client, upload, foundry_stub):
+    foundry_stub.reply = lambda prompt: "Wave 1 first"
+    headers = upload("streamed")
+    first = _events(client.post("/generate-plan/stream", json={"prompt": "plan"}, headers=headers))
+    assert first[-1] == ("done", {"response": "Wave 1 first"})
+
+    foundry_stub.reply = lambda prompt: "something else"
+    again = _events(client.post("/generate-plan/stream", json={"prompt": "plan"}, headers=headers))
+    assert again == [("delta", {"text": "Wave 1 first"}), ("done", {"response": "Wave 1 first"})]
+    # The blocking route reads the same entry; another dataset does not
+    assert client.post("/generate-plan", json={"prompt": "plan"}, headers=headers).get_json() == {"response": "Wave 1 first"}
+    other = _events(client.post("/generate-plan/stream", json={"prompt": "plan"}, headers=upload("other", {
+        "application_dependencies.csv": "App_ID,Depends_On_App_ID,Dependency_Type\nAZ-APP001,AZ-APP002,calls\n"})))
+    assert other[-1] == ("done", {"response": "something else"})
@@ -0,0 +1,44 @@
+import os
+
+from utils.summarizer import summarize_file, summarize_table
+
+
+def test_summarize_table_profiles_small_csv(tmp_path):
+    path = tmp_path / "storage_volumes.csv"
+    path.write_text("Volume_ID,Site,Used_Cap_GB\nVA-LUN001,VA,70000\nVA-LUN002,VA,8000\nAZ-LUN001,AZ,\n")
+    summary = summarize_table(str(path), max_chars=2500)
+    assert "columns (3): Volume_ID, Site, Used_Cap_GB" in summary
+    assert "rows: 3" in summary
+    assert "- Used_Cap_GB: numeric, min 8000, max 70000, mean 3.9e+04, 1 empty" in summary
+    assert "- Site: text, 2 distinct, top VA (2), AZ (1), 0 empty" in summary
+    assert "VA-LUN001,VA,70000" in summary
+
+
+def test_summarize_table_estimates_rows_without_reading_whole_file(tmp_path):
+    path = tmp_path / "virtual_machines.csv"
+    with open(path, "w") as f:
+        f.write("VM_ID,Power_State\n")
+        for i in range(20000):
+            f.write(f"VM{i:06d},On\n")
+    summary = summarize_table(str(path), max_chars=2500, sample_bytes=4096)
+    assert "rows: ~" in summary
+    estimate = int(summary.split("rows: ~")[1].split()[0])
+    assert 18000 < estimate < 22000
+    assert len(summary) <= 2500
+
+
+def test_prefix_mode_keeps_raw_text(tmp_path):
+    path = tmp_path / "applications.csv"
+    path.write_text("App_ID,Site\nVA-APP001,VA\n")
+    summary = summarize_file(str(path), max_chars=10, mode="prefix")
+    assert summary == {"filename": "applications.csv", "type": "csv", "content": "App_ID,Sit"}
+
+
+def test_summary_cache_is_keyed_on_file_stat(tmp_path):
+    path = tmp_path / "applications.csv"
+    path.write_text("App_ID,Site\nVA-APP001,VA\n")
+    first = summarize_file(str(path), max_chars=10, mode="prefix")
+    path.write_text("Name,Owner\nbilling,ops\n")
+    os.utime(path, ns=(0, 10 ** 18))
+    second = summarize_file(str(path), max_chars=10, mode="prefix")
+    assert (first["content"], second["content"]) == ("App_ID,Sit", "Name,Owner")
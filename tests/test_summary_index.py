@@ -0,0 +1,40 @@
+import os
+from utils.summary_index import SummaryIndex
+
+
+def test_refresh_folder_only_resummarizes_changed_files(tmp_path):
+    folder = tmp_path / "app_files"
+    folder.mkdir()
+    (folder / "a.csv").write_text("x,y\n1,2\n")
+    (folder / "b.json").write_text("[]")
+    calls = []
+
+    def summarize(path, filename):
+        calls.append(filename)
+        with open(path) as f:
+            return {"filename": filename, "type": filename.split(".")[-1], "content": f.read()}
+
+    index = SummaryIndex(str(tmp_path / "index.sqlite3"))
+    index.refresh_folder("app_files", str(folder), summarize)
+    index.refresh_folder("app_files", str(folder), summarize)
+    assert sorted(calls) == ["a.csv", "b.json"]
+
+    (folder / "a.csv").write_text("x,y\n1,2\n3,4\n")
+    os.remove(folder / "b.json")
+    index.refresh_folder("app_files", str(folder), summarize)
+    assert calls[-1] == "a.csv"
+    assert [s["content"] for s in index.iter_summaries("app_files")] == ["x,y\n1,2\n3,4\n"]
+
+
+def test_replace_source_and_filtered_reads(tmp_path):
+    index = SummaryIndex(str(tmp_path / "index.sqlite3"))
+    index.replace_source("upload", [
+        {"path": "/u/VA Lease.pdf", "filename": "VA Lease.pdf", "type": "pdf", "content": "lease"},
+        {"path": "/u/applications.csv", "filename": "applications.csv", "type": "csv", "content": "App_ID"},
+    ])
+    assert index.count("upload") == 2
+    only = list(index.iter_summaries("upload", filenames=["applications.csv"]))
+    assert only == [{"filename": "applications.csv", "type": "csv", "content": "App_ID"}]
+
+    index.replace_source("upload", [])
+    assert index.count("upload") == 0
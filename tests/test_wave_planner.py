@@ -0,0 +1,106 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from agents.wave_planner import lease_deadlines, plan_waves
+
+
+def _attributes(graph, vms, data_gb=None, priority=None):
+    return pd.DataFrame({
+        "VMs": [vms.get(a, 1) for a in graph.ids],
+        "Data_Size_GB": [(data_gb or {}).get(a, 0) for a in graph.ids],
+        "Priority": [(priority or {}).get(a, 3) for a in graph.ids],
+    })
+
+
+def test_waves_respect_dependencies_cycles_and_capacity(make_graph):
+    apps = ["VA-A", "VA-B", "VA-C", "VA-D", "VA-E", "AZ-X", "AZ-Y"]
+    graph = make_graph([
+        ("VA-A", "VA-B", "calls"), ("VA-B", "VA-A", "calls"),   # cycle: must move together
+        ("VA-C", "VA-A", "calls"), ("VA-D", "VA-C", "calls"), ("VA-E", "VA-D", "calls"),
+        ("AZ-X", "AZ-Y", "calls"),
+    ], apps)
+    plan = plan_waves(graph, _attributes(graph, {}), max_vms=3, max_data_gb=1000, start=date(2027, 1, 1))
+    wave = plan["assignment"]
+
+    assert wave["VA-A"] == wave["VA-B"]
+    for src, dst in (("VA-C", "VA-A"), ("VA-D", "VA-C"), ("VA-E", "VA-D"), ("AZ-X", "AZ-Y")):
+        assert wave[src] >= wave[dst]
+    assert wave["AZ-X"] == wave["AZ-Y"]
+    assert all(w["vms"] <= 3 and not w["over_capacity"] for w in plan["waves"])
+    assert sorted(a for w in plan["waves"] for a in w["apps"]) == sorted(apps)
+    assert plan["waves"][1]["start"] == "2027-04-01"
+
+
+def test_lease_deadlines_and_priority_order_clusters(make_graph):
+    graph = make_graph([("VA-A", "VA-B", "calls"), ("AZ-X", "AZ-Y", "calls")], ["VA-A", "VA-B", "AZ-X", "AZ-Y"])
+    attributes = _attributes(graph, {}, priority={"VA-A": 1})
+    deadlines = lease_deadlines({"AZ": {"lease_end_date": "2027-02-01"}, "VA": {"lease_end_date": "n/a"}})
+    assert deadlines == {"AZ": date(2027, 2, 1)}
+
+    plan = plan_waves(graph, attributes, deadlines, start=date(2027, 1, 1), max_vms=2)
+    assert plan["waves"][0]["apps"] == ["AZ-X", "AZ-Y"]
+    assert plan["waves"][0]["lease_risk"] == ["AZ-X", "AZ-Y"]
+    assert plan["cross_wave_dependencies"] == 0
+    # Without lease pressure the higher-priority cluster goes first
+    assert plan_waves(graph, attributes, max_vms=2)["waves"][0]["apps"] == ["VA-A", "VA-B"]
+
+
+def test_replan_keeps_previous_waves(make_graph):
+    apps = [f"VA-{i}" for i in range(6)]
+    graph = make_graph([], apps)
+    first = plan_waves(graph, _attributes(graph, {}), max_vms=2)
+    previous = dict(first["assignment"])
+    previous["VA-0"], previous["VA-5"] = previous["VA-5"], previous["VA-0"]
+
+    grown = make_graph([], apps + ["VA-6"])
+    again = plan_waves(grown, _attributes(grown, {}), max_vms=2, previous=previous)
+    assert all(again["assignment"][a] == previous[a] for a in apps)
+    assert again["assignment"]["VA-6"] == 4
+
+
+def test_replan_keeps_a_pinned_cluster_together(make_graph):
+    graph = make_graph([("VA-A", "VA-B", "calls"), ("VA-A", "VA-C", "calls")], ["VA-X", "VA-A", "VA-B", "VA-C"])
+    plan = plan_waves(graph, _attributes(graph, {}), max_vms=3, previous={"VA-X": 1, "VA-A": 2, "VA-B": 2})
+    # New dependency VA-C joins its cluster's wave rather than the first one with room
+    assert plan["assignment"] == {"VA-X": 1, "VA-A": 2, "VA-B": 2, "VA-C": 2}
+    assert plan["cross_wave_dependencies"] == 0
+
+
+def test_non_positive_limits_are_rejected(make_graph):
+    graph = make_graph([], ["VA-A"])
+    for limits in ({"max_vms": 0}, {"max_data_gb": -1}, {"wave_days": 0}):
+        with pytest.raises(ValueError):
+            plan_waves(graph, _attributes(graph, {}), **limits)
+
+
+def test_oversized_cycle_gets_its_own_wave(make_graph):
+    graph = make_graph([("VA-A", "VA-B", "calls"), ("VA-B", "VA-A", "calls")], ["VA-A", "VA-B", "VA-C"])
+    plan = plan_waves(graph, _attributes(graph, {"VA-A": 5, "VA-B": 5}), max_vms=4)
+    assert [w["over_capacity"] for w in plan["waves"]] == [True, False]
+
+
+def test_wave_plan_route(client, upload):
+    headers = upload("waves", {
+        "applications.csv": 'App_ID,Site,Data_Size_GB,VMs_Assigned,Priority\n'
+                            'VA-APP001,VA,100,"VA-VM1, VA-VM2",1\nVA-APP002,VA,50,VA-VM3,2\n',
+        "application_dependencies.csv": "App_ID,Depends_On_App_ID,Dependency_Type\nVA-APP001,VA-APP002,calls\n",
+    })
+
+    plan = client.post("/plan/waves", json={"max_vms": 2, "start": "2027-01-01"}, headers=headers).get_json()
+    assert plan["assignment"] == {"VA-APP001": 2, "VA-APP002": 1}
+    assert [w["vms"] for w in plan["waves"]] == [1, 2]
+    assert client.post("/plan/waves", json={"start": "soon"}, headers=headers).status_code == 400
+    for bad in ({"max_vms": 0}, {"max_data_gb": -5}, {"max_data_gb": "nan"}, {"wave_days": 0}):
+        assert client.post("/plan/waves", json=bad, headers=headers).status_code == 400
+
+    # What-if plans leave nothing behind; only a committed plan is kept by later replans
+    roomy = {"max_vms": 10, "start": "2027-01-01"}
+    assert client.post("/plan/waves", json=roomy, headers=headers).get_json()["assignment"] == {"VA-APP001": 1, "VA-APP002": 1}
+    client.post("/plan/waves", json={"max_vms": 2, "commit": True}, headers=headers)
+    assert client.post("/plan/waves", json=roomy, headers=headers).get_json()["assignment"] == {"VA-APP001": 2, "VA-APP002": 1}
+    fresh = client.post("/plan/waves", json=dict(roomy, replan="false"), headers=headers).get_json()
+    assert fresh["assignment"] == {"VA-APP001": 1, "VA-APP002": 1}
+    for bad in ({"replan": "no"}, {"replan": 2}, {"commit": "yes please"}):
+        assert client.post("/plan/waves", json=bad, headers=headers).status_code == 400